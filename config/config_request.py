@@ -19,6 +19,7 @@ import logging
 from os import path
 from utils.file_utils import read_json
 from feed.feed_request import Feed
+from feed.feed_session import FeedSession
 from filter.feed_filter import FeedFilterRequest
 from constants.feed_constants import SUCCESS_CODE
 from enums.config_enums import ConfigField, FeedField, FilterField
@@ -39,8 +40,12 @@ class ConfigRequest(object):
 
 
 class ConfigFileRequest(object):
-    def __init__(self, config_file_path):
+    def __init__(self, config_file_path, session=None, store=None):
         self.file_path = config_file_path
+        # all the feed requests in the config file share the connections of one session
+        self.session = session if session else FeedSession()
+        # the feed files are kept in the feed store if given
+        self.store = store
         self.__token = None
         self.__config_json_obj = None
         self.__requests = []
@@ -55,28 +60,85 @@ class ConfigFileRequest(object):
         self.__create_requests(token)
 
     def process_requests(self):
+        """
+        Downloads the feed files of all the requests first, then applies the filter requests, so a filter request runs
+        after every download has finished rather than right after its own. The filter requests of the same feed file
+        are applied in one pass over it, a batch that fails is logged and does not stop the other batches. The entries
+        of the feed files in the store are locked from their download until the filters are done, so the next downloads
+        do not evict them
+        :return: False if there are no requests to process, True otherwise
+        """
         if not self.requests:
             logger.error('No requests to process')
             return False
+        # the feed request and the lock of every stored feed file that is filtered, by the path of the feed file
+        store_locks = {}
+        try:
+            self.__process_requests(store_locks)
+        finally:
+            for feed_req, store_lock in store_locks.values():
+                feed_req.release_store_entry(store_lock)
+        return True
+
+    def __process_requests(self, store_locks):
+        filter_requests = []
         for config_request_obj in self.requests:
             get_response = None
             if config_request_obj.feed_obj:
                 feed_req = config_request_obj.feed_obj
+                if feed_req.file_path in store_locks:
+                    # the feed file is downloaded again by this request, which waits for the lock of its entry
+                    feed_req.release_store_entry(store_locks.pop(feed_req.file_path)[1])
                 get_response = feed_req.get()
                 if get_response.status_code != SUCCESS_CODE:
                     logger.error('Exception in downloading feed. Cannot proceed, continue to the next request\n'
                                  'File Path: %s | Error message: %s\nFeed Request: %s\n', get_response.file_path,
                                  get_response.message, feed_req)
                     continue
+                if feed_req.store and config_request_obj.filter_request_obj:
+                    store_locks[feed_req.file_path] = (feed_req, feed_req.lock_store_entry())
             if config_request_obj.filter_request_obj:
                 filter_req = config_request_obj.filter_request_obj
                 if get_response and get_response.file_path:
                     # override input file path if set
                     filter_req.input_file_path = get_response.file_path
-                filter_response = filter_req.filter()
+                    if feed_req.store and not filter_req.output_directory:
+                        # the filtered file is not written into the entry of the feed store
+                        filter_req.output_directory = feed_req.output_location
+                filter_requests.append(filter_req)
+        # the filter requests of the same feed file are applied in one pass over it
+        for filter_batch in self.__group_filter_requests(filter_requests):
+            try:
+                if len(filter_batch) > 1:
+                    filter_responses = FeedFilterRequest.filter_batch(filter_batch)
+                else:
+                    filter_responses = [filter_batch[0].filter()]
+            except Exception as exp:
+                logger.error('Exception in filtering feed. Continue to the next filter requests\n'
+                             'Input File Path: %s | Error message: %s\nFilter Requests: %s\n',
+                             filter_batch[0].input_file_path, exp, ', '.join(str(req) for req in filter_batch))
+                continue
+            for filter_response in filter_responses:
                 if filter_response.status_code != SUCCESS_CODE:
                     print(filter_response.message)
-        return True
+
+    @staticmethod
+    def __group_filter_requests(filter_requests):
+        """
+        :return: list of the lists of the filter requests that parse the same input file with the same options. The
+        requests that read a cache directory or a DB file, filter in two phases or filter with many workers are
+        filtered alone, since a batch does not use these options
+        """
+        filter_batches = {}
+        for index, filter_req in enumerate(filter_requests):
+            if filter_req.cache_directory or filter_req.db_file_path or filter_req.late_materialization or \
+                    filter_req.number_of_workers > 1:
+                batch_key = index
+            else:
+                batch_key = (filter_req.input_file_path, filter_req.compression_type, filter_req.separator,
+                             filter_req.encoding)
+            filter_batches.setdefault(batch_key, []).append(filter_req)
+        return list(filter_batches.values())
 
     def __load_config(self):
         # check the path
@@ -104,7 +166,12 @@ class ConfigFileRequest(object):
                                 feed_field.get(FeedField.DATE.value),
                                 feed_field.get(FeedField.ENVIRONMENT.value),
                                 feed_field.get(FeedField.DOWNLOAD_LOCATION.value),
-                                feed_field.get(FeedField.FILE_FORMAT.value))
+                                feed_field.get(FeedField.FILE_FORMAT.value),
+                                feed_field.get(FeedField.NUMBER_OF_WORKERS.value),
+                                session=self.session,
+                                adaptive_chunk_size=feed_field.get(FeedField.ADAPTIVE_CHUNK_SIZE.value, False),
+                                verify=feed_field.get(FeedField.VERIFY.value, False),
+                                store=self.store)
             filter_request_obj = None
             filter_field = req.get(ConfigField.FILTER_REQUEST.value)
             if filter_field:
@@ -119,6 +186,25 @@ class ConfigFileRequest(object):
                                                        filter_field.get(FilterField.ITEM_LOCATION_COUNTRIES.value),
                                                        filter_field.get(FilterField.INFERRED_EPIDS.value),
                                                        filter_field.get(FilterField.ANY_QUERY.value),
-                                                       filter_field.get(FilterField.FILE_FORMAT.value))
+                                                       engine=filter_field.get(FilterField.ENGINE.value),
+                                                       number_of_workers=filter_field.get(
+                                                           FilterField.NUMBER_OF_WORKERS.value),
+                                                       cache_directory=filter_field.get(
+                                                           FilterField.CACHE_DIRECTORY.value),
+                                                       db_file_path=filter_field.get(FilterField.DB_FILE_PATH.value),
+                                                       late_materialization=filter_field.get(
+                                                           FilterField.LATE_MATERIALIZATION.value, False),
+                                                       item_ids_file_path=filter_field.get(
+                                                           FilterField.ITEM_IDS_FILE_PATH.value),
+                                                       gtins_file_path=filter_field.get(
+                                                           FilterField.GTINS_FILE_PATH.value),
+                                                       epids_file_path=filter_field.get(
+                                                           FilterField.EPIDS_FILE_PATH.value),
+                                                       db_directory=filter_field.get(FilterField.DB_DIRECTORY.value),
+                                                       output_format=filter_field.get(FilterField.FILE_FORMAT.value),
+                                                       compression_level=filter_field.get(
+                                                           FilterField.COMPRESSION_LEVEL.value),
+                                                       output_directory=filter_field.get(
+                                                           FilterField.OUTPUT_DIRECTORY.value))
             config_request_obj = ConfigRequest(feed_obj, filter_request_obj)
             self.requests.append(config_request_obj)
@@ -18,6 +18,7 @@
 REQUEST_TIMEOUT = 60
 REQUEST_RETRIES = 3
 BACK_OFF_TIME = 2
+MAX_CONNECTIONS_PER_HOST = 10
 
 FEED_API_PROD_URL = 'https://api.ebay.com/buy/feed/v1_beta/'
 FEED_API_SANDBOX_URL = 'https://api.sandbox.ebay.com/buy/feed/v1_beta/'
@@ -25,6 +26,17 @@ FEED_API_SANDBOX_URL = 'https://api.sandbox.ebay.com/buy/feed/v1_beta/'
 # max content that can be downloaded in one request, in bytes
 PROD_CHUNK_SIZE = 104857600
 SANDBOX_CHUNK_SIZE = 10485760
+# bounds of the chunk size when it is adapted to the measured throughput, in bytes
+MIN_CHUNK_SIZE = 1048576
+ADAPTIVE_INITIAL_CHUNK_SIZE = 10485760
+# expected duration of one range request when the chunk size is adapted, in seconds
+TARGET_RANGE_DURATION = 10
+# content copied from the response to the file at a time, in bytes
+STREAM_BUFFER_SIZE = 1048576
+# time between the verifications of the downloaded data while a feed file is downloaded, in seconds
+VERIFY_INTERVAL = 1
+# downloaded data held in memory while it waits to be read from a feed stream, in bytes
+MAX_STREAM_BUFFER_SIZE = 67108864
 
 TOKEN_BEARER_PREFIX = 'Bearer '
 
@@ -35,8 +47,12 @@ ACCEPT_HEADER = 'Accept'
 RANGE_HEADER = 'Range'
 
 CONTENT_RANGE_HEADER = 'Content-Range'
+ETAG_HEADER = 'ETag'
+LAST_MODIFIED_HEADER = 'Last-Modified'
 
 RANGE_PREFIX = 'bytes='
+# the cheapest range request, used to read the size and the validators of the feed file
+PROBE_RANGE = RANGE_PREFIX + '0-0'
 
 APPLICATION_JSON = 'application/json'
 
@@ -53,3 +69,5 @@ SUCCESS_STR = 'Success'
 FAILURE_STR = 'Failure'
 
 DATA_FRAME_CHUNK_SIZE = 2*(10**4)  # rows
+# bytes hashed at the start and at the end of a feed file to fingerprint it
+FINGERPRINT_SAMPLE_SIZE = 1048576
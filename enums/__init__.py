@@ -1,5 +1,6 @@
 __all__ = [
     'config_enums',
     'feed_enums',
-    'file_enums'
+    'file_enums',
+    'filter_enums'
     ]
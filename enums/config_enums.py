@@ -38,6 +38,9 @@ class FeedField(Enum):
     ENVIRONMENT = 'environment'
     DOWNLOAD_LOCATION = 'downloadLocation'
     FILE_FORMAT = 'fileFormat'
+    NUMBER_OF_WORKERS = 'numberOfWorkers'
+    ADAPTIVE_CHUNK_SIZE = 'adaptiveChunkSize'
+    VERIFY = 'verify'
 
     def __str__(self):
         return str(self.value)
@@ -57,6 +60,17 @@ class FilterField(Enum):
     INFERRED_EPIDS = 'inferredEpids'
     ANY_QUERY = 'anyQuery'
     FILE_FORMAT = 'fileFormat'
+    ENGINE = 'engine'
+    NUMBER_OF_WORKERS = 'numberOfWorkers'
+    CACHE_DIRECTORY = 'cacheDirectory'
+    DB_FILE_PATH = 'dbFilePath'
+    LATE_MATERIALIZATION = 'lateMaterialization'
+    ITEM_IDS_FILE_PATH = 'itemIdsFilePath'
+    GTINS_FILE_PATH = 'gtinsFilePath'
+    EPIDS_FILE_PATH = 'epidsFilePath'
+    DB_DIRECTORY = 'dbDirectory'
+    COMPRESSION_LEVEL = 'compressionLevel'
+    OUTPUT_DIRECTORY = 'outputDirectory'
 
     def __str__(self):
         return str(self.value)
@@ -29,6 +29,9 @@ class FileEncoding(Enum):
 @unique
 class FileFormat(Enum):
     GZIP = 'gzip'
+    ZSTD = 'zstd'
+    TSV = 'tsv'
+    PARQUET = 'parquet'
 
     def __str__(self):
         return str(self.value)
@@ -1,3 +1,10 @@
 __all__ = [
-    'feed_request'
+    'feed_manifest',
+    'feed_metrics',
+    'feed_pipeline',
+    'feed_ranges',
+    'feed_request',
+    'feed_session',
+    'feed_store',
+    'feed_verifier'
     ]
@@ -0,0 +1,172 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import json
+import logging
+import threading
+from os import remove, replace
+from os.path import isfile
+from utils import file_utils
+from errors.custom_exceptions import FileCreationError
+from utils.logging_utils import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+MANIFEST_EXTENSION = '.manifest'
+
+
+class FeedManifest(object):
+    """
+    Sidecar file next to a downloaded feed file. It records the identity of the feed request, the total size and the
+    validators of the feed file and the byte ranges that are completely written, so an interrupted download can be
+    resumed and a complete download can be reused while the feed file has not changed
+    """
+    def __init__(self, feed_file_path, identity):
+        self.file_path = feed_file_path + MANIFEST_EXTENSION
+        self.identity = identity
+        self.total_size = None
+        self.etag = None
+        self.last_modified = None
+        self.completed_ranges = []
+        self.complete = False
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return '[file_path= %s, identity= %s, total_size= %s, etag= %s, last_modified= %s, completed_ranges= %s, ' \
+               'complete= %s]' % (self.file_path,
+                                  self.identity,
+                                  self.total_size,
+                                  self.etag,
+                                  self.last_modified,
+                                  self.completed_ranges,
+                                  self.complete)
+
+    @property
+    def completed_size(self):
+        return sum(upper_bound - lower_bound + 1 for lower_bound, upper_bound in self.completed_ranges)
+
+    @property
+    def completed_prefix_size(self):
+        """
+        :return: the number of bytes that are downloaded without gaps from the beginning of the feed file
+        """
+        with self.__lock:
+            if self.completed_ranges and self.completed_ranges[0][0] == 0:
+                return self.completed_ranges[0][1] + 1
+            return 0
+
+    def load(self):
+        """
+        Loads the existing manifest file
+        :return: True if the manifest file exists and belongs to the same feed request, False otherwise
+        """
+        if not isfile(self.file_path):
+            return False
+        try:
+            json_obj = file_utils.read_json(self.file_path)
+        except (IOError, ValueError) as exp:
+            logger.warning('Could not read manifest file %s: %s', self.file_path, repr(exp))
+            return False
+        if json_obj.get('identity') != self.identity or not json_obj.get('total_size'):
+            logger.info('Manifest file %s belongs to another feed request', self.file_path)
+            return False
+        self.total_size = json_obj.get('total_size')
+        self.etag = json_obj.get('etag')
+        self.last_modified = json_obj.get('last_modified')
+        self.completed_ranges = [tuple(bounds) for bounds in json_obj.get('completed_ranges', [])]
+        self.complete = json_obj.get('complete', False)
+        return True
+
+    def start(self, total_size, etag=None, last_modified=None):
+        """
+        Resets the manifest for a new download of the feed file
+        :param total_size: the total size of the feed file in bytes
+        :param etag: the ETag header value of the feed file, if returned
+        :param last_modified: the Last-Modified header value of the feed file, if returned
+        """
+        with self.__lock:
+            self.total_size = total_size
+            self.etag = etag
+            self.last_modified = last_modified
+            self.completed_ranges = []
+            self.complete = False
+            self.__save()
+
+    def finish(self):
+        """
+        Marks the download of the feed file as complete
+        """
+        with self.__lock:
+            self.completed_ranges = [(0, self.total_size - 1)] if self.total_size else []
+            self.complete = True
+            self.__save()
+
+    def matches(self, total_size, etag=None, last_modified=None):
+        """
+        Checks the recorded feed file against the remote one. A validator is only compared if both sides have it
+        :return: True if the remote feed file has the same size and validators
+        """
+        if total_size != self.total_size:
+            return False
+        if etag and self.etag and etag != self.etag:
+            return False
+        if last_modified and self.last_modified and last_modified != self.last_modified:
+            return False
+        return True
+
+    def add_completed_range(self, lower_bound, upper_bound):
+        """
+        Records a byte range that is completely written to the feed file, the bounds are inclusive
+        """
+        with self.__lock:
+            merged_ranges = []
+            for bounds in sorted(self.completed_ranges + [(lower_bound, upper_bound)]):
+                if merged_ranges and bounds[0] <= merged_ranges[-1][1] + 1:
+                    merged_ranges[-1] = (merged_ranges[-1][0], max(merged_ranges[-1][1], bounds[1]))
+                else:
+                    merged_ranges.append(bounds)
+            self.completed_ranges = merged_ranges
+            self.__save()
+
+    def find_missing_ranges(self, chunk_size):
+        """
+        :param chunk_size: The chunk size in bytes
+        :return: list of the Range header values that are not downloaded yet
+        """
+        with self.__lock:
+            return file_utils.find_missing_ranges(self.completed_ranges, self.total_size, chunk_size)
+
+    def remove(self):
+        if isfile(self.file_path):
+            remove(self.file_path)
+
+    def __save(self):
+        # write to a temporary file first, so a crash never leaves a half written manifest behind
+        temp_file_path = self.file_path + '.tmp'
+        try:
+            with open(temp_file_path, 'w') as manifest_file:
+                json.dump({'identity': self.identity,
+                           'total_size': self.total_size,
+                           'etag': self.etag,
+                           'last_modified': self.last_modified,
+                           'completed_ranges': self.completed_ranges,
+                           'complete': self.complete}, manifest_file)
+            replace(temp_file_path, self.file_path)
+        except (IOError, OSError) as exp:
+            raise FileCreationError('IO error in writing manifest file %s: %s' % (self.file_path, repr(exp)),
+                                    self.file_path)
@@ -0,0 +1,126 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import time
+import logging
+import threading
+from collections import namedtuple
+from utils.logging_utils import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# latency is the time until the response headers are received, duration includes reading and writing the body
+RangeMetrics = namedtuple('RangeMetrics', 'range_header status_code number_of_bytes latency duration throughput '
+                                          'retries')
+
+
+class FeedMetrics(object):
+    """
+    Timing of the API calls of one feed download. Every call is recorded as a RangeMetrics and passed to the optional
+    callback as soon as it finishes, the totals are computed from all the recorded calls
+    """
+    def __init__(self, callback=None):
+        self.ranges = []
+        self.start_time = time.time()
+        self.end_time = None
+        self.__callback = callback
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return '[number_of_requests= %s, number_of_failed_requests= %s, number_of_bytes= %s, retries= %s, ' \
+               'duration= %s, throughput= %s, average_latency= %s]' % (self.number_of_requests,
+                                                                        self.number_of_failed_requests,
+                                                                        self.number_of_bytes,
+                                                                        self.retries,
+                                                                        round(self.duration, 3),
+                                                                        round(self.throughput, 3),
+                                                                        round(self.average_latency, 3))
+
+    @property
+    def number_of_requests(self):
+        return len(self.ranges)
+
+    @property
+    def number_of_failed_requests(self):
+        return sum(1 for range_metrics in self.ranges if range_metrics.status_code not in (200, 206))
+
+    @property
+    def number_of_bytes(self):
+        return sum(range_metrics.number_of_bytes for range_metrics in self.ranges)
+
+    @property
+    def retries(self):
+        return sum(range_metrics.retries for range_metrics in self.ranges)
+
+    @property
+    def duration(self):
+        """
+        :return: the wall clock time of the download in seconds, until now if the download has not finished
+        """
+        return (self.end_time if self.end_time else time.time()) - self.start_time
+
+    @property
+    def throughput(self):
+        """
+        :return: the downloaded bytes per second of wall clock time
+        """
+        return self.number_of_bytes / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def average_latency(self):
+        if not self.ranges:
+            return 0.0
+        return sum(range_metrics.latency for range_metrics in self.ranges) / len(self.ranges)
+
+    def add_range(self, range_header, status_code, number_of_bytes, latency, duration, retries=0):
+        """
+        Records an API call and passes it to the callback. An exception of the callback is logged and ignored
+        :param range_header: the Range header value of the request
+        :param status_code: the HTTP status code, None if no response has been received
+        :param number_of_bytes: the number of the downloaded bytes of the feed file
+        :param latency: the time until the response headers are received, in seconds
+        :param duration: the time until the response body is read, in seconds
+        :param retries: the number of times the request was retried by the session
+        :return: RangeMetrics
+        """
+        range_metrics = RangeMetrics(range_header, status_code, number_of_bytes, latency, duration,
+                                     number_of_bytes / duration if duration > 0 else 0.0, retries)
+        with self.__lock:
+            self.ranges.append(range_metrics)
+        if self.__callback:
+            try:
+                self.__callback(range_metrics)
+            except Exception as exp:
+                logger.warning('Metrics callback failed: %s', repr(exp))
+        return range_metrics
+
+    def finish(self):
+        self.end_time = time.time()
+
+    def to_dict(self):
+        """
+        :return: the totals and the API calls as a dict that can be serialized to JSON
+        """
+        return {'number_of_requests': self.number_of_requests,
+                'number_of_failed_requests': self.number_of_failed_requests,
+                'number_of_bytes': self.number_of_bytes,
+                'retries': self.retries,
+                'duration': self.duration,
+                'throughput': self.throughput,
+                'average_latency': self.average_latency,
+                'ranges': [range_metrics._asdict() for range_metrics in self.ranges]}
@@ -0,0 +1,212 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import heapq
+import logging
+import threading
+import constants.feed_constants as const
+from filter.feed_filter import Response
+from errors.custom_exceptions import InputDataError
+from utils.logging_utils import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class RangeStream(object):
+    """
+    Readable binary stream of a feed file that is downloaded in ranges. The downloaded data is put at its offset in
+    the feed file from any thread and read in order, so the feed file can be processed while it is downloaded. Data
+    that arrives ahead of the read position is held in memory up to max_buffer_size bytes, then the writers wait
+    """
+    def __init__(self, max_buffer_size=const.MAX_STREAM_BUFFER_SIZE):
+        self.max_buffer_size = max_buffer_size
+        self.position = 0
+        # the pieces of data by offset, with a heap of the offsets to find the pieces that the read position has
+        # passed, and the number of bytes held in the pieces
+        self.__pieces = {}
+        self.__offsets = []
+        self.__buffer_size = 0
+        self.__closed = False
+        self.__error = None
+        self.__condition = threading.Condition()
+
+    def readable(self):
+        return True
+
+    def put(self, offset, data):
+        """
+        Puts the data that starts at the given offset of the feed file. Data that has already been read is dropped,
+        so a range can be put again after a failed attempt
+        :raise: if the stream has been aborted an InputDataError exception is raised
+        """
+        with self.__condition:
+            # a full buffer accepts only the data at the read position when nothing is readable, otherwise the reader
+            # could wait for the data that is waiting for room in the buffer
+            while not self.__error and self.__buffer_size >= self.max_buffer_size and \
+                    (offset > self.position or self.__find_readable_end() > self.position):
+                self.__condition.wait()
+            if self.__error:
+                raise InputDataError('Feed stream has been aborted: %s' % repr(self.__error))
+            piece = memoryview(data)
+            if offset < self.position:
+                piece = piece[self.position - offset:]
+                offset = self.position
+            if piece:
+                self.__add_piece(offset, piece)
+                self.__condition.notify_all()
+
+    def read(self, size=-1):
+        """
+        Reads up to size bytes, waits until the data at the read position is downloaded
+        :return: the data, empty at the end of the stream
+        :raise: if the stream has been aborted an InputDataError exception is raised
+        """
+        with self.__condition:
+            while True:
+                if self.__error:
+                    raise InputDataError('Feed stream has been aborted: %s' % repr(self.__error))
+                data = self.__read_available(size)
+                if data or self.__closed:
+                    return data
+                self.__condition.wait()
+
+    def put_file(self, file_path, buffer_size=const.STREAM_BUFFER_SIZE):
+        """
+        Puts the whole content of the given local feed file
+        """
+        with open(file_path, 'rb') as file_obj:
+            offset = 0
+            for data in iter(lambda: file_obj.read(buffer_size), b''):
+                self.put(offset, data)
+                offset = offset + len(data)
+
+    def close(self):
+        """
+        Marks the end of the stream, the reader reads the rest of the data and then the end of the stream
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def abort(self, error):
+        """
+        Fails the reader and the writers of the stream with the given error
+        """
+        with self.__condition:
+            self.__error = error
+            self.__pieces = {}
+            self.__offsets = []
+            self.__buffer_size = 0
+            self.__condition.notify_all()
+
+    def __add_piece(self, offset, piece):
+        previous_piece = self.__pieces.get(offset)
+        if previous_piece is None:
+            heapq.heappush(self.__offsets, offset)
+        elif len(previous_piece) >= len(piece):
+            # the same data has been put by another attempt
+            return
+        else:
+            self.__buffer_size = self.__buffer_size - len(previous_piece)
+        self.__pieces[offset] = piece
+        self.__buffer_size = self.__buffer_size + len(piece)
+
+    def __read_available(self, size):
+        pieces = []
+        length = 0
+        while size < 0 or length < size:
+            self.__drop_read_pieces()
+            piece = self.__pieces.pop(self.position, None)
+            if piece is None:
+                break
+            self.__buffer_size = self.__buffer_size - len(piece)
+            end = len(piece) if size < 0 else min(len(piece), size - length)
+            pieces.append(piece[:end])
+            length = length + end
+            self.position = self.position + end
+            if end < len(piece):
+                self.__add_piece(self.position, piece[end:])
+        if not pieces:
+            return b''
+        self.__drop_read_pieces()
+        self.__condition.notify_all()
+        return b''.join(pieces)
+
+    def __drop_read_pieces(self):
+        # the pieces of the failed attempts that the read position has passed are dropped, or cut at the read position
+        while self.__offsets and self.__offsets[0] < self.position:
+            offset = heapq.heappop(self.__offsets)
+            piece = self.__pieces.pop(offset, None)
+            if piece is None:
+                continue
+            self.__buffer_size = self.__buffer_size - len(piece)
+            if offset + len(piece) > self.position:
+                self.__add_piece(self.position, piece[self.position - offset:])
+
+    def __find_readable_end(self):
+        end = self.position
+        piece = self.__pieces.get(end)
+        while piece is not None:
+            end = end + len(piece)
+            piece = self.__pieces.get(end)
+        return end
+
+
+def download_and_filter(feed_obj, feed_filter_obj, keep_file=False, column_name_list=None):
+    """
+    Downloads the feed file and filters it at the same time. The downloaded ranges are decompressed, parsed and
+    filtered as they arrive and only the filtered file is written, unless the feed file is kept as well
+    :param feed_obj: the Feed object
+    :param feed_filter_obj: the FeedFilterRequest object, its input file path is set to the path of the feed file
+    :param keep_file: True to write the feed file to the download location as well
+    :param column_name_list: optional list of the columns that are read from the feed file
+    :return: a tuple of the GetFeedResponse and the filter Response
+    """
+    feed_filter_obj.input_file_path = feed_obj.file_path
+    if feed_obj.store and not feed_filter_obj.output_directory:
+        # the filtered file is not written into the entry of the feed store
+        feed_filter_obj.output_directory = feed_obj.output_location
+    range_stream = RangeStream()
+    filter_responses = []
+
+    def filter_range_stream():
+        try:
+            filter_responses.append(feed_filter_obj.filter_stream(range_stream, column_name_list))
+        except Exception as exp:
+            filter_responses.append(Response(const.FAILURE_CODE, 'Could not filter feed stream: %s' % repr(exp),
+                                             None, feed_filter_obj.queries))
+        finally:
+            # stop the download if the filter has stopped before the end of the stream
+            range_stream.abort(InputDataError('Feed stream is not read anymore'))
+    filter_thread = threading.Thread(target=filter_range_stream)
+    filter_thread.start()
+    try:
+        get_response = feed_obj.stream(range_stream, keep_file)
+        if get_response.status_code == const.SUCCESS_CODE and get_response.cache_hit:
+            # the feed file has not changed since it was downloaded, it is filtered from the disk
+            range_stream.put_file(get_response.file_path)
+    except Exception as exp:
+        range_stream.abort(exp)
+        filter_thread.join()
+        raise
+    if get_response.status_code == const.SUCCESS_CODE:
+        range_stream.close()
+    else:
+        range_stream.abort(InputDataError(get_response.message))
+    filter_thread.join()
+    return get_response, filter_responses[0]
@@ -0,0 +1,107 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import threading
+import constants.feed_constants as const
+from utils import file_utils
+
+
+class RangePlanner(object):
+    """
+    Hands out the missing byte ranges of a feed file one at a time, so the size of every range can be chosen when it
+    is requested. A range that is handed out is not handed out again unless it is released
+    """
+    def __init__(self, manifest):
+        self.total_size = manifest.total_size
+        self.__taken_ranges = list(manifest.completed_ranges)
+        self.__lock = threading.Lock()
+
+    def next_range(self, chunk_size):
+        """
+        :param chunk_size: The chunk size in bytes
+        :return: the next Range header value that is neither downloaded nor handed out, None if no data is left
+        """
+        with self.__lock:
+            missing_ranges = file_utils.find_missing_ranges(self.__taken_ranges, self.total_size, chunk_size, 1)
+            if not missing_ranges:
+                return None
+            self.__taken_ranges.append(file_utils.find_range_header_bounds(missing_ranges[0]))
+            return missing_ranges[0]
+
+    def release_range(self, range_header):
+        """
+        Gives back a range that could not be downloaded, so it is handed out again
+        :param range_header: the Range header value returned by next_range
+        """
+        with self.__lock:
+            self.__taken_ranges.remove(file_utils.find_range_header_bounds(range_header))
+
+
+class ChunkSizer(object):
+    """
+    Chooses the size of the next range request. In the adaptive mode the size follows the measured throughput, so a
+    range takes about target_duration seconds, it is halved when a request is retried or fails and it stays within
+    [min_chunk_size, max_chunk_size]. Otherwise it is always max_chunk_size
+    """
+    def __init__(self, max_chunk_size, adaptive=False, min_chunk_size=const.MIN_CHUNK_SIZE,
+                 target_duration=const.TARGET_RANGE_DURATION, max_failures=const.REQUEST_RETRIES):
+        self.max_chunk_size = max_chunk_size
+        self.min_chunk_size = min(min_chunk_size, max_chunk_size)
+        self.adaptive = adaptive
+        self.target_duration = target_duration
+        self.max_failures = max_failures
+        self.chunk_size = min(const.ADAPTIVE_INITIAL_CHUNK_SIZE, max_chunk_size) if adaptive else max_chunk_size
+        self.failures = 0
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return '[chunk_size= %s, min_chunk_size= %s, max_chunk_size= %s, adaptive= %s]' % (self.chunk_size,
+                                                                                           self.min_chunk_size,
+                                                                                           self.max_chunk_size,
+                                                                                           self.adaptive)
+
+    def record_success(self, number_of_bytes, duration, retries=0):
+        """
+        Adjusts the chunk size after a range is downloaded
+        :param number_of_bytes: the number of the downloaded bytes
+        :param duration: the duration of the request in seconds, including reading the response
+        :param retries: the number of times the request was retried before it succeeded
+        """
+        if not self.adaptive:
+            return
+        with self.__lock:
+            self.failures = 0
+            if retries:
+                new_chunk_size = self.chunk_size // 2
+            else:
+                throughput = number_of_bytes / max(duration, 0.001)
+                # move towards the size that takes target_duration, at most by a factor of 2 at a time
+                new_chunk_size = max(self.chunk_size // 2, min(self.chunk_size * 2,
+                                                               int(throughput * self.target_duration)))
+            self.chunk_size = max(self.min_chunk_size, min(self.max_chunk_size, new_chunk_size))
+
+    def record_failure(self):
+        """
+        Adjusts the chunk size after a range request times out or its connection breaks
+        :return: True if the range should be requested again with the smaller chunk size
+        """
+        if not self.adaptive:
+            return False
+        with self.__lock:
+            self.failures += 1
+            self.chunk_size = max(self.min_chunk_size, self.chunk_size // 2)
+            return self.failures <= self.max_failures
@@ -15,13 +15,22 @@
 # limitations under the License.
 # **************************************************************************/
 
-import certifi
-import urllib3
 import json
+import asyncio
 import logging
-from os import path
+import time
+import threading
+from os import path, makedirs
+from urllib3.exceptions import HTTPError
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from utils import file_utils, date_utils
 import constants.feed_constants as const
+from feed.feed_manifest import FeedManifest
+from feed.feed_metrics import FeedMetrics
+from feed.feed_ranges import ChunkSizer, RangePlanner
+from feed.feed_session import FeedSession
+from feed.feed_store import LOCK_POLL_INTERVAL
+from feed.feed_verifier import FeedVerifier
 from filter.feed_filter import GetFeedResponse
 from enums.file_enums import FileFormat
 from enums.feed_enums import FeedType, FeedScope, FeedPrefix, Environment
@@ -36,7 +45,9 @@ DEFAULT_DOWNLOAD_LOCATION = path.expanduser('~/Desktop/feed-sdk')
 
 class Feed(object):
     def __init__(self, feed_type, feed_scope, category_id, marketplace_id, token, feed_date=None,
-                 environment=Environment.PRODUCTION.value, download_location=None, file_format=FileFormat.GZIP.value):
+                 environment=Environment.PRODUCTION.value, download_location=None, file_format=FileFormat.GZIP.value,
+                 number_of_workers=1, resume=True, session=None, use_cache=True, adaptive_chunk_size=False,
+                 verify=False, metrics_callback=None, base_url=None, chunk_size=None, store=None):
         self.token = const.TOKEN_BEARER_PREFIX + token if (token and not token.startswith('Bearer')) else token
         self.feed_type = feed_type.lower() if feed_type else FeedType.ITEM.value
         self.feed_scope = feed_scope.upper() if feed_scope else FeedScope.DAILY.value
@@ -46,98 +57,531 @@ class Feed(object):
         self.download_location = download_location if download_location else DEFAULT_DOWNLOAD_LOCATION
         self.file_format = file_format if file_format else FileFormat.GZIP.value
         self.feed_date = feed_date if feed_date else date_utils.get_formatted_date(feed_type)
+        self.number_of_workers = number_of_workers if number_of_workers and number_of_workers > 1 else 1
+        self.resume = resume
+        self.use_cache = use_cache
+        self.adaptive_chunk_size = adaptive_chunk_size
+        self.verify = verify
+        # the Feed API URL and the max chunk size of the environment are used unless they are given
+        self.base_url = base_url
+        self.chunk_size = chunk_size
+        # called with the RangeMetrics of every API call
+        self.metrics_callback = metrics_callback
+        self.__metrics = None
+        # the connections are kept in the session and reused by the next calls
+        self.session = session if session else FeedSession(max(self.number_of_workers,
+                                                                const.MAX_CONNECTIONS_PER_HOST))
+        # the files derived from the feed file, such as the filtered files, are written to the download location even if
+        # the feed file is kept in the store, so they do not take the disk budget of the store and are not evicted
+        self.output_location = self.download_location
+        # the feed file is kept in the entry of the feed store instead of the download location
+        self.store = store
+        if self.store:
+            self.download_location = self.store.get_location(self.__get_identity())
+        if self.session.max_connections_per_host < self.number_of_workers:
+            logger.warning('The session keeps %s connections per host, less than %s workers',
+                           self.session.max_connections_per_host, self.number_of_workers)
 
     def __str__(self):
         return '[feed_type= %s, feed_scope= %s, category_id= %s, marketplace_id= %s, feed_date= %s, ' \
-               'environment= %s,  download_location= %s, file_format= %s, token= %s]' % (self.feed_type,
-                                                                                         self.feed_scope,
-                                                                                         self.category_id,
-                                                                                         self.marketplace_id,
-                                                                                         self.feed_date,
-                                                                                         self.environment,
-                                                                                         self.download_location,
-                                                                                         self.file_format,
-                                                                                         self.token)
+               'environment= %s,  download_location= %s, file_format= %s, number_of_workers= %s, resume= %s, ' \
+               'use_cache= %s, adaptive_chunk_size= %s, verify= %s, base_url= %s, chunk_size= %s, session= %s, ' \
+               'store= %s, token= %s]' % \
+               (self.feed_type,
+                self.feed_scope,
+                self.category_id,
+                self.marketplace_id,
+                self.feed_date,
+                self.environment,
+                self.download_location,
+                self.file_format,
+                self.number_of_workers,
+                self.resume,
+                self.use_cache,
+                self.adaptive_chunk_size,
+                self.verify,
+                self.base_url,
+                self.chunk_size,
+                self.session,
+                self.store,
+                self.token)
+
+    @property
+    def file_path(self):
+        """
+        :return: the absolute path of the feed file in the download location
+        """
+        return path.join(self.download_location, self.__generate_file_name())
 
     def get(self):
         """
         :return: GetFeedResponse
         """
+        return self.__get(None, True)
+
+    def stream(self, range_stream, keep_file=False):
+        """
+        Downloads the feed file into the given range stream, so the feed file can be read while it is downloaded. A
+        partially downloaded file is not resumed, since the stream is read from the beginning of the feed file
+        :param range_stream: the RangeStream object that the downloaded data is put into
+        :param keep_file: True to write the feed file to the download location as well
+        :return: GetFeedResponse
+        """
+        return self.__get(range_stream, keep_file)
+
+    def lock_store_entry(self):
+        """
+        Takes the lock of the entry of the feed file in the store, so the feed file is neither removed nor downloaded
+        again by another process while it is read, such as by a filter. Waits while another process holds the lock
+        :return: the FileLock of the entry, None if there is no store
+        """
+        if not self.store:
+            return None
+        store_lock = self.store.lock(self.__get_identity())
+        store_lock.acquire()
+        return store_lock
+
+    def release_store_entry(self, store_lock):
+        """
+        Records the access of the feed file in the store, so it becomes the most recently used entry, then releases
+        the lock of the entry
+        :param store_lock: the FileLock returned by lock_store_entry, nothing is done if None
+        """
+        if store_lock:
+            self.__release_store_lock(store_lock)
+
+    def __get(self, range_stream, keep_file):
+        logger.info(
+            'Downloading... \ncategoryId: %s | marketplace: %s | date: %s | feed_scope: %s | environment: %s \n',
+            self.category_id, self.marketplace_id, self.feed_date, self.feed_scope, self.environment)
+        error_response = self.__validate()
+        if error_response:
+            return error_response
+        # generate the absolute file path
+        file_path = self.file_path
+        metrics = self.__metrics = FeedMetrics(self.metrics_callback)
+        # another process or thread that downloads the same feed into the store finishes first
+        store_lock = self.store.lock(self.__get_identity()) if self.store else None
+        try:
+            if store_lock:
+                store_lock.acquire()
+            # Get the feed file data
+            result_code, message, cache_hit = self.__invoke_request(file_path, range_stream, keep_file)
+            return GetFeedResponse(result_code, message, file_path, None, None, cache_hit, metrics)
+        except IOError as exp:
+            return GetFeedResponse(const.FAILURE_CODE, 'Could not open file %s : %s' % (file_path, repr(exp)),
+                                   file_path, None, None, False, metrics)
+        except (InputDataError, FileCreationError) as exp:
+            return GetFeedResponse(const.FAILURE_CODE, exp.msg, file_path, None, None, False, metrics)
+        finally:
+            if store_lock:
+                self.__release_store_lock(store_lock)
+            metrics.finish()
+            logger.info('Download metrics: %s\n', metrics)
+
+    async def aget(self, semaphore=None, executor=None):
+        """
+        Coroutine counterpart of get(). The blocking range requests run in the executor, at most number_of_workers
+        ranges of this feed at the same time
+        :param semaphore: optional asyncio.Semaphore that caps the number of ranges downloaded at the same time across
+                          all the feeds sharing it
+        :param executor: optional concurrent.futures executor for the range requests, the default executor of the
+                         event loop is used if not provided
+        :return: GetFeedResponse
+        """
         logger.info(
             'Downloading... \ncategoryId: %s | marketplace: %s | date: %s | feed_scope: %s | environment: %s \n',
             self.category_id, self.marketplace_id, self.feed_date, self.feed_scope, self.environment)
+        error_response = self.__validate()
+        if error_response:
+            return error_response
+        # generate the absolute file path
+        file_path = self.file_path
+        metrics = self.__metrics = FeedMetrics(self.metrics_callback)
+        # another process or thread that downloads the same feed into the store finishes first
+        store_lock = self.store.lock(self.__get_identity()) if self.store else None
+        try:
+            # the lock is polled, waiting for it in the executor would take a thread that the holder may need
+            while store_lock and not store_lock.acquire(False):
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+            # Get the feed file data
+            result_code, message, cache_hit = await self.__ainvoke_request(file_path, semaphore, executor)
+            return GetFeedResponse(result_code, message, file_path, None, None, cache_hit, metrics)
+        except IOError as exp:
+            return GetFeedResponse(const.FAILURE_CODE, 'Could not open file %s : %s' % (file_path, repr(exp)),
+                                   file_path, None, None, False, metrics)
+        except (InputDataError, FileCreationError) as exp:
+            return GetFeedResponse(const.FAILURE_CODE, exp.msg, file_path, None, None, False, metrics)
+        finally:
+            if store_lock:
+                self.__release_store_lock(store_lock)
+            metrics.finish()
+            logger.info('Download metrics: %s\n', metrics)
+
+    def __release_store_lock(self, store_lock):
+        # the feed file, complete or partial, is recorded as recently used before another download can change it
+        try:
+            if path.isdir(self.download_location):
+                self.store.add(self.__get_identity(), self.__generate_file_name())
+        except FileCreationError as exp:
+            logger.error('Could not add feed file to the store: %s', exp.msg)
+        finally:
+            store_lock.release()
+
+    def __validate(self):
         if not self.token:
-            return GetFeedResponse(const.FAILURE_CODE, 'No token has been provided', None, None, None)
+            return GetFeedResponse(const.FAILURE_CODE, 'No token has been provided', None, None, None, False, None)
         if path.exists(self.download_location) and not path.isdir(self.download_location):
             return GetFeedResponse(const.FAILURE_CODE, 'Download location is not a directory', self.download_location,
-                                   None, None)
+                                   None, None, False, None)
         try:
             date_utils.validate_date(self.feed_date, self.feed_type)
         except InputDataError as exp:
-            return GetFeedResponse(const.FAILURE_CODE, exp.msg, self.download_location, None, None)
-        # generate the absolute file path
-        file_name = self.__generate_file_name()
-        file_path = path.join(self.download_location, file_name)
-        # Create an empty file in the given path
+            return GetFeedResponse(const.FAILURE_CODE, exp.msg, self.download_location, None, None, False, None)
+        return None
+
+    def __invoke_request(self, file_path, range_stream, keep_file):
+        # The chunk size is the max chunk size, unless it is adapted to the measured throughput
+        chunk_sizer = ChunkSizer(self.__find_max_chunk_size(), self.adaptive_chunk_size)
+        logger.info('Chunk size: %s | Number of workers: %s\n', chunk_sizer, self.number_of_workers)
+        parameters, endpoint = self.__get_query_parameters_and_base_url()
+        manifest, result = self.__start_download(endpoint, parameters, file_path, chunk_sizer, range_stream, keep_file)
+        if result and (result[0] != const.SUCCESS_CODE or result[2]):
+            # the download has failed or the downloaded file is reused
+            return result
+        verifier = self.__create_verifier(file_path, manifest, keep_file)
+        if not result:
+            # the data is written to the file unless the file is not kept
+            write_path = file_path if keep_file else None
+            # Download the missing ranges, number_of_workers ranges at the same time. Each range is written at its own
+            # offset and recorded in the manifest as soon as it is complete
+            range_planner = RangePlanner(manifest)
+            failure_event = threading.Event()
+            with ThreadPoolExecutor(max_workers=self.number_of_workers) as executor:
+                pending_futures = [executor.submit(self.__download_ranges, endpoint, parameters, write_path, manifest,
+                                                   range_planner, chunk_sizer, range_stream, failure_event)
+                                   for _ in range(self.number_of_workers)]
+                try:
+                    while pending_futures:
+                        done_futures, pending_futures = wait(pending_futures,
+                                                             const.VERIFY_INTERVAL if verifier else None,
+                                                             FIRST_COMPLETED)
+                        for future in done_futures:
+                            feed_response = future.result()
+                            if feed_response is not None:
+                                return const.FAILURE_CODE, self.__get_errors(feed_response), False
+                        if verifier:
+                            # verify the data downloaded so far while the workers download the next ranges
+                            self.__verify(verifier, manifest)
+                finally:
+                    # stop the other workers if any of the ranges fails
+                    failure_event.set()
+        self.__check_completed_size(file_path, manifest)
+        if verifier:
+            self.__verify(verifier, manifest, True)
+        self.__finish_download(manifest, keep_file)
+        return const.SUCCESS_CODE, const.SUCCESS_STR, False
+
+    async def __ainvoke_request(self, file_path, semaphore, executor):
+        # The chunk size is the max chunk size, unless it is adapted to the measured throughput
+        chunk_sizer = ChunkSizer(self.__find_max_chunk_size(), self.adaptive_chunk_size)
+        logger.info('Chunk size: %s | Number of workers: %s\n', chunk_sizer, self.number_of_workers)
+        parameters, endpoint = self.__get_query_parameters_and_base_url()
+        loop = asyncio.get_running_loop()
+        global_semaphore = semaphore if semaphore else asyncio.Semaphore(self.number_of_workers)
+        async with global_semaphore:
+            manifest, result = await loop.run_in_executor(executor, self.__start_download, endpoint, parameters,
+                                                          file_path, chunk_sizer, None, True)
+        if result and (result[0] != const.SUCCESS_CODE or result[2]):
+            # the download has failed or the downloaded file is reused
+            return result
+        verifier = self.__create_verifier(file_path, manifest, True)
+        if not result:
+            feed_response = await self.__adownload_ranges(endpoint, parameters, file_path, manifest, chunk_sizer,
+                                                          verifier, global_semaphore, executor)
+            if feed_response is not None:
+                return const.FAILURE_CODE, self.__get_errors(feed_response), False
+        self.__check_completed_size(file_path, manifest)
+        if verifier:
+            await loop.run_in_executor(executor, self.__verify, verifier, manifest, True)
+        self.__finish_download(manifest, True)
+        return const.SUCCESS_CODE, const.SUCCESS_STR, False
+
+    async def __adownload_ranges(self, endpoint, parameters, file_path, manifest, chunk_sizer, verifier,
+                                 global_semaphore, executor):
+        """
+        Downloads the missing ranges by number_of_workers coroutines
+        :return: the failed response, None if no range has failed
+        """
+        loop = asyncio.get_running_loop()
+        range_planner = RangePlanner(manifest)
+        failure_event = threading.Event()
+        downloaded_event = asyncio.Event()
+
+        async def download_ranges():
+            # one of the number_of_workers workers of this feed, it downloads one range at a time
+            while not failure_event.is_set():
+                range_header = range_planner.next_range(chunk_sizer.chunk_size)
+                if not range_header:
+                    return None
+                async with global_semaphore:
+                    feed_response = await loop.run_in_executor(executor, self.__download_range, endpoint, parameters,
+                                                               file_path, range_header, manifest, range_planner,
+                                                               chunk_sizer, None)
+                if feed_response is not None and feed_response.status != 206:
+                    failure_event.set()
+                    return feed_response
+            return None
+
+        async def verify_ranges():
+            # verify the data downloaded so far while the workers download the next ranges
+            try:
+                while not downloaded_event.is_set() and not failure_event.is_set():
+                    await loop.run_in_executor(executor, self.__verify, verifier, manifest)
+                    try:
+                        await asyncio.wait_for(downloaded_event.wait(), const.VERIFY_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+            except Exception:
+                failure_event.set()
+                raise
+        verify_task = asyncio.ensure_future(verify_ranges()) if verifier else None
         try:
+            feed_responses = await asyncio.gather(*[download_ranges() for _ in range(self.number_of_workers)])
+            downloaded_event.set()
+            if verify_task:
+                await verify_task
+        finally:
+            failure_event.set()
+            if verify_task and not verify_task.done():
+                verify_task.cancel()
+        for feed_response in feed_responses:
+            if feed_response is not None:
+                return feed_response
+        return None
+
+    def __start_download(self, endpoint, parameters, file_path, chunk_sizer, range_stream, keep_file):
+        """
+        Reuses the complete file or loads the manifest of a partial download of the file, otherwise sends the initial
+        request of a new download
+        :return: a tuple of the manifest and the (result code, message, cache hit) if the download has already finished
+                 or failed
+        """
+        manifest = FeedManifest(file_path, self.__get_identity())
+        if manifest.load() and path.isfile(file_path) and path.getsize(file_path) == manifest.total_size:
+            if manifest.complete and self.use_cache:
+                result = self.__check_cached_file(endpoint, parameters, file_path, manifest)
+                if result:
+                    return manifest, result
+            elif not manifest.complete and self.resume and not range_stream:
+                logger.info('Resuming download, %s of %s bytes have already been downloaded\n',
+                            manifest.completed_size, manifest.total_size)
+                return manifest, None
+        write_path = file_path if keep_file else None
+        if keep_file:
+            # Create an empty file in the given path
             file_utils.create_and_replace_binary_file(file_path)
-            with open(file_path, 'wb') as file_obj:
-                # Get the feed file data
-                result_code, message = self.__invoke_request(file_obj)
-                return GetFeedResponse(result_code, message, file_path, None, None)
-        except IOError as exp:
-            return GetFeedResponse(const.FAILURE_CODE, 'Could not open file %s : %s' % (file_path, repr(exp)),
-                                   file_path, None, None)
-        except (InputDataError, FileCreationError) as exp:
-            return GetFeedResponse(const.FAILURE_CODE, exp.msg, file_path, None, None)
-
-    def __invoke_request(self, file_handler):
-        # initialize API call counter
-        api_call_counter = 0
-        # Find max chunk size
-        chunk_size = self.__find_max_chunk_size()
-        logger.info('Chunk size: %s\n', chunk_size)
+        elif not path.isdir(self.download_location):
+            # the manifest is still written next to the file while the file is downloaded
+            makedirs(self.download_location)
         # The initial request Range header is bytes=0-CHUNK_SIZE
-        headers = {const.MARKETPLACE_HEADER: self.marketplace_id,
-                   const.AUTHORIZATION_HEADER: self.token,
-                   const.CONTENT_TYPE_HEADER: const.APPLICATION_JSON,
-                   const.ACCEPT_HEADER: const.APPLICATION_JSON,
-                   const.RANGE_HEADER: const.RANGE_PREFIX + '0-' + str(chunk_size)}
-        parameters, endpoint = self.__get_query_parameters_and_base_url()
-        http_manager = urllib3.PoolManager(timeout=const.REQUEST_TIMEOUT,
-                                           retries=urllib3.Retry(const.REQUEST_RETRIES,
-                                                                 backoff_factor=const.BACK_OFF_TIME),
-                                           cert_reqs='CERT_REQUIRED', ca_certs=certifi.where())
-        # Initial request
-        feed_response = http_manager.request('GET', endpoint, parameters, headers)
-        # increase and print API call counter
-        api_call_counter = api_call_counter + 1
-        logger.info('API call #%s\n', api_call_counter)
-        # Get the status code
-        status_code = feed_response.status
-        # Append the data to the file, might raise an exception
-        if status_code == 200:
-            file_utils.append_response_to_file(file_handler, feed_response.data)
-            return const.SUCCESS_CODE, const.SUCCESS_STR
-        while status_code == 206:
-            # Append the data to the file, might raise an exception
-            file_utils.append_response_to_file(file_handler, feed_response.data)
-            headers[const.RANGE_HEADER] = file_utils.find_next_range(feed_response.headers[const.CONTENT_RANGE_HEADER],
-                                                                     chunk_size)
-            # check if we have reached the end of the file
-            if not headers[const.RANGE_HEADER]:
-                break
-            # Send another request
-            feed_response = http_manager.request('GET', endpoint, parameters, headers)
-            # increase and print API call counter
-            api_call_counter = api_call_counter+1
-            logger.info('API call #%s\n', api_call_counter)
-            # Get the status code
-            status_code = feed_response.status
-        if status_code == 206 and not headers[const.RANGE_HEADER]:
-            return const.SUCCESS_CODE, const.SUCCESS_STR
+        range_header = file_utils.find_next_range(None, chunk_sizer.chunk_size)
+        start_time = time.time()
+        feed_response = self.session.request('GET', endpoint, parameters, self.__get_request_headers(range_header),
+                                             preload_content=False)
+        latency = time.time() - start_time
+        logger.info('API call for range: %s\n', range_header)
+        if feed_response.status == 200:
+            # The whole file is returned in one response, might raise an exception
+            bytes_written = self.__write_body(write_path, 0, feed_response, range_stream)
+            self.__add_metrics(range_header, feed_response, bytes_written, start_time, latency)
+            manifest.start(bytes_written, feed_response.headers.get(const.ETAG_HEADER),
+                           feed_response.headers.get(const.LAST_MODIFIED_HEADER))
+            if bytes_written:
+                manifest.add_completed_range(0, bytes_written - 1)
+            return manifest, (const.SUCCESS_CODE, const.SUCCESS_STR, False)
+        if feed_response.status != 206:
+            self.__add_metrics(range_header, feed_response, 0, start_time, latency)
+            return manifest, (const.FAILURE_CODE, self.__get_errors(feed_response), False)
+        # The total size of the file is known from the content-range header of the initial response
+        total_size = file_utils.find_range_bounds(feed_response.headers[const.CONTENT_RANGE_HEADER])[2]
+        manifest.start(total_size, feed_response.headers.get(const.ETAG_HEADER),
+                       feed_response.headers.get(const.LAST_MODIFIED_HEADER))
+        if write_path:
+            file_utils.preallocate_binary_file(write_path, total_size)
+        bytes_written = self.__write_range(write_path, feed_response, manifest, range_stream)
+        range_metrics = self.__add_metrics(range_header, feed_response, bytes_written, start_time, latency)
+        chunk_sizer.record_success(bytes_written, range_metrics.duration, range_metrics.retries)
+        return manifest, None
+
+    def __check_cached_file(self, endpoint, parameters, file_path, manifest):
+        """
+        Compares the complete file with the remote feed file by a one byte range request
+        :return: the (result code, message, cache hit) if the file is reused or the request fails, None if the file
+                 needs to be downloaded again
+        """
+        start_time = time.time()
+        feed_response = self.session.request('GET', endpoint, parameters,
+                                             self.__get_request_headers(const.PROBE_RANGE), preload_content=False)
+        self.__add_metrics(const.PROBE_RANGE, feed_response, 0, start_time, time.time() - start_time)
+        logger.info('API call for range: %s\n', const.PROBE_RANGE)
+        if feed_response.status not in (200, 206):
+            return const.FAILURE_CODE, self.__get_errors(feed_response), False
+        if feed_response.status == 200:
+            # the range is not supported and the whole file is returned, do not read it
+            feed_response.close()
+            feed_response.release_conn()
+            return None
+        feed_response.drain_conn()
+        feed_response.release_conn()
+        if manifest.matches(
+                file_utils.find_range_bounds(feed_response.headers[const.CONTENT_RANGE_HEADER])[2],
+                feed_response.headers.get(const.ETAG_HEADER), feed_response.headers.get(const.LAST_MODIFIED_HEADER)):
+            logger.info('Feed file %s has not changed, reusing the downloaded file\n', file_path)
+            return const.SUCCESS_CODE, const.SUCCESS_STR, True
+        logger.info('Feed file %s has changed, downloading it again\n', file_path)
+        return None
+
+    def __download_ranges(self, endpoint, parameters, file_path, manifest, range_planner, chunk_sizer, range_stream,
+                          failure_event):
+        """
+        One of the number_of_workers workers, it downloads one range at a time until no data is left
+        :return: the failed response, None if no range has failed
+        """
+        try:
+            while not failure_event.is_set():
+                range_header = range_planner.next_range(chunk_sizer.chunk_size)
+                if not range_header:
+                    return None
+                feed_response = self.__download_range(endpoint, parameters, file_path, range_header, manifest,
+                                                      range_planner, chunk_sizer, range_stream)
+                if feed_response is not None and feed_response.status != 206:
+                    failure_event.set()
+                    return feed_response
+            return None
+        except Exception:
+            failure_event.set()
+            raise
+
+    def __download_range(self, endpoint, parameters, file_path, range_header, manifest, range_planner, chunk_sizer,
+                         range_stream):
+        """
+        :return: the response, None if the range has been released to be requested again with a smaller chunk
+        """
+        start_time = time.time()
+        try:
+            # a response shorter than its Content-Length raises an exception instead of returning less data
+            feed_response = self.session.request('GET', endpoint, parameters,
+                                                 self.__get_request_headers(range_header), preload_content=False,
+                                                 enforce_content_length=True)
+            latency = time.time() - start_time
+            logger.info('API call for range: %s\n', range_header)
+            if feed_response.status == 206:
+                bytes_written = self.__write_range(file_path, feed_response, manifest, range_stream)
+                range_metrics = self.__add_metrics(range_header, feed_response, bytes_written, start_time, latency)
+                chunk_sizer.record_success(bytes_written, range_metrics.duration, range_metrics.retries)
+            else:
+                self.__add_metrics(range_header, feed_response, 0, start_time, latency)
+            return feed_response
+        except HTTPError as exp:
+            self.__add_metrics(range_header, None, 0, start_time, time.time() - start_time)
+            # timed out or broken even after the retries of the session
+            if not chunk_sizer.record_failure():
+                raise InputDataError('Could not download range %s: %s' % (range_header, repr(exp)), file_path)
+            logger.warning('Range %s failed: %s. Requesting it again with chunk size %s\n', range_header, repr(exp),
+                           chunk_sizer.chunk_size)
+            range_planner.release_range(range_header)
+            return None
+
+    def __create_verifier(self, file_path, manifest, keep_file):
+        # only a gzip file that is written to the download location is verified
+        if self.verify and keep_file and self.file_format == FileFormat.GZIP.value:
+            return FeedVerifier(file_path, manifest.total_size)
+        return None
+
+    @staticmethod
+    def __verify(verifier, manifest, finish=False):
+        try:
+            if finish:
+                verifier.finish()
+            else:
+                verifier.verify_to(manifest.completed_prefix_size)
+        except InputDataError:
+            # a corrupt file is neither resumed nor reused
+            manifest.remove()
+            raise
+
+    @staticmethod
+    def __check_completed_size(file_path, manifest):
+        # the downloaded ranges add up to the total size from the content-range header
+        if manifest.completed_size != manifest.total_size:
+            raise InputDataError('Incomplete download, %s of %s bytes have been downloaded' %
+                                 (manifest.completed_size, manifest.total_size), file_path)
+
+    @staticmethod
+    def __finish_download(manifest, keep_file):
+        if keep_file:
+            # the manifest is kept to reuse the file while the feed file has not changed
+            manifest.finish()
+        else:
+            manifest.remove()
+
+    @staticmethod
+    def __write_body(file_path, offset, feed_response, range_stream):
+        # the file path is None if the data is only put into the range stream
+        if range_stream:
+            return file_utils.stream_response_to_range_stream(range_stream, offset, feed_response, file_path)
+        return file_utils.stream_response_at_offset(file_path, offset, feed_response)
+
+    def __write_range(self, file_path, feed_response, manifest, range_stream):
+        lower_bound, upper_bound, total_size = file_utils.find_range_bounds(
+            feed_response.headers[const.CONTENT_RANGE_HEADER])
+        if not manifest.matches(total_size, feed_response.headers.get(const.ETAG_HEADER),
+                                feed_response.headers.get(const.LAST_MODIFIED_HEADER)):
+            # the feed file has been regenerated since the partial download has started
+            feed_response.close()
+            feed_response.release_conn()
+            manifest.remove()
+            raise InputDataError('Feed file has changed since the download started. Download it again', file_path)
+        # Write the data at the lower bound of the returned range, might raise an exception
+        bytes_written = self.__write_body(file_path, lower_bound, feed_response, range_stream)
+        if bytes_written != upper_bound - lower_bound + 1:
+            raise InputDataError('Incomplete response for range %s-%s: %s bytes received' %
+                                 (lower_bound, upper_bound, bytes_written), file_path)
+        manifest.add_completed_range(lower_bound, upper_bound)
+        return bytes_written
+
+    def __add_metrics(self, range_header, feed_response, number_of_bytes, start_time, latency):
+        # the feed response is None if the request has failed without a response
+        return self.__metrics.add_range(range_header, feed_response.status if feed_response is not None else None,
+                                        number_of_bytes, latency, time.time() - start_time,
+                                        self.__get_retries(feed_response) if feed_response is not None else 0)
+
+    @staticmethod
+    def __get_retries(feed_response):
+        # the number of times the session has retried the request before this response
+        return len(feed_response.retries.history) if feed_response.retries else 0
+
+    @staticmethod
+    def __get_errors(feed_response):
         json_response = json.loads(feed_response.data.decode('utf-8'))
-        return const.FAILURE_CODE, json_response.get('errors')
+        return json_response.get('errors')
+
+    def __get_identity(self):
+        # the feed request that a partially downloaded file belongs to
+        return {'feed_type': self.feed_type,
+                'feed_scope': self.feed_scope,
+                'category_id': self.category_id,
+                'marketplace_id': self.marketplace_id,
+                'feed_date': self.feed_date,
+                'environment': self.environment}
+
+    def __get_request_headers(self, range_header):
+        return {const.MARKETPLACE_HEADER: self.marketplace_id,
+                const.AUTHORIZATION_HEADER: self.token,
+                const.CONTENT_TYPE_HEADER: const.APPLICATION_JSON,
+                const.ACCEPT_HEADER: const.APPLICATION_JSON,
+                const.RANGE_HEADER: range_header}
 
     def __get_query_parameters_and_base_url(self):
         # Base URL
@@ -148,7 +592,7 @@ class Feed(object):
         # Snapshot feed
         if self.feed_type == str(FeedType.SNAPSHOT):
             fields.update({const.QUERY_SNAPSHOT_DATE: self.feed_date})
-            base_url = const.FEED_API_PROD_URL + str(FeedType.SNAPSHOT)
+            base_url = (self.base_url if self.base_url else const.FEED_API_PROD_URL) + str(FeedType.SNAPSHOT)
             return fields, base_url
         # Daily or bootstrap feed
         if self.feed_scope == str(FeedScope.DAILY):
@@ -159,11 +603,15 @@ class Feed(object):
         return fields, base_url
 
     def __find_base_url(self):
+        if self.base_url:
+            return self.base_url
         if self.environment.lower() == str(Environment.PRODUCTION):
             return const.FEED_API_PROD_URL
         return const.FEED_API_SANDBOX_URL
 
     def __find_max_chunk_size(self):
+        if self.chunk_size:
+            return self.chunk_size
         if self.environment.lower() == str(Environment.PRODUCTION):
             return const.PROD_CHUNK_SIZE
         return const.SANDBOX_CHUNK_SIZE
@@ -178,3 +626,25 @@ class Feed(object):
         file_name = str(FeedType.ITEM) + '_' + feed_prefix + '_' + str(self.category_id) + '_' + self.feed_date + \
             '_' + self.marketplace_id + file_utils.get_extension(self.file_format)
         return file_name
+
+
+async def aget_feeds(feeds, max_concurrency=const.MAX_CONNECTIONS_PER_HOST):
+    """
+    Downloads the given feeds concurrently in the running event loop
+    :param feeds: list of Feed objects
+    :param max_concurrency: max number of ranges downloaded at the same time across all the feeds
+    :return: list of GetFeedResponse in the order of the given feeds
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        return await asyncio.gather(*[feed.aget(semaphore, executor) for feed in feeds])
+
+
+def get_feeds(feeds, max_concurrency=const.MAX_CONNECTIONS_PER_HOST):
+    """
+    Blocking counterpart of aget_feeds, runs the downloads in a new event loop
+    :param feeds: list of Feed objects
+    :param max_concurrency: max number of ranges downloaded at the same time across all the feeds
+    :return: list of GetFeedResponse in the order of the given feeds
+    """
+    return asyncio.run(aget_feeds(feeds, max_concurrency))
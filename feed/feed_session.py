@@ -0,0 +1,70 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import certifi
+import urllib3
+import logging
+import constants.feed_constants as const
+from utils.logging_utils import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class FeedSession(object):
+    """
+    Long-lived HTTP connection pool that can be shared by Feed objects, so the TCP and TLS connections to the Feed
+    API are reused across feed downloads
+    """
+    def __init__(self, max_connections_per_host=const.MAX_CONNECTIONS_PER_HOST, retries=const.REQUEST_RETRIES,
+                 back_off_time=const.BACK_OFF_TIME, timeout=const.REQUEST_TIMEOUT):
+        self.max_connections_per_host = max_connections_per_host if max_connections_per_host \
+            else const.MAX_CONNECTIONS_PER_HOST
+        self.retries = retries if retries is not None else const.REQUEST_RETRIES
+        self.back_off_time = back_off_time if back_off_time is not None else const.BACK_OFF_TIME
+        self.timeout = timeout if timeout else const.REQUEST_TIMEOUT
+        self.__http_manager = urllib3.PoolManager(timeout=self.timeout,
+                                                  retries=urllib3.Retry(self.retries,
+                                                                        backoff_factor=self.back_off_time),
+                                                  maxsize=self.max_connections_per_host,
+                                                  cert_reqs='CERT_REQUIRED', ca_certs=certifi.where())
+
+    def __str__(self):
+        return '[max_connections_per_host= %s, retries= %s, back_off_time= %s, timeout= %s]' % \
+               (self.max_connections_per_host,
+                self.retries,
+                self.back_off_time,
+                self.timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def request(self, method, url, fields=None, headers=None, **kwargs):
+        """
+        Sends the request through the shared connection pool
+        :return: urllib3 HTTPResponse
+        """
+        return self.__http_manager.request(method, url, fields, headers, **kwargs)
+
+    def close(self):
+        """
+        Closes all the pooled connections
+        """
+        self.__http_manager.clear()
@@ -0,0 +1,252 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import hashlib
+import json
+import logging
+import time
+from os import makedirs, open as os_open, close as os_close, replace, walk, O_RDWR, O_CREAT
+from os.path import join, isdir, isfile, getsize, abspath
+from shutil import rmtree
+from utils import file_utils
+from errors.custom_exceptions import FileCreationError
+from utils.logging_utils import setup_logging
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = 'index.json'
+FEEDS_DIRECTORY_NAME = 'feeds'
+LOCKS_DIRECTORY_NAME = 'locks'
+# time between the attempts to take a lock that is held by another process, in seconds
+LOCK_POLL_INTERVAL = 0.1
+
+
+class FileLock(object):
+    """
+    Exclusive lock on a lock file. The lock file is opened by every acquire, so the lock is held against the other
+    threads of this process as well as against other processes
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.__file_descriptor = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def acquire(self, blocking=True):
+        """
+        :param blocking: False to return immediately if another process or thread holds the lock
+        :return: True if the lock is taken
+        """
+        file_descriptor = os_open(self.file_path, O_RDWR | O_CREAT)
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(file_descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(file_descriptor, msvcrt.LK_NBLCK, 1)
+                self.__file_descriptor = file_descriptor
+                return True
+            except (IOError, OSError):
+                if not blocking:
+                    os_close(file_descriptor)
+                    return False
+                time.sleep(LOCK_POLL_INTERVAL)
+
+    def release(self):
+        if self.__file_descriptor is None:
+            return
+        if fcntl:
+            fcntl.flock(self.__file_descriptor, fcntl.LOCK_UN)
+        else:
+            msvcrt.locking(self.__file_descriptor, msvcrt.LK_UNLCK, 1)
+        os_close(self.__file_descriptor)
+        self.__file_descriptor = None
+
+
+class FeedStore(object):
+    """
+    Local directory of feed files shared by the feed requests of one or more processes. Every feed file is stored in a
+    directory named after the hash of its request identity, the feed type, scope, category, marketplace, date and
+    environment, so the same request always finds the same file. A download holds the lock of its entry, so a second
+    process waits for it and then reuses the file. When the files take more than max_size bytes, the least recently
+    used entries that are not locked are removed
+    """
+    def __init__(self, root_directory, max_size=None):
+        """
+        :param root_directory: the directory of the store, created if it does not exist
+        :param max_size: the disk budget of the store in bytes, not limited if None
+        """
+        self.root_directory = abspath(root_directory)
+        self.max_size = max_size
+
+    def __str__(self):
+        return '[root_directory= %s, max_size= %s]' % (self.root_directory, self.max_size)
+
+    @property
+    def entries(self):
+        """
+        :return: dict of the entry key and the identity, file name and last access time of every stored feed
+        """
+        with self.__lock_index():
+            return self.__read_index()
+
+    @property
+    def size(self):
+        """
+        :return: the number of bytes that the stored feeds take on disk
+        """
+        return sum(self.__get_entry_size(key) for key in self.entries)
+
+    @staticmethod
+    def get_key(identity):
+        """
+        :param identity: dict of the fields that identify a feed request
+        :return: the hash of the identity
+        """
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+    def get_location(self, identity):
+        """
+        :return: the directory of the feed file of the given identity
+        """
+        return join(self.root_directory, FEEDS_DIRECTORY_NAME, self.get_key(identity))
+
+    def lock(self, identity):
+        """
+        :return: FileLock of the entry, held while the feed file of the given identity is written
+        """
+        self.__create_directories()
+        return FileLock(join(self.root_directory, LOCKS_DIRECTORY_NAME, self.get_key(identity) + '.lock'))
+
+    def add(self, identity, file_name, evict=True):
+        """
+        Records the access of a feed file that is stored in get_location(identity), then removes the least recently
+        used entries until the store fits in max_size
+        :param identity: dict of the fields that identify the feed request
+        :param file_name: the name of the feed file
+        :param evict: False to only record the access
+        """
+        key = self.get_key(identity)
+        with self.__lock_index():
+            index = self.__read_index()
+            index[key] = {'identity': identity, 'file_name': file_name, 'last_access': time.time()}
+            if evict:
+                self.__evict(index, key)
+            self.__write_index(index)
+
+    def remove(self, key):
+        """
+        Removes an entry with its feed file, unless the entry is locked
+        :param key: the key of the entry in entries
+        :return: True if the entry is removed
+        """
+        with self.__lock_index():
+            index = self.__read_index()
+            if not self.__remove_entry(key):
+                return False
+            index.pop(key, None)
+            self.__write_index(index)
+            return True
+
+    def __evict(self, index, current_key):
+        if self.max_size is None:
+            return
+        entry_sizes = {key: self.__get_entry_size(key) for key in index}
+        total_size = sum(entry_sizes.values())
+        for key in sorted(index, key=lambda entry_key: index[entry_key]['last_access']):
+            if total_size <= self.max_size:
+                return
+            if key == current_key or not self.__remove_entry(key):
+                continue
+            logger.info('Removed feed file %s of %s bytes from the store, last used at %s', index[key]['file_name'],
+                        entry_sizes[key], time.ctime(index[key]['last_access']))
+            total_size -= entry_sizes[key]
+            del index[key]
+        if total_size > self.max_size:
+            logger.warning('The feed store takes %s bytes, more than the max size of %s bytes', total_size,
+                           self.max_size)
+
+    def __remove_entry(self, key):
+        # an entry that is being downloaded by any process is kept
+        entry_lock = FileLock(join(self.root_directory, LOCKS_DIRECTORY_NAME, key + '.lock'))
+        if not entry_lock.acquire(False):
+            return False
+        try:
+            rmtree(join(self.root_directory, FEEDS_DIRECTORY_NAME, key), ignore_errors=True)
+            return True
+        finally:
+            entry_lock.release()
+
+    def __get_entry_size(self, key):
+        entry_size = 0
+        for directory_path, _, file_names in walk(join(self.root_directory, FEEDS_DIRECTORY_NAME, key)):
+            for file_name in file_names:
+                try:
+                    entry_size += getsize(join(directory_path, file_name))
+                except OSError:
+                    # removed in the meantime
+                    pass
+        return entry_size
+
+    def __lock_index(self):
+        # every FileLock opens the lock file again, so it excludes the other threads of this process as well
+        self.__create_directories()
+        return FileLock(join(self.root_directory, INDEX_FILE_NAME + '.lock'))
+
+    def __read_index(self):
+        index_file_path = join(self.root_directory, INDEX_FILE_NAME)
+        if not isfile(index_file_path):
+            return {}
+        try:
+            index = file_utils.read_json(index_file_path)
+        except (IOError, ValueError) as exp:
+            logger.warning('Could not read the index of the feed store %s: %s', index_file_path, repr(exp))
+            index = {}
+        # entries whose directory has been removed outside of the store are dropped
+        return {key: entry for key, entry in index.items()
+                if isdir(join(self.root_directory, FEEDS_DIRECTORY_NAME, key))}
+
+    def __write_index(self, index):
+        index_file_path = join(self.root_directory, INDEX_FILE_NAME)
+        temp_file_path = index_file_path + '.tmp'
+        try:
+            with open(temp_file_path, 'w') as index_file:
+                json.dump(index, index_file)
+            replace(temp_file_path, index_file_path)
+        except (IOError, OSError) as exp:
+            raise FileCreationError('IO error in writing the index of the feed store %s: %s' %
+                                    (index_file_path, repr(exp)), index_file_path)
+
+    def __create_directories(self):
+        for directory_name in (FEEDS_DIRECTORY_NAME, LOCKS_DIRECTORY_NAME):
+            directory_path = join(self.root_directory, directory_name)
+            if not isdir(directory_path):
+                makedirs(directory_path, exist_ok=True)
+
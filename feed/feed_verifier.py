@@ -0,0 +1,111 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import zlib
+import logging
+import threading
+import constants.feed_constants as const
+from errors.custom_exceptions import InputDataError
+from utils.logging_utils import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# zlib window bits that only accept the gzip format and check the CRC and the size in the trailer of every member
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class FeedVerifier(object):
+    """
+    Verifies a gzip feed file while it is downloaded. The data is decompressed and discarded in the order of the file,
+    as far as the file is downloaded without gaps, so a truncated or corrupt file is detected as soon as the bad data
+    is written instead of when the file is filtered. Every gzip member is checked, including the CRC and the size in
+    its trailer
+    """
+    def __init__(self, file_path, total_size):
+        self.file_path = file_path
+        self.total_size = total_size
+        self.position = 0
+        self.number_of_members = 0
+        self.__decompressor = zlib.decompressobj(GZIP_WBITS)
+        self.__member_started = False
+        self.__lock = threading.Lock()
+
+    def __str__(self):
+        return '[file_path= %s, total_size= %s, position= %s, number_of_members= %s]' % (self.file_path,
+                                                                                         self.total_size,
+                                                                                         self.position,
+                                                                                         self.number_of_members)
+
+    def verify_to(self, offset, wait=False):
+        """
+        Verifies the data of the file from the current position to the given offset
+        :param offset: the size of the downloaded data at the beginning of the file, in bytes
+        :param wait: True to wait for another thread that is verifying the file, otherwise the call returns and the
+                     data is verified by a later call
+        :raise: if the data is not valid gzip data an InputDataError exception is raised
+        """
+        if not self.__lock.acquire(wait):
+            return
+        try:
+            if offset <= self.position:
+                return
+            with open(self.file_path, 'rb') as file_obj:
+                file_obj.seek(self.position)
+                while self.position < offset:
+                    data = file_obj.read(min(const.STREAM_BUFFER_SIZE, offset - self.position))
+                    if not data:
+                        raise InputDataError('Feed file %s is shorter than %s bytes' % (self.file_path, offset),
+                                             self.file_path)
+                    self.__decompress(data)
+                    self.position = self.position + len(data)
+        finally:
+            self.__lock.release()
+
+    def finish(self):
+        """
+        Verifies the rest of the file and checks that the file ends at the end of a gzip member
+        :raise: if the file is not a complete and valid gzip file an InputDataError exception is raised
+        """
+        self.verify_to(self.total_size, True)
+        if self.position != self.total_size:
+            raise InputDataError('Feed file %s has %s bytes, %s bytes are expected' %
+                                 (self.file_path, self.position, self.total_size), self.file_path)
+        if self.__member_started or not self.number_of_members:
+            raise InputDataError('Feed file %s is truncated, the last gzip member is incomplete' % self.file_path,
+                                 self.file_path)
+        logger.info('Verified feed file %s, %s gzip members\n', self.file_path, self.number_of_members)
+
+    def __decompress(self, data):
+        try:
+            while data:
+                self.__member_started = True
+                # the decompressed data is not needed, it is limited to one buffer at a time
+                output = self.__decompressor.decompress(data, const.STREAM_BUFFER_SIZE)
+                data = self.__decompressor.unconsumed_tail
+                while not data and output and not self.__decompressor.eof:
+                    # all the input is consumed, flush the output that has not fit in the buffer
+                    output = self.__decompressor.decompress(b'', const.STREAM_BUFFER_SIZE)
+                if self.__decompressor.eof:
+                    # the CRC and the size of the member are correct, the next member starts right after it
+                    self.number_of_members = self.number_of_members + 1
+                    self.__member_started = False
+                    data = self.__decompressor.unused_data
+                    self.__decompressor = zlib.decompressobj(GZIP_WBITS)
+        except zlib.error as exp:
+            raise InputDataError('Feed file %s is corrupt near byte %s: %s' % (self.file_path, self.position, exp),
+                                 self.file_path)
@@ -19,9 +19,13 @@ import time
 import logging
 import argparse
 from enums.feed_enums import FeedType
+from enums.file_enums import FileFormat
 from feed.feed_request import Feed
-from filter.feed_filter import FeedFilterRequest
-from constants.feed_constants import SUCCESS_CODE
+from feed.feed_pipeline import download_and_filter
+from feed.feed_session import FeedSession
+from feed.feed_store import FeedStore
+from filter.feed_filter import FeedFilterRequest, DB_IN_MEMORY
+from constants.feed_constants import SUCCESS_CODE, MAX_CONNECTIONS_PER_HOST, REQUEST_RETRIES, REQUEST_TIMEOUT
 from utils.logging_utils import setup_logging
 
 setup_logging()
@@ -55,45 +59,160 @@ parser.add_argument('-epidf', nargs='+', help='list of epids which are used to f
 parser.add_argument('-iepidf', nargs='+', help='list of inferred epids which are used to filter the feed')
 parser.add_argument('-gtinf', nargs='+', help='list of gtins which are used to filter the feed')
 parser.add_argument('-itemf', nargs='+', help='list of item IDs which are used to filter the feed')
+# very long lists of values, read from files
+parser.add_argument('-itemfile', help='file of the item IDs which are used to filter the feed, one per line. The file '
+                                      'may be compressed by gzip')
+parser.add_argument('-gtinfile', help='file of the gtins which are used to filter the feed, one per line. The file may '
+                                      'be compressed by gzip')
+parser.add_argument('-epidfile', help='file of the epids which are used to filter the feed, one per line. The file may '
+                                      'be compressed by gzip')
 # file location
 parser.add_argument('-dl', '--downloadlocation', help='override for changing the directory where files are downloaded')
 parser.add_argument('--filteronly', help='filter the feed file that already exists in the default path or the path '
                                          'specified by -dl, --downloadlocation option. If --filteronly option is not '
-                                         'specified, the feed file will be downloaded again', action="store_true")
+                                         'specified, the feed file will be downloaded again, unless the file '
+                                         'downloaded before has not changed', action="store_true")
+# shared feed store
+parser.add_argument('-store', help='directory of the feed store that keeps the feed files of all the jobs using it. '
+                                   'A feed file in the store is reused by the next downloads and filters of the same '
+                                   'feed. Overrides -dl, --downloadlocation option')
+parser.add_argument('-storesize', type=float, help='max disk space of the feed store in GB. The least recently used '
+                                                   'feed files are removed when the store gets larger. Not limited by '
+                                                   'default')
+# download and filter at the same time
+parser.add_argument('--stream', help='filter the feed file while it is downloaded. Only the filtered file is written, '
+                                     'unless --keepfile option is specified', action="store_true")
+parser.add_argument('--keepfile', help='write the feed file to the download location as well when --stream option is '
+                                       'specified', action="store_true")
+# parallel download
+parser.add_argument('-workers', type=int, help='number of byte ranges of the feed file that are downloaded at the same '
+                                               'time. Default is 1', default=1)
+parser.add_argument('--adaptivechunks', help='adapt the size of the requested byte ranges to the measured throughput '
+                                             'instead of always requesting the max chunk size', action="store_true")
+# integrity
+parser.add_argument('--verify', help='verify the gzip data of the feed file while it is downloaded, including the CRC '
+                                     'and the size of every gzip member', action="store_true")
+# connection pool
+parser.add_argument('-maxconnections', type=int, help='max number of connections kept open to the feed API. Default '
+                                                      'is %s' % MAX_CONNECTIONS_PER_HOST,
+                    default=MAX_CONNECTIONS_PER_HOST)
+parser.add_argument('-retries', type=int, help='number of retries of a failed request. Default is %s' % REQUEST_RETRIES,
+                    default=REQUEST_RETRIES)
+parser.add_argument('-timeout', type=float, help='timeout of a request in seconds. Default is %s' % REQUEST_TIMEOUT,
+                    default=REQUEST_TIMEOUT)
 # file format
-parser.add_argument('-format', help='feed and filter file format. Default is gzip', default='gzip')
+parser.add_argument('-format', help='format of the filtered file: gzip, zstd, tsv or parquet. zstd needs zstandard and '
+                                    'parquet needs pyarrow. The feed files are gzip. Default is gzip', default='gzip',
+                    choices=[str(file_format) for file_format in FileFormat])
+parser.add_argument('-compressionlevel', type=int, help='compression level of the filtered file. Default is the '
+                                                        'default level of the format')
+parser.add_argument('-outputdir', help='directory of the filtered file. Default is the directory of the feed file, or '
+                                       'the download location if the feed file is in the feed store')
 
 # any query to filter the feed file
-parser.add_argument('-qf', help='any other query to filter the feed file. See Python dataframe query format')
+parser.add_argument('-qf', help='any other query to filter the feed file, a SQL-like condition. '
+                                'See The any_query grammar in the README')
+# filter engine
+parser.add_argument('-engine', help='how the filters are applied. sqlite loads the feed file into a SQLite database '
+                                    'and queries it, pandas evaluates the filters on every chunk of rows. Default is '
+                                    'sqlite', choices=['sqlite', 'pandas'], default='sqlite')
+parser.add_argument('-filterworkers', type=int, help='number of processes that parse and filter the rows of the feed '
+                                                     'file. Default is 1', default=1)
+# columnar cache of the parsed feed files
+parser.add_argument('-cachedir', help='directory where the parsed rows of the feed file are cached, so the next filters '
+                                      'of the same feed file do not parse it again. Needs pyarrow')
+# two phase filtering
+parser.add_argument('--latematerialization', help='parse the columns of the filters first and the other columns of '
+                                                  'the matching rows only. The filtered file has all the columns, '
+                                                  'including Title, ImageUrl and AdditionalImageUrls',
+                    action="store_true")
+# persistent database of the sqlite engine
+parser.add_argument('-db', help='path of the SQLite database file that the sqlite engine keeps. The feed file is loaded '
+                                'into it only if it has not been loaded from the same feed file before')
+parser.add_argument('-dbdir', help='directory of the staging SQLite database file of the sqlite engine, which has a '
+                                   'unique name and is removed after filtering. %s keeps it in memory. Default is the '
+                                   'temp directory' % DB_IN_MEMORY)
 
 # parse the arguments
 args = parser.parse_args()
 
 
 start = time.time()
+feed_store = FeedStore(args.store, int(args.storesize * 1024 ** 3) if args.storesize else None) if args.store \
+    else None
 if args.filteronly:
+    # the feed file in the store is found by the feed request
+    store_feed_obj = Feed(FeedType.ITEM.value, args.scope, args.c1, args.mkt, args.token, args.dt, args.env,
+                          args.downloadlocation, store=feed_store) if feed_store else None
+    input_file_path = store_feed_obj.file_path if store_feed_obj else args.downloadlocation
+    # the filtered file is not written into the entry of the feed store
+    output_directory = store_feed_obj.output_location if store_feed_obj and not args.outputdir else args.outputdir
     # create the filtered file
-    feed_filter_obj = FeedFilterRequest(args.downloadlocation, args.itemf, args.lf, args.sellerf, args.gtinf,
+    feed_filter_obj = FeedFilterRequest(input_file_path, args.itemf, args.lf, args.sellerf, args.gtinf,
                                         args.epidf, args.pricelf, args.priceuf, args.locf, args.iepidf, args.qf,
-                                        args.format)
-    filter_response = feed_filter_obj.filter()
+                                        engine=args.engine, number_of_workers=args.filterworkers,
+                                        cache_directory=args.cachedir, db_file_path=args.db,
+                                        late_materialization=args.latematerialization,
+                                        item_ids_file_path=args.itemfile, gtins_file_path=args.gtinfile,
+                                        epids_file_path=args.epidfile, db_directory=args.dbdir,
+                                        output_format=args.format, compression_level=args.compressionlevel,
+                                        output_directory=output_directory)
+    # the feed file is not removed from the store while it is filtered
+    store_lock = store_feed_obj.lock_store_entry() if store_feed_obj else None
+    try:
+        filter_response = feed_filter_obj.filter()
+    finally:
+        if store_feed_obj:
+            store_feed_obj.release_store_entry(store_lock)
     if filter_response.status_code != SUCCESS_CODE:
         print(filter_response.message)
 
 else:
     # download the feed file if --filteronly option is not set
+    feed_session = FeedSession(args.maxconnections, args.retries, timeout=args.timeout)
     feed_obj = Feed(FeedType.ITEM.value, args.scope, args.c1, args.mkt, args.token, args.dt, args.env,
-                    args.downloadlocation, args.format)
-    get_response = feed_obj.get()
+                    args.downloadlocation, FileFormat.GZIP.value, args.workers, session=feed_session,
+                    adaptive_chunk_size=args.adaptivechunks, verify=args.verify, store=feed_store)
+    # the filtered file is not written into the entry of the feed store
+    output_directory = feed_obj.output_location if feed_store and not args.outputdir else args.outputdir
+    if args.stream:
+        # the filter request gets the path of the feed file from the feed request
+        feed_filter_obj = FeedFilterRequest(None, args.itemf, args.lf, args.sellerf, args.gtinf, args.epidf,
+                                            args.pricelf, args.priceuf, args.locf, args.iepidf, args.qf,
+                                            engine=args.engine, number_of_workers=args.filterworkers,
+                                            cache_directory=args.cachedir, db_file_path=args.db,
+                                            late_materialization=args.latematerialization,
+                                            item_ids_file_path=args.itemfile, gtins_file_path=args.gtinfile,
+                                            epids_file_path=args.epidfile, db_directory=args.dbdir,
+                                            output_format=args.format, compression_level=args.compressionlevel,
+                                            output_directory=output_directory)
+        get_response, filter_response = download_and_filter(feed_obj, feed_filter_obj, args.keepfile)
+    else:
+        get_response = feed_obj.get()
+        filter_response = None
+    feed_session.close()
     if get_response.status_code != SUCCESS_CODE:
         logger.error('Exception in downloading feed. Cannot proceed\nFile path: %s\n Error message: %s\n',
                      get_response.file_path, get_response.message)
+    elif filter_response:
+        if filter_response.status_code != SUCCESS_CODE:
+            print(filter_response.message)
     else:
         # create the filtered file
         feed_filter_obj = FeedFilterRequest(get_response.file_path, args.itemf, args.lf, args.sellerf, args.gtinf,
                                             args.epidf, args.pricelf, args.priceuf, args.locf, args.iepidf, args.qf,
-                                            args.format)
-        filter_response = feed_filter_obj.filter()
+                                            engine=args.engine, number_of_workers=args.filterworkers,
+                                            cache_directory=args.cachedir, db_file_path=args.db,
+                                            late_materialization=args.latematerialization,
+                                            item_ids_file_path=args.itemfile, gtins_file_path=args.gtinfile,
+                                            epids_file_path=args.epidfile, db_directory=args.dbdir,
+                                            output_format=args.format, compression_level=args.compressionlevel,
+                                            output_directory=output_directory)
+        store_lock = feed_obj.lock_store_entry()
+        try:
+            filter_response = feed_filter_obj.filter()
+        finally:
+            feed_obj.release_store_entry(store_lock)
         if filter_response.status_code != SUCCESS_CODE:
             print(filter_response.message)
 end = time.time()
@@ -0,0 +1,65 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import sys
+import time
+import logging
+import argparse
+from filter.feed_index import FeedIndex, ACCESS_POINT_SPACING
+from utils.filter_utils import read_value_list_file
+from utils.logging_utils import setup_logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+parser = argparse.ArgumentParser(prog='FeedIndex', description='Feed SDK index CLI')
+
+# feed file
+parser.add_argument('-file', help='path of the downloaded feed file', required=True)
+parser.add_argument('-index', help='path of the index file. Default is the path of the feed file with the .index '
+                                   'extension')
+parser.add_argument('-format', help='feed file format. Default is gzip', default='gzip')
+# build the index
+parser.add_argument('--build', help='build the index of the feed file, unless it has been built from the same feed '
+                                    'file already', action="store_true")
+parser.add_argument('-spacing', type=int, help='uncompressed bytes between two access points when indexed_gzip is '
+                                               'installed. Default is %s' % ACCESS_POINT_SPACING,
+                    default=ACCESS_POINT_SPACING)
+# look the items up
+parser.add_argument('-lookup', nargs='+', help='list of item IDs whose rows are read from the feed file')
+parser.add_argument('-lookupfile', help='file of the item IDs whose rows are read from the feed file, one per line')
+parser.add_argument('-columns', nargs='+', help='columns of the rows that are written. Default is all the columns')
+parser.add_argument('-o', '--output', help='path of the file the rows are written to. Default is the standard output')
+
+# parse the arguments
+args = parser.parse_args()
+
+
+start = time.time()
+feed_index = FeedIndex(args.file, args.index, args.format)
+if args.build and not feed_index.exists():
+    feed_index.build(args.spacing)
+item_ids = list(args.lookup) if args.lookup else []
+if args.lookupfile:
+    item_ids.extend(read_value_list_file(args.lookupfile))
+if item_ids:
+    rows_df = feed_index.lookup(item_ids, args.columns)
+    rows_df.to_csv(args.output if args.output else sys.stdout, sep='\t', na_rep='', index=False,
+                   lineterminator='\n')
+    logger.info('Found %s of %s item IDs', len(rows_df.index), len(item_ids))
+end = time.time()
+logger.info('Execution time (s): %s', str(round(end - start, 3)))
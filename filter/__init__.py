@@ -1,3 +1,7 @@
 __all__ = [
-    'feed_filter'
+    'feed_cache',
+    'feed_filter',
+    'feed_index',
+    'feed_query',
+    'feed_writer'
     ]
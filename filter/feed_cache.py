@@ -0,0 +1,132 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import hashlib
+from os import makedirs, remove, replace, getpid
+from os.path import join, isfile
+from utils.file_utils import get_file_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # the columnar cache is optional, the feed files are filtered without it
+    pa = None
+    pq = None
+
+# changes whenever the stored columns or types change, so the datasets of an older version are not read
+CACHE_VERSION = '1'
+DATASET_EXTENSION = '.parquet'
+DATASET_COMPRESSION = 'zstd'
+
+
+class FeedCache(object):
+    """
+    Directory of the parsed rows of feed files, stored as typed and compressed Parquet datasets. A dataset is keyed by
+    the fingerprint of the feed file and the options it was parsed with, so a feed file is parsed once and every other
+    filter of the same feed file reads the dataset instead. The datasets are read one row group at a time and only the
+    columns that are needed are read
+    """
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+
+    @staticmethod
+    def is_available():
+        """
+        :return: True if pyarrow is installed, which is needed to write and read the datasets
+        """
+        return pq is not None
+
+    def get_dataset_path(self, input_file_path, *parse_options):
+        """
+        :param input_file_path: the path of the feed file
+        :param parse_options: the options the feed file is parsed with, such as the separator and the encoding
+        :return: the path of the dataset of the feed file, which might not exist yet
+        """
+        digest = hashlib.sha256(CACHE_VERSION.encode('utf-8'))
+        digest.update(get_file_fingerprint(input_file_path).encode('utf-8'))
+        for parse_option in parse_options:
+            digest.update(('|%s' % parse_option).encode('utf-8'))
+        return join(self.cache_directory, digest.hexdigest()[:32] + DATASET_EXTENSION)
+
+    @staticmethod
+    def exists(dataset_path):
+        return isfile(dataset_path)
+
+    def write(self, dataset_path, data_frames, columns, float_columns=(), bool_columns=()):
+        """
+        Writes the parsed rows to the dataset, one row group per data frame. The dataset is written to a temporary
+        file first and renamed when it is complete, so a dataset that exists is always complete
+        :param dataset_path: the path of the dataset
+        :param data_frames: iterable of the data frames of the parsed rows
+        :param columns: the columns of the data frames
+        :param float_columns: the columns stored as float64, the other columns are stored as strings
+        :param bool_columns: the columns stored as booleans
+        :return: the number of rows written to the dataset
+        """
+        schema = pa.schema([(column, pa.float64() if column in float_columns else
+                             pa.bool_() if column in bool_columns else pa.string()) for column in columns])
+        makedirs(self.cache_directory, exist_ok=True)
+        temp_path = '%s.%s.tmp' % (dataset_path, getpid())
+        number_of_rows = 0
+        try:
+            with pq.ParquetWriter(temp_path, schema, compression=DATASET_COMPRESSION) as writer:
+                for data_frame in data_frames:
+                    writer.write_table(pa.Table.from_pandas(data_frame, schema=schema, preserve_index=False),
+                                       row_group_size=max(len(data_frame.index), 1))
+                    number_of_rows = number_of_rows + len(data_frame.index)
+            replace(temp_path, dataset_path)
+        except Exception:
+            if isfile(temp_path):
+                remove(temp_path)
+            raise
+        return number_of_rows
+
+    @staticmethod
+    def get_columns(dataset_path):
+        """
+        :return: the names of the columns stored in the dataset
+        """
+        return pq.ParquetFile(dataset_path).schema_arrow.names
+
+    @staticmethod
+    def read(dataset_path, columns, mask_columns=None, build_mask=None):
+        """
+        Reads the rows of the dataset one row group at a time. If build_mask is given, the mask_columns are read
+        first and the other columns are read for the matching rows of the row group only
+        :param dataset_path: the path of the dataset
+        :param columns: the columns of the returned data frames
+        :param mask_columns: the columns that build_mask needs
+        :param build_mask: optional function that returns the boolean mask of the rows to keep for a data frame of
+        the mask_columns
+        :return: generator of tuples of the number of rows of the row group and the data frame of the kept rows
+        """
+        parquet_file = pq.ParquetFile(dataset_path)
+        empty_data_frame = None
+        for index in range(parquet_file.num_row_groups):
+            number_of_rows = parquet_file.metadata.row_group(index).num_rows
+            if not build_mask:
+                yield number_of_rows, parquet_file.read_row_group(index, columns=columns).to_pandas()
+                continue
+            mask = build_mask(parquet_file.read_row_group(index, columns=mask_columns).to_pandas())
+            mask = mask.to_numpy(dtype=bool)
+            if not mask.any():
+                if empty_data_frame is None:
+                    empty_data_frame = parquet_file.schema_arrow.empty_table().select(columns).to_pandas()
+                yield number_of_rows, empty_data_frame
+                continue
+            yield number_of_rows, parquet_file.read_row_group(index, columns=columns).filter(pa.array(mask)).to_pandas()
@@ -15,42 +15,80 @@
 # limitations under the License.
 # **************************************************************************/
 
+import io
+import gzip
+import json
 import time
 import logging
+import tempfile
 import pandas as pd
-from os import remove
+from os import remove, makedirs, close, open as os_open, O_CREAT, O_EXCL, O_WRONLY
 from sqlalchemy import create_engine
-from collections import namedtuple
-from os.path import split, abspath, join, isfile
+from sqlalchemy.exc import DatabaseError
+from collections import namedtuple, deque
+from concurrent.futures import ProcessPoolExecutor
+from os.path import split, abspath, join, isfile, dirname, splitext
 from utils import filter_utils
-from utils.file_utils import get_extension
+from utils.file_utils import get_extension, get_file_fingerprint
+from feed.feed_store import FileLock
+from filter.feed_cache import FeedCache
+from filter import feed_query
+from filter.feed_writer import get_writer_class
 
 from enums.feed_enums import FeedColumn
 from enums.file_enums import FileEncoding, FileFormat
+from enums.filter_enums import FilterEngine
 import constants.feed_constants as const
+from errors.custom_exceptions import FilterError
 from utils.logging_utils import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
 Response = namedtuple('Response', 'status_code message file_path applied_filters')
-GetFeedResponse = namedtuple('GetFeedResponse', Response._fields + ('errors',))
+GetFeedResponse = namedtuple('GetFeedResponse', Response._fields + ('errors', 'cache_hit', 'metrics'))
 
 BOOL_COLUMNS = {'ImageAlteringProhibited', 'ReturnsAccepted'}
 # using float64 for integer columns as well as the workaround for NAN values
 FLOAT_COLUMNS = {'AvailabilityThreshold', 'EstimatedAvailableQuantity',
                  'PriceValue', 'ReturnPeriodValue'}
 IGNORE_COLUMNS = {'AdditionalImageUrls', 'ImageUrl', 'Title'}
+# the options of pandas read_csv that every reader of the feed files shares, the bad lines are skipped
+READ_CSV_OPTIONS = {'quotechar': '"', 'lineterminator': '\n', 'skip_blank_lines': True, 'skipinitialspace': True,
+                    'on_bad_lines': 'skip', 'index_col': False}
 
+# the columns are read as strings and converted a whole column at a time
+CONVERTERS = {'AvailabilityThreshold': filter_utils.convert_column_to_float_max_int,
+              'EstimatedAvailableQuantity': filter_utils.convert_column_to_float_max_int,
+              'PriceValue': filter_utils.convert_column_to_float_zero,
+              'ReturnPeriodValue': filter_utils.convert_column_to_float_zero,
+              'ImageAlteringProhibited': filter_utils.convert_column_to_bool_false,
+              'ReturnsAccepted': filter_utils.convert_column_to_bool_false}
+
+# the staging DB files of the sqlite engine have unique names made of the name and the extension of DB_FILE_NAME
 DB_FILE_NAME = 'sqlite_feed_sdk.db'
+# the db_directory of the staging DB that is kept in memory
+DB_IN_MEMORY = ':memory:'
 DB_TABLE_NAME = 'feed'
+# fingerprint of the input file that a persistent DB file is loaded from
+DB_META_TABLE_NAME = 'feed_meta'
+# the columns of the filters are indexed in a persistent DB file
+INDEXED_COLUMNS = {str(column) for column in FeedColumn}
+# the function of the queries that looks the values of a column up in a list file, named after the column
+DB_LIST_FUNCTION_NAME = 'in_list_%s'
+
+# the filters of a parallel filter, which init_filter_worker keeps in every worker process
+worker_filters = {}
 
 
 class FeedFilterRequest(object):
     def __init__(self, input_file_path, item_ids=None, leaf_category_ids=None, seller_names=None, gtins=None,
                  epids=None, price_lower_limit=None, price_upper_limit=None, item_location_countries=None,
                  inferred_epids=None, any_query=None, compression_type=FileFormat.GZIP.value, separator='\t',
-                 encoding=FileEncoding.UTF8.value, rows_chunk_size=const.DATA_FRAME_CHUNK_SIZE):
+                 encoding=FileEncoding.UTF8.value, rows_chunk_size=const.DATA_FRAME_CHUNK_SIZE,
+                 engine=FilterEngine.SQLITE.value, number_of_workers=1, cache_directory=None, db_file_path=None,
+                 late_materialization=False, item_ids_file_path=None, gtins_file_path=None, epids_file_path=None,
+                 db_directory=None, output_format=None, compression_level=None, output_directory=None):
         self.input_file_path = input_file_path
         self.item_ids = item_ids
         self.leaf_category_ids = leaf_category_ids
@@ -66,15 +104,40 @@ class FeedFilterRequest(object):
         self.separator = separator if separator else '\t'
         self.encoding = encoding if encoding else FileEncoding.UTF8.value
         self.rows_chunk_size = rows_chunk_size if rows_chunk_size else const.DATA_FRAME_CHUNK_SIZE
+        self.engine = engine.lower() if engine else FilterEngine.SQLITE.value
+        # number of processes that parse and filter the rows
+        self.number_of_workers = number_of_workers if number_of_workers and number_of_workers > 1 else 1
+        # directory of the parsed feed files, which are reused by the next filters of the same feed files
+        self.cache_directory = cache_directory
+        # persistent SQLite DB file of the sqlite engine, which is loaded once per input file and kept
+        self.db_file_path = db_file_path
+        # the columns of the filters are parsed first, the other columns are parsed for the matching rows only
+        self.late_materialization = late_materialization
+        # files of very long lists of values, one value per line, which are not inlined into the queries
+        self.item_ids_file_path = item_ids_file_path
+        self.gtins_file_path = gtins_file_path
+        self.epids_file_path = epids_file_path
+        # directory of the staging DB file of the sqlite engine, the temp directory if None, DB_IN_MEMORY for no file
+        self.db_directory = db_directory
+        # format of the filtered file, the same as the compression type of the input file if None
+        self.output_format = output_format.lower() if output_format else self.compression_type
+        # compression level of the filtered file, the default level of the output format if None
+        self.compression_level = compression_level
+        # directory of the filtered file, the directory of the input file if None
+        self.output_directory = output_directory
         self.__filtered_file_path = None
         self.__number_of_records = 0
         self.__number_of_filtered_records = 0
         self.__queries = []
+        self.__predicate = None
 
     def __str__(self):
         return '[input_file_path= %s, item_ids= %s, leaf_category_ids= %s, seller_names= %s, gtins= %s, ' \
                'epids= %s,  price_lower_limit= %s, price_upper_limit= %s, item_location_countries= %s, ' \
-               'inferred_epids= %s,  any_query= %s, compression_type= %s, separator= %s, encoding= %s]' % \
+               'inferred_epids= %s,  any_query= %s, compression_type= %s, separator= %s, encoding= %s, engine= %s, ' \
+               'number_of_workers= %s, cache_directory= %s, db_file_path= %s, late_materialization= %s, ' \
+               'item_ids_file_path= %s, gtins_file_path= %s, epids_file_path= %s, db_directory= %s, ' \
+               'output_format= %s, compression_level= %s, output_directory= %s]' % \
                (self.input_file_path,
                 self.item_ids,
                 self.leaf_category_ids,
@@ -88,7 +151,19 @@ class FeedFilterRequest(object):
                 self.any_query,
                 self.compression_type,
                 self.separator,
-                self.encoding)
+                self.encoding,
+                self.engine,
+                self.number_of_workers,
+                self.cache_directory,
+                self.db_file_path,
+                self.late_materialization,
+                self.item_ids_file_path,
+                self.gtins_file_path,
+                self.epids_file_path,
+                self.db_directory,
+                self.output_format,
+                self.compression_level,
+                self.output_directory)
 
     @property
     def filtered_file_path(self):
@@ -112,96 +187,700 @@ class FeedFilterRequest(object):
 
     def filter(self, column_name_list=None, keep_db=False):
         logger.info('Filtering... \nInput file: %s', self.input_file_path)
+        error_response = self.__validate()
+        if error_response:
+            return error_response
+        query_str = self.__build_query()
+        dataset_path = self.__get_cached_dataset(column_name_list)
+        # the columns of the filters are parsed as well and removed from the filtered rows
+        parse_column_list = self.__get_parse_columns(column_name_list)
+        # the filtered rows are written chunk by chunk as they are produced
+        if dataset_path:
+            filtered_chunks = self.__filter_cached_dataset(dataset_path, column_name_list)
+        elif self.db_file_path and self.engine == FilterEngine.SQLITE.value:
+            filtered_chunks = self.__select_columns(
+                self.__read_chunks_gzip_file(query_str, parse_column_list, keep_db), column_name_list)
+        elif self.late_materialization:
+            filtered_chunks = self.__filter_file_late_materialized(column_name_list)
+        elif self.number_of_workers > 1:
+            filtered_chunks = self.__select_columns(self.__filter_file_blocks(parse_column_list), column_name_list)
+        elif self.engine == FilterEngine.PANDAS.value:
+            filtered_chunks = self.__select_columns(self.__filter_chunks_gzip_file(parse_column_list),
+                                                    column_name_list)
+        else:
+            filtered_chunks = self.__select_columns(
+                self.__read_chunks_gzip_file(query_str, parse_column_list, keep_db), column_name_list)
+        self.__write_filtered_chunks(filtered_chunks)
+        return Response(const.SUCCESS_CODE, const.SUCCESS_STR, self.filtered_file_path, self.queries)
 
-        self.__append_query(self.any_query)
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.ITEM_ID, self.item_ids))
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.CATEGORY_ID, self.leaf_category_ids))
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.SELLER_USERNAME, self.seller_names))
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.GTIN, self.gtins))
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.EPID, self.epids))
-        self.__append_query(filter_utils.get_inclusive_greater_query(FeedColumn.PRICE_VALUE, self.price_lower_limit))
-        self.__append_query(filter_utils.get_inclusive_less_query(FeedColumn.PRICE_VALUE, self.price_upper_limit))
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.INFERRED_EPID, self.inferred_epids))
-        self.__append_query(filter_utils.get_list_string_element_query(FeedColumn.ITEM_LOCATION_COUNTRIES,
-                                                                       self.item_location_countries))
-        query_str = None
-        if self.__queries:
-            query_str = ' AND '.join(self.__queries)
+    @staticmethod
+    def filter_batch(filter_requests, column_name_list=None):
+        """
+        Filters one input file by many filter requests in one pass. The input file is decompressed and parsed once,
+        the filters of every request are applied to every chunk of rows and every request writes its own filtered
+        file. The filter requests are applied to every chunk separately, so the sqlite engine does not create the db
+        file, and the number_of_workers, cache_directory, db_file_path and late_materialization of the requests are not
+        used
+        :param filter_requests: the FeedFilterRequests of the same input file, parsed with the same options
+        :param column_name_list: optional list of the columns that are read from the input file
+        :return: list of the Responses of the filter requests, in the same order
+        :raise: if the requests do not filter the same input file with the same options a FilterError is raised
+        """
+        parse_options = {(filter_request.input_file_path, filter_request.compression_type, filter_request.separator,
+                          filter_request.encoding) for filter_request in filter_requests}
+        if len(parse_options) > 1:
+            raise FilterError('The filter requests of a batch do not have the same input file and options',
+                              parse_options)
+        responses = [filter_request.__validate() for filter_request in filter_requests]
+        batch = [filter_request for filter_request, response in zip(filter_requests, responses) if not response]
+        if not batch:
+            return responses
+        first_request = batch[0]
+        logger.info('Filtering by %s requests... \nInput file: %s', len(batch), first_request.input_file_path)
+        all_columns = pd.read_csv(first_request.input_file_path, nrows=1, sep=first_request.separator,
+                                  compression=first_request.compression_type).columns.tolist()
+        columns_to_process, data_types = first_request.__get_cols_and_type_dict(all_columns)
+        cols = columns_to_process
+        if column_name_list:
+            # the columns of the filters of every request are parsed as well and removed from the filtered rows
+            cols = list(column_name_list) + sorted({column for filter_request in batch
+                                                    for column in filter_request.__get_filter_columns()}
+                                                   .difference(column_name_list))
+        for filter_request in batch:
+            filter_request.__reset_filtered_file()
+        filtered_files = [None] * len(batch)
+        start = time.time()
+        memory_engine = create_engine('sqlite://')
+        try:
+            for chunk_df in pd.read_csv(first_request.input_file_path, header=0,
+                                        compression=first_request.compression_type, encoding=first_request.encoding,
+                                        usecols=cols, sep=first_request.separator,
+                                        chunksize=first_request.rows_chunk_size, dtype=data_types,
+                                        **READ_CSV_OPTIONS):
+                chunk_df = convert_columns(chunk_df)
+                for index, filter_request in enumerate(batch):
+                    filter_request.__number_of_records = filter_request.__number_of_records + len(chunk_df.index)
+                    filtered_df = filter_request.filter_data_frame(chunk_df, memory_engine)
+                    filtered_files[index] = filter_request.__write_filtered_chunk(
+                        select_columns(filtered_df, column_name_list), filtered_files[index])
+        except Exception:
+            for filter_request, filtered_file in zip(batch, filtered_files):
+                filter_request.__close_filtered_file(filtered_file, start, True)
+            raise
+        finally:
+            memory_engine.dispose()
+        for filter_request, filtered_file in zip(batch, filtered_files):
+            filter_request.__close_filtered_file(filtered_file, start)
+        batch_responses = iter(Response(const.SUCCESS_CODE, const.SUCCESS_STR, filter_request.filtered_file_path,
+                                        filter_request.queries) for filter_request in batch)
+        return [response if response else next(batch_responses) for response in responses]
+
+    def __validate(self):
+        """
+        :return: the failure Response if the request cannot be filtered, None otherwise
+        """
         if not self.input_file_path or not isfile(self.input_file_path):
             return Response(const.FAILURE_CODE,
                             'Input file is a directory or does not exist. Cannot filter. Aborting...',
                             self.filtered_file_path, self.queries)
-        if not query_str:
+        return self.__validate_filters()
+
+    def __validate_filters(self):
+        """
+        :return: the failure Response if the filters cannot be applied, None otherwise
+        """
+        try:
+            self.__predicate = predicate = self.__build_predicate()
+        except FilterError as exp:
+            return Response(const.FAILURE_CODE, 'Invalid any_query %s: %s. Cannot filter. Aborting...' %
+                            (self.any_query, exp.msg), self.filtered_file_path, self.queries)
+        if not predicate and not self.__get_list_files():
             return Response(const.FAILURE_CODE, 'No filters have been specified. Cannot filter. Aborting...',
                             self.filtered_file_path, self.queries)
-        # create the data frame
-        filtered_data = self.__read_chunks_gzip_file(query_str, column_name_list, keep_db)
-        if not filtered_data.empty:
-            self.__save_filtered_data_frame(filtered_data)
+        for column, list_file_path in self.__get_list_files():
+            if not isfile(list_file_path):
+                return Response(const.FAILURE_CODE, 'List file %s of %s does not exist. Cannot filter. Aborting...' %
+                                (list_file_path, column), self.filtered_file_path, self.queries)
+        if self.engine not in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+            return Response(const.FAILURE_CODE, 'Unknown filter engine %s. Cannot filter. Aborting...' % self.engine,
+                            self.filtered_file_path, self.queries)
+        writer_class = get_writer_class(self.output_format)
+        if not writer_class:
+            return Response(const.FAILURE_CODE, 'Unknown output format %s. Cannot filter. Aborting...' %
+                            self.output_format, self.filtered_file_path, self.queries)
+        if not writer_class.is_available():
+            return Response(const.FAILURE_CODE, 'The library of the output format %s is not installed. Cannot filter. '
+                                                'Aborting...' % self.output_format,
+                            self.filtered_file_path, self.queries)
+        return None
+
+    def __get_list_files(self):
+        """
+        :return: list of the tuples of the column and the path of every list file of the request
+        """
+        list_files = [(FeedColumn.ITEM_ID, self.item_ids_file_path), (FeedColumn.GTIN, self.gtins_file_path),
+                      (FeedColumn.EPID, self.epids_file_path)]
+        return [(column, list_file_path) for column, list_file_path in list_files if list_file_path]
+
+    def cache(self):
+        """
+        Parses the input file and stores the parsed rows in the cache directory, unless they are stored already. The
+        filters of the same input file read the stored rows instead of parsing the input file again
+        :return: Response, the file_path is the path of the dataset of the parsed rows
+        """
+        if not self.input_file_path or not isfile(self.input_file_path):
+            return Response(const.FAILURE_CODE,
+                            'Input file is a directory or does not exist. Cannot cache. Aborting...', None,
+                            self.queries)
+        if not self.cache_directory:
+            return Response(const.FAILURE_CODE, 'No cache directory has been specified. Cannot cache. Aborting...',
+                            None, self.queries)
+        if not FeedCache.is_available():
+            return Response(const.FAILURE_CODE, 'pyarrow is not installed. Cannot cache. Aborting...', None,
+                            self.queries)
+        feed_cache = FeedCache(self.cache_directory)
+        dataset_path = feed_cache.get_dataset_path(self.input_file_path, self.compression_type, self.separator,
+                                                   self.encoding)
+        if feed_cache.exists(dataset_path):
+            logger.info('Parsed rows of %s are cached in %s', self.input_file_path, dataset_path)
         else:
-            logger.error('No filtered feed file created')
+            all_columns = pd.read_csv(self.input_file_path, nrows=1, sep=self.separator,
+                                      compression=self.compression_type).columns.tolist()
+            columns_to_process, data_types = self.__get_cols_and_type_dict(all_columns)
+            start = time.time()
+            chunks = pd.read_csv(self.input_file_path, header=0, compression=self.compression_type,
+                                 encoding=self.encoding, usecols=columns_to_process, sep=self.separator,
+                                 chunksize=self.rows_chunk_size, dtype=data_types, **READ_CSV_OPTIONS)
+            number_of_rows = feed_cache.write(dataset_path, (convert_columns(chunk_df) for chunk_df in chunks),
+                                              columns_to_process, FLOAT_COLUMNS, BOOL_COLUMNS)
+            execution_time = time.time() - start
+            logger.info('Cached %s records in %s in %s (s) %s (m)', number_of_rows, dataset_path,
+                        str(round(execution_time, 3)), str(round(execution_time / 60, 3)))
+        return Response(const.SUCCESS_CODE, const.SUCCESS_STR, dataset_path, self.queries)
+
+    def filter_stream(self, input_stream, column_name_list=None):
+        """
+        Filters the feed file that is read from the given binary stream, for example a RangeStream of a feed file that
+        is being downloaded. The rows are decompressed, parsed and filtered one chunk at a time and the filtered rows
+        are appended to the filtered file, so neither the feed file nor all the filtered rows are held at once. The
+        filtered file is named after the input file path
+        :param input_stream: readable binary stream of the feed file
+        :param column_name_list: optional list of the columns that are read from the feed file
+        :return: Response
+        """
+        logger.info('Filtering stream... \nInput file: %s', self.input_file_path)
+        error_response = self.__validate_filters()
+        if error_response:
+            return error_response
+        if self.compression_type == FileFormat.GZIP.value:
+            # multi member gzip files are decompressed as well
+            input_stream = gzip.GzipFile(fileobj=input_stream, mode='rb')
+        if self.late_materialization:
+            filtered_chunks = self.__filter_late_materialized(input_stream, column_name_list)
+        elif self.number_of_workers > 1:
+            filtered_chunks = self.__filter_blocks(input_stream, column_name_list)
+        else:
+            filtered_chunks = self.__filter_stream_chunks(input_stream, column_name_list)
+        self.__write_filtered_chunks(filtered_chunks)
         return Response(const.SUCCESS_CODE, const.SUCCESS_STR, self.filtered_file_path, self.queries)
 
+    def __build_query(self):
+        self.__build_predicate()
+        query_str = None
+        if self.__queries:
+            query_str = ' AND '.join(self.__queries)
+        return query_str
+
+    def __build_predicate(self):
+        """
+        Compiles the any_query and the filters of the request into one predicate tree, which is rendered as the SQL
+        query of the sqlite engine and evaluated as the mask of the pandas engine. The SQL of every filter is appended
+        to the queries
+        :return: the Predicate of all the filters but the list files, None if there are no such filters
+        :raise: if the any_query is not in the supported grammar a FilterError is raised
+        """
+        self.__queries = []
+        predicates = [feed_query.parse_query(self.any_query) if self.any_query else None,
+                      feed_query.get_list_predicate(FeedColumn.ITEM_ID, self.item_ids),
+                      feed_query.get_list_predicate(FeedColumn.CATEGORY_ID, self.leaf_category_ids),
+                      feed_query.get_list_predicate(FeedColumn.SELLER_USERNAME, self.seller_names),
+                      feed_query.get_list_predicate(FeedColumn.GTIN, self.gtins),
+                      feed_query.get_list_predicate(FeedColumn.EPID, self.epids),
+                      feed_query.get_comparison_predicate(FeedColumn.PRICE_VALUE, '>=', self.price_lower_limit),
+                      feed_query.get_comparison_predicate(FeedColumn.PRICE_VALUE, '<=', self.price_upper_limit),
+                      feed_query.get_list_predicate(FeedColumn.INFERRED_EPID, self.inferred_epids),
+                      feed_query.get_list_predicate(FeedColumn.ITEM_LOCATION_COUNTRIES, self.item_location_countries)]
+        predicates = [predicate for predicate in predicates if predicate]
+        for predicate in predicates:
+            # the any_query is parenthesized, so it keeps its precedence in the query of all the filters
+            self.__append_query('(%s)' % predicate.to_sql() if self.any_query and predicate is predicates[0]
+                                else predicate.to_sql())
+        if not predicates:
+            return None
+        return predicates[0] if len(predicates) == 1 else feed_query.And(predicates)
+
     def __derive_filtered_file_path(self):
         file_path, full_file_name = split(abspath(self.input_file_path))
+        if self.output_directory:
+            file_path = abspath(self.output_directory)
+            makedirs(file_path, exist_ok=True)
         file_name = full_file_name.split('.')[0]
         time_milliseconds = int(time.time() * 1000)
-        filtered_file_path = join(file_path, file_name + '-filtered-' + str(time_milliseconds) +
-                                  get_extension(self.compression_type))
-        return filtered_file_path
+        # the filtered files of the same input file that are created in the same millisecond get different names, the
+        # empty file is created exclusively, so the filters running at the same time do not get the same name
+        while True:
+            filtered_file_path = join(file_path, file_name + '-filtered-' + str(time_milliseconds) +
+                                      get_extension(self.output_format))
+            try:
+                close(os_open(filtered_file_path, O_CREAT | O_EXCL | O_WRONLY))
+                return filtered_file_path
+            except FileExistsError:
+                time_milliseconds = time_milliseconds + 1
 
     def __read_chunks_gzip_file(self, query_str, column_name_list, keep_db):
-        disk_engine = create_engine('sqlite:///'+DB_FILE_NAME)
-        chunk_num = 0
-        columns_to_process, data_types = self.__get_cols_and_type_dict()
-        cols = column_name_list if column_name_list else columns_to_process
+        """
+        Loads all the rows into the SQLite DB file, then queries it. A persistent DB file is loaded only if it has not
+        been loaded from the same input file before, otherwise every call loads a staging DB of its own
+        :return: generator of the data frames of the filtered rows, rows_chunk_size rows at a time
+        """
+        db_lock = None
+        if self.db_file_path:
+            db_file_path = self.db_file_path
+            makedirs(dirname(abspath(db_file_path)), exist_ok=True)
+            # the processes using the same DB file wait for the one that loads it
+            db_lock = FileLock(db_file_path + '.lock')
+            db_lock.acquire()
+        elif self.db_directory == DB_IN_MEMORY:
+            db_file_path = DB_IN_MEMORY
+        else:
+            db_file_path = self.__create_staging_db_file()
+        disk_engine = create_engine('sqlite:///' + db_file_path)
+        try:
+            all_columns = pd.read_csv(self.input_file_path, nrows=1, sep=self.separator,
+                                      compression=self.compression_type).columns.tolist()
+            columns_to_process, data_types = self.__get_cols_and_type_dict(all_columns)
+            cols = column_name_list if column_name_list else columns_to_process
+            select_columns = '*'
+            if self.db_file_path:
+                # all the columns are loaded, so the DB file serves the requests of other columns as well
+                cols = [column for column in all_columns if column in columns_to_process or column in cols]
+                select_columns = ', '.join('"%s"' % column for column in cols
+                                           if not column_name_list or column in column_name_list)
+                input_fingerprint = '%s|%s|%s|%s' % (get_file_fingerprint(self.input_file_path),
+                                                     self.compression_type, self.separator, self.encoding)
+                number_of_records = self.__get_loaded_records(disk_engine, input_fingerprint, cols)
+                if number_of_records is None:
+                    self.__load_db(disk_engine, cols, data_types, input_fingerprint)
+                else:
+                    self.__number_of_records = number_of_records
+                    logger.info('Reusing %s records loaded into %s', number_of_records, db_file_path)
+            else:
+                self.__load_db(disk_engine, cols, data_types)
+            with disk_engine.connect() as connection:
+                conditions = [query_str] if query_str else []
+                conditions.extend(self.__register_list_files(connection))
+                # apply query, the result is fetched rows_chunk_size rows at a time, in the order of the input file
+                sql_string = '''SELECT %s From %s WHERE %s ORDER BY rowid''' % (select_columns, DB_TABLE_NAME,
+                                                                                ' AND '.join(conditions))
+                for query_result_df in pd.read_sql_query(sql_string, connection, chunksize=self.rows_chunk_size):
+                    yield query_result_df
+        finally:
+            disk_engine.dispose()
+            if db_lock:
+                db_lock.release()
+            elif keep_db and db_file_path != DB_IN_MEMORY:
+                logger.info('Kept the db file %s', db_file_path)
+            # remove the created db file
+            elif isfile(db_file_path):
+                remove(db_file_path)
+
+    def __create_staging_db_file(self):
+        """
+        The staging DB file has a unique name, so the filters that run at the same time do not load their rows into
+        the same table, and a file left behind by a failed filter is not loaded again
+        :return: the path of the new, empty staging DB file in db_directory, or in the temp directory if it is not set
+        """
+        if self.db_directory:
+            makedirs(self.db_directory, exist_ok=True)
+        prefix, extension = splitext(DB_FILE_NAME)
+        file_descriptor, db_file_path = tempfile.mkstemp(extension, prefix + '-', self.db_directory)
+        close(file_descriptor)
+        return db_file_path
+
+    def __load_db(self, disk_engine, cols, data_types, input_fingerprint=None):
+        """
+        Loads the rows of the input file in one transaction, without the rollback journal. If input_fingerprint is
+        given, the table is replaced, the filter columns are indexed and the fingerprint of the input file is stored
+        """
         start = time.time()
+        with disk_engine.connect() as connection:
+            connection.execute('PRAGMA journal_mode=OFF')
+            connection.execute('PRAGMA synchronous=OFF')
+            with connection.begin():
+                if input_fingerprint:
+                    connection.execute('DROP TABLE IF EXISTS %s' % DB_META_TABLE_NAME)
+                    connection.execute('DROP TABLE IF EXISTS %s' % DB_TABLE_NAME)
+                for chunk_df in pd.read_csv(self.input_file_path, header=0,
+                                            compression=self.compression_type, encoding=self.encoding, usecols=cols,
+                                            sep=self.separator, chunksize=self.rows_chunk_size, dtype=data_types,
+                                            **READ_CSV_OPTIONS):
+                    self.__number_of_records = self.__number_of_records + len(chunk_df.index)
+                    convert_columns(chunk_df).to_sql(DB_TABLE_NAME, connection, if_exists='append', index=False)
+                if input_fingerprint:
+                    for column in INDEXED_COLUMNS.intersection(cols):
+                        connection.execute('CREATE INDEX %s_%s ON %s ("%s")' % (DB_TABLE_NAME, column, DB_TABLE_NAME,
+                                                                                column))
+                    # the fingerprint is stored last, a DB file that is not loaded completely is loaded again
+                    pd.DataFrame({'key': ['fingerprint', 'columns', 'records'],
+                                  'value': [input_fingerprint, json.dumps(cols), str(self.__number_of_records)]}) \
+                        .to_sql(DB_META_TABLE_NAME, connection, index=False)
+        execution_time = time.time() - start
+        logger.info('Loaded %s records in %s (s) %s (m)', self.__number_of_records, str(round(execution_time, 3)),
+                    str(round(execution_time / 60, 3)))
+
+    def __register_list_files(self, connection):
+        """
+        Registers a function per list file on the connection, which looks the values of the rows up in a hash set of
+        the values of the list file while SQLite scans the rows
+        :return: list of the conditions of the query on the values of the list files
+        """
+        conditions = []
+        for column, list_file_path in self.__get_list_files():
+            function_name = DB_LIST_FUNCTION_NAME % column
+            values = frozenset(filter_utils.read_value_list_file(list_file_path))
+            connection.connection.create_function(function_name, 1, values.__contains__, deterministic=True)
+            conditions.append('%s("%s")' % (function_name, column))
+        return conditions
+
+    @staticmethod
+    def __get_loaded_records(disk_engine, input_fingerprint, cols):
+        """
+        :return: the number of records loaded into the DB file if it has been loaded from the same input file with
+        all the given columns, None otherwise
+        """
+        try:
+            meta = dict(pd.read_sql_query('SELECT key, value From %s' % DB_META_TABLE_NAME, disk_engine).values)
+        except DatabaseError:
+            return None
+        if meta.get('fingerprint') != input_fingerprint or not set(cols).issubset(json.loads(meta['columns'])):
+            return None
+        return int(meta['records'])
+
+    def __filter_chunks_gzip_file(self, column_name_list):
+        """
+        :return: generator of the data frames of the filtered rows of every chunk
+        """
+        all_columns = pd.read_csv(self.input_file_path, nrows=1, sep=self.separator,
+                                  compression=self.compression_type).columns.tolist()
+        columns_to_process, data_types = self.__get_cols_and_type_dict(all_columns)
+        cols = column_name_list if column_name_list else columns_to_process
         for chunk_df in pd.read_csv(self.input_file_path, header=0,
                                     compression=self.compression_type, encoding=self.encoding, usecols=cols,
-                                    sep=self.separator, quotechar='"', lineterminator='\n', skip_blank_lines=True,
-                                    skipinitialspace=True, error_bad_lines=False, index_col=False,
-                                    chunksize=self.rows_chunk_size, dtype=data_types,
-                                    converters={'AvailabilityThreshold': filter_utils.convert_to_float_max_int,
-                                                'EstimatedAvailableQuantity': filter_utils.convert_to_float_max_int,
-                                                'PriceValue': filter_utils.convert_to_float_zero,
-                                                'ReturnPeriodValue': filter_utils.convert_to_float_zero,
-                                                'ImageAlteringProhibited': filter_utils.convert_to_bool_false,
-                                                'ReturnsAccepted': filter_utils.convert_to_bool_false}):
+                                    sep=self.separator, chunksize=self.rows_chunk_size, dtype=data_types,
+                                    **READ_CSV_OPTIONS):
             self.__number_of_records = self.__number_of_records + len(chunk_df.index)
-            chunk_num = chunk_num + 1
-            chunk_df.to_sql(DB_TABLE_NAME, disk_engine, if_exists='append', index=False)
-        execution_time = time.time() - start
-        logger.info('Loaded %s records in %s (s) %s (m)', self.__number_of_records, str(round(execution_time, 3)),
-                     str(round(execution_time / 60, 3)))
-        # apply query
-        sql_string = '''SELECT * From %s WHERE %s ''' % (DB_TABLE_NAME, query_str)
+            yield self.__apply_masks(convert_columns(chunk_df))
 
+    def __filter_stream_chunks(self, input_stream, column_name_list):
+        """
+        :return: generator of the data frames of the filtered rows of every chunk of the stream
+        """
+        # the header row is read first, so the columns are known before the first chunk is parsed
+        all_columns = input_stream.readline().decode(self.encoding).rstrip('\r\n').split(self.separator)
+        columns_to_process, data_types = self.__get_cols_and_type_dict(all_columns)
+        cols = column_name_list if column_name_list else columns_to_process
+        memory_engine = create_engine('sqlite://')
+        try:
+            for chunk_df in pd.read_csv(input_stream, header=None, names=all_columns,
+                                        encoding=self.encoding, usecols=cols, sep=self.separator,
+                                        chunksize=self.rows_chunk_size, dtype=data_types, **READ_CSV_OPTIONS):
+                self.__number_of_records = self.__number_of_records + len(chunk_df.index)
+                # apply query to the rows of the chunk only
+                yield self.filter_data_frame(convert_columns(chunk_df), memory_engine)
+        finally:
+            memory_engine.dispose()
+
+    def __get_cached_dataset(self, column_name_list):
+        """
+        :return: the path of the cached dataset of the input file, None if the input file is not filtered from the cache
+        """
+        if not self.cache_directory:
+            return None
+        cache_response = self.cache()
+        if cache_response.status_code != const.SUCCESS_CODE:
+            logger.warning('%s Filtering the input file instead', cache_response.message)
+            return None
+        columns = set(column_name_list if column_name_list else []).union(self.__get_filter_columns())
+        if not columns.issubset(FeedCache.get_columns(cache_response.file_path)):
+            logger.warning('Not all the columns %s are cached. Filtering the input file instead', sorted(columns))
+            return None
+        return cache_response.file_path
+
+    def __filter_cached_dataset(self, dataset_path, column_name_list):
+        """
+        Only the columns of the filters, including the columns of the any_query, are read first and the other columns
+        are read for the matching rows only. The filters are evaluated as masks with both engines
+        :return: generator of the data frames of the filtered rows of every row group of the dataset
+        """
+        cols = column_name_list if column_name_list else FeedCache.get_columns(dataset_path)
+        for number_of_rows, filtered_df in FeedCache.read(dataset_path, cols, self.__get_filter_columns(),
+                                                          self.__build_mask):
+            self.__number_of_records = self.__number_of_records + number_of_rows
+            yield filtered_df.astype({column: 'int64' for column in BOOL_COLUMNS.intersection(filtered_df.columns)})
+
+    def __filter_file_late_materialized(self, column_name_list):
+        """
+        :return: generator of the data frames of the filtered rows of every block of the input file
+        """
+        with gzip.open(self.input_file_path, 'rb') if self.compression_type == FileFormat.GZIP.value \
+                else open(self.input_file_path, 'rb') as input_file:
+            for filtered_df in self.__filter_late_materialized(input_file, column_name_list):
+                yield filtered_df
+
+    def __filter_late_materialized(self, input_stream, column_name_list):
+        """
+        Filters blocks of rows_chunk_size raw rows in two phases. Only the columns of the filters are parsed from a
+        block first, including the columns of the any_query, then only the raw rows that match them are parsed with all
+        the columns, including the ignored ones. A block ends with a complete record, so a quoted value spanning lines
+        is never split. A block whose parsed rows do not match its records one to one, such as a block with blank
+        lines, or whose filter columns cannot be parsed on their own, is parsed with all the columns at once
+        :param input_stream: readable binary stream of the uncompressed rows, starting with the header row
+        :param column_name_list: optional list of the columns of the filtered rows, all the columns by default
+        :return: generator of the data frames of the filtered rows of every block
+        """
+        all_columns = input_stream.readline().decode(self.encoding).rstrip('\r\n').split(self.separator)
+        # only the matching rows are parsed, so the ignored columns are materialized as well
+        cols = column_name_list if column_name_list else all_columns
+        filter_columns = self.__get_filter_columns()
+        # the rows are parsed with the columns of the filters in the second phase as well, which are removed afterwards
+        parse_columns = [column for column in all_columns if column in cols or column in filter_columns]
+        output_columns = [column for column in parse_columns if column in cols]
+        separator = self.separator.encode(self.encoding)
+        read_options = dict(READ_CSV_OPTIONS, header=None, names=all_columns, encoding=self.encoding,
+                            sep=self.separator, dtype='object')
+        while True:
+            lines = filter_utils.read_records(input_stream, self.rows_chunk_size, separator)
+            if not lines:
+                return
+            mask = None
+            if filter_columns:
+                try:
+                    filter_df = convert_columns(pd.read_csv(io.BytesIO(b''.join(lines)), usecols=filter_columns,
+                                                            **read_options))
+                    if len(filter_df.index) == len(lines):
+                        mask = self.__build_mask(filter_df).to_numpy(dtype=bool)
+                except pd.errors.ParserError as parser_error:
+                    logger.debug('Parsing the block with all the columns: %s', parser_error)
+            if mask is not None:
+                self.__number_of_records = self.__number_of_records + len(lines)
+                lines = [line for line, line_matches in zip(lines, mask) if line_matches]
+                if not lines:
+                    continue
+            chunk_df = convert_columns(pd.read_csv(io.BytesIO(b''.join(lines)), usecols=parse_columns,
+                                                   **read_options))
+            if mask is None:
+                self.__number_of_records = self.__number_of_records + len(chunk_df.index)
+            # the filters are applied to the matching rows again, which are few
+            filtered_df = self.__apply_masks(chunk_df)
+            yield filtered_df[output_columns] if len(output_columns) < len(parse_columns) else filtered_df
+
+    def __filter_file_blocks(self, column_name_list):
+        """
+        :return: generator of the data frames of the filtered rows of every block of the input file
+        """
+        with gzip.open(self.input_file_path, 'rb') if self.compression_type == FileFormat.GZIP.value \
+                else open(self.input_file_path, 'rb') as input_file:
+            for filtered_df in self.__filter_blocks(input_file, column_name_list):
+                yield filtered_df
+
+    def __filter_blocks(self, input_stream, column_name_list):
+        """
+        Hands blocks of rows_chunk_size raw records to number_of_workers processes, which parse them and apply the
+        filters as masks with both engines. A block ends with a complete record, so a quoted value spanning lines is
+        never split. The filters and the read options are sent to every worker once, only the blocks are sent per task
+        :param input_stream: readable binary stream of the uncompressed rows, starting with the header row
+        :return: generator of the data frames of the filtered rows of every block, in the order of the blocks
+        """
+        all_columns = input_stream.readline().decode(self.encoding).rstrip('\r\n').split(self.separator)
+        columns_to_process, data_types = self.__get_cols_and_type_dict(all_columns)
+        read_options = dict(READ_CSV_OPTIONS, header=None, names=all_columns, encoding=self.encoding,
+                            usecols=column_name_list if column_name_list else columns_to_process, sep=self.separator,
+                            dtype=data_types)
+        separator = self.separator.encode(self.encoding)
+        pending_futures = deque()
+        with ProcessPoolExecutor(max_workers=self.number_of_workers, initializer=init_filter_worker,
+                                 initargs=(self.__get_predicate(), self.__get_list_files(), read_options)) as executor:
+            try:
+                while True:
+                    block = b''.join(filter_utils.read_records(input_stream, self.rows_chunk_size, separator))
+                    if block:
+                        pending_futures.append(executor.submit(filter_block, block))
+                    # at most two blocks per worker wait to be written, which bounds the memory
+                    while pending_futures and (not block or len(pending_futures) >= 2 * self.number_of_workers):
+                        number_of_rows, filtered_df = pending_futures.popleft().result()
+                        self.__number_of_records = self.__number_of_records + number_of_rows
+                        yield filtered_df
+                    if not block:
+                        return
+            finally:
+                for future in pending_futures:
+                    future.cancel()
+
+    def __write_filtered_chunks(self, filtered_chunks):
+        """
+        Appends the filtered rows to the filtered file as they are produced, so only one chunk of them is held in
+        memory. The filtered file is created with the first filtered row
+        :param filtered_chunks: generator of the data frames of the filtered rows
+        """
+        self.__reset_filtered_file()
+        filtered_file = None
         start = time.time()
-        query_result_df = pd.read_sql_query(sql_string, disk_engine)
-        execution_time = time.time() - start
-        self.__number_of_filtered_records = len(query_result_df.index)
-        logger.info('Filtered %s records in %s (s) %s (m)', self.number_of_filtered_records,
-                     str(round(execution_time, 3)),
-                     str(round(execution_time / 60, 3)))
-        # remove the created db file
-        if not keep_db:
-            remove(DB_FILE_NAME)
-        return query_result_df
-
-    def __save_filtered_data_frame(self, data_frame):
-        self.__filtered_file_path = self.__derive_filtered_file_path()
-        start = time.time()
-        data_frame.to_csv(self.__filtered_file_path, sep=self.separator, na_rep='', header=True, index=False, mode='w',
-                          encoding=self.encoding, compression=self.compression_type, quotechar='"',
-                          line_terminator='\n', doublequote=True, escapechar='\\', decimal='.')
+        try:
+            for filtered_df in filtered_chunks:
+                filtered_file = self.__write_filtered_chunk(filtered_df, filtered_file)
+        except Exception:
+            # do not leave a partially filtered file behind
+            self.__close_filtered_file(filtered_file, start, True)
+            raise
+        finally:
+            filtered_chunks.close()
+        self.__close_filtered_file(filtered_file, start)
+
+    def __reset_filtered_file(self):
+        self.__number_of_records = 0
+        self.__number_of_filtered_records = 0
+        self.__filtered_file_path = None
+
+    def __write_filtered_chunk(self, filtered_df, filtered_file):
+        """
+        :param filtered_df: the data frame of the filtered rows of one chunk
+        :param filtered_file: the FeedWriter of the filtered file, None if no filtered row has been written yet
+        :return: the FeedWriter of the filtered file, None if no filtered row has been written yet
+        """
+        if filtered_df.empty:
+            return filtered_file
+        if not filtered_file:
+            self.__filtered_file_path = self.__derive_filtered_file_path()
+            filtered_file = self.__open_filtered_file()
+        filtered_file.write(filtered_df)
+        self.__number_of_filtered_records = self.__number_of_filtered_records + len(filtered_df.index)
+        return filtered_file
+
+    def __close_filtered_file(self, filtered_file, start, failed=False):
+        """
+        :param filtered_file: the FeedWriter of the filtered file, None if no filtered row has been written
+        :param start: the time when the filtering started
+        :param failed: True to remove the partially filtered file
+        """
+        if filtered_file:
+            filtered_file.close()
+            if failed:
+                remove(self.__filtered_file_path)
+                self.__filtered_file_path = None
+        if failed:
+            return
         execution_time = time.time() - start
-        logger.info('Saved %s records in %s (s) %s (m)', self.number_of_filtered_records,
-                    str(round(execution_time, 3)),
-                    str(round(execution_time / 60, 3)))
+        logger.info('Filtered %s of %s records in %s (s) %s (m)', self.number_of_filtered_records,
+                    self.number_of_records, str(round(execution_time, 3)), str(round(execution_time / 60, 3)))
+        if not filtered_file:
+            logger.error('No filtered feed file created')
 
-    def __get_cols_and_type_dict(self):
-        all_columns = pd.read_csv(self.input_file_path, nrows=1, sep=self.separator,
-                                  compression=self.compression_type).columns.tolist()
+    def filter_data_frame(self, data_frame, memory_engine=None):
+        """
+        Keeps the rows of one chunk of the feed file that match all the filters, with the filter engine of the request
+        :param data_frame: the data frame of the parsed rows
+        :param memory_engine: optional in-memory SQLite engine that is reused across the chunks
+        :return: the data frame of the filtered rows
+        """
+        if self.engine == FilterEngine.PANDAS.value:
+            return self.__apply_masks(data_frame)
+        # the values of the list files are looked up in hash tables rather than inlined into the query
+        list_mask = self.__build_list_file_mask(data_frame)
+        if list_mask is not None:
+            data_frame = data_frame[list_mask]
+        if not self.__get_predicate():
+            return data_frame.astype({column: 'int64' for column in BOOL_COLUMNS.intersection(data_frame.columns)})
+        sqlite_engine = memory_engine if memory_engine else create_engine('sqlite://')
+        try:
+            return self.__query_data_frame(data_frame, ' AND '.join(self.queries), sqlite_engine)
+        finally:
+            if not memory_engine:
+                sqlite_engine.dispose()
+
+    def __apply_masks(self, data_frame):
+        """
+        All the filters, including the any_query, are evaluated as vectorized boolean masks
+        """
+        mask = self.__build_mask(data_frame)
+        filtered_df = data_frame[mask] if mask is not None else data_frame
+        # the same values as the rows read back from SQLite, which stores the booleans as integers
+        return filtered_df.astype({column: 'int64' for column in BOOL_COLUMNS.intersection(filtered_df.columns)})
+
+    def __build_mask(self, data_frame):
+        """
+        :return: boolean Series of the rows that match all the filters, None if there are no filters
+        """
+        return build_mask(data_frame, self.__get_predicate(), self.__get_list_files())
+
+    def __build_list_file_mask(self, data_frame):
+        """
+        :return: boolean Series of the rows whose values are in all the list files, None if there are no list files
+        """
+        return build_list_file_mask(data_frame, self.__get_list_files())
+
+    def __get_predicate(self):
+        """
+        :return: the predicate tree of the filters, which is compiled once
+        """
+        if self.__predicate is None:
+            self.__predicate = self.__build_predicate()
+        return self.__predicate
+
+    def __get_filter_columns(self):
+        """
+        :return: the columns that __build_mask reads
+        """
+        predicate = self.__get_predicate()
+        columns = predicate.columns() if predicate else set()
+        return sorted(columns.union(str(column) for column, _ in self.__get_list_files()))
+
+    def __get_parse_columns(self, column_name_list):
+        """
+        :return: the columns of column_name_list followed by the other columns that the filters read, None if there is
+        no column_name_list
+        """
+        if not column_name_list:
+            return column_name_list
+        return list(column_name_list) + [column for column in self.__get_filter_columns()
+                                          if column not in column_name_list]
+
+    @staticmethod
+    def __select_columns(filtered_chunks, column_name_list):
+        """
+        :return: generator of the data frames of the filtered rows with the columns of column_name_list only
+        """
+        try:
+            for filtered_df in filtered_chunks:
+                yield select_columns(filtered_df, column_name_list)
+        finally:
+            filtered_chunks.close()
+
+    @staticmethod
+    def __query_data_frame(data_frame, query_str, memory_engine):
+        # the rows of one chunk only are written to the in memory database
+        data_frame.to_sql(DB_TABLE_NAME, memory_engine, if_exists='replace', index=False)
+        return pd.read_sql_query('SELECT * From %s WHERE %s ' % (DB_TABLE_NAME, query_str), memory_engine)
+
+    def __open_filtered_file(self):
+        """
+        :return: the FeedWriter of the output format, which writes the filtered rows to the filtered file
+        """
+        writer_class = get_writer_class(self.output_format)
+        return writer_class(self.__filtered_file_path, self.separator, self.encoding, self.compression_level,
+                            FLOAT_COLUMNS, BOOL_COLUMNS)
+
+    @staticmethod
+    def __get_cols_and_type_dict(all_columns):
         type_dict = {}
         cols = []
         for col_name in all_columns:
@@ -210,6 +889,81 @@ class FeedFilterRequest(object):
                 continue
             else:
                 cols.append(col_name)
-                if col_name not in BOOL_COLUMNS and col_name not in FLOAT_COLUMNS:
-                    type_dict[col_name] = 'object'
+                # the float and bool columns are read as strings as well and converted by convert_columns
+                type_dict[col_name] = 'object'
         return cols, type_dict
+
+
+def init_filter_worker(predicate, list_files, read_options):
+    """
+    Keeps the filters of a parallel filter in a worker process, it runs once when the worker process starts
+    :param predicate: the Predicate of the filters, None if there are only list files
+    :param list_files: list of the tuples of the column and the path of every list file
+    :param read_options: the keyword arguments of pandas read_csv
+    """
+    worker_filters['predicate'] = predicate
+    worker_filters['list_files'] = list_files
+    worker_filters['read_options'] = read_options
+
+
+def filter_block(block):
+    """
+    Parses a block of raw records of the feed file and keeps the rows that match the filters of the worker process.
+    It runs in the worker processes of a parallel filter
+    :param block: the raw records
+    :return: a tuple of the number of parsed rows and the data frame of the filtered rows
+    """
+    chunk_df = convert_columns(pd.read_csv(io.BytesIO(block), **worker_filters['read_options']))
+    mask = build_mask(chunk_df, worker_filters['predicate'], worker_filters['list_files'])
+    filtered_df = chunk_df[mask] if mask is not None else chunk_df
+    return len(chunk_df.index), filtered_df.astype({column: 'int64'
+                                                    for column in BOOL_COLUMNS.intersection(filtered_df.columns)})
+
+
+def build_mask(data_frame, predicate, list_files):
+    """
+    :param data_frame: the data frame of the parsed rows
+    :param predicate: the Predicate of the filters, None if there are only list files
+    :param list_files: list of the tuples of the column and the path of every list file
+    :return: boolean Series of the rows that match all the filters, None if there are no filters
+    """
+    mask = pd.Series(predicate.to_mask(data_frame), index=data_frame.index) if predicate else None
+    list_mask = build_list_file_mask(data_frame, list_files)
+    if list_mask is not None:
+        mask = list_mask if mask is None else mask & list_mask
+    return mask
+
+
+def build_list_file_mask(data_frame, list_files):
+    """
+    :param list_files: list of the tuples of the column and the path of every list file
+    :return: boolean Series of the rows whose values are in all the list files, None if there are no list files
+    """
+    mask = None
+    for column, list_file_path in list_files:
+        column_mask = filter_utils.get_index_element_mask(data_frame, column,
+                                                          filter_utils.read_value_list_file(list_file_path))
+        mask = column_mask if mask is None else mask & column_mask
+    return mask
+
+
+def select_columns(data_frame, column_name_list):
+    """
+    :param data_frame: the data frame of the filtered rows, which may have the columns of the filters as well
+    :param column_name_list: the columns of the filtered file, all the columns if None
+    :return: the data frame with the columns of column_name_list only, in the order of the data frame
+    """
+    if not column_name_list or len(data_frame.columns) == len(column_name_list):
+        return data_frame
+    return data_frame[[column for column in data_frame.columns if column in column_name_list]]
+
+
+def convert_columns(data_frame):
+    """
+    Converts the string values of the float and bool columns of the data frame, a whole column at a time
+    :param data_frame: the data frame of the parsed rows, read with the data types of the columns as strings
+    :return: the data frame with the converted columns
+    """
+    for column_name in data_frame.columns.intersection(list(CONVERTERS)):
+        data_frame[column_name] = CONVERTERS[column_name](data_frame[column_name])
+    return data_frame
@@ -0,0 +1,376 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import io
+import zlib
+import time
+import sqlite3
+import logging
+import pandas as pd
+from bisect import bisect_right
+from os import remove, replace, getpid
+from os.path import isfile
+from enums.feed_enums import FeedColumn
+from enums.file_enums import FileEncoding, FileFormat
+import constants.feed_constants as const
+from errors.custom_exceptions import InputDataError
+from feed.feed_verifier import GZIP_WBITS
+from filter.feed_filter import READ_CSV_OPTIONS, convert_columns
+from utils import filter_utils
+from utils.file_utils import get_file_fingerprint
+from utils.logging_utils import setup_logging
+
+try:
+    import indexed_gzip
+except ImportError:
+    # without indexed_gzip the starts of the gzip members are the only access points of a gzip feed file
+    indexed_gzip = None
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+INDEX_EXTENSION = '.index'
+# changes whenever the tables of the index file or the way the rows are split change, so the index files of an
+# older version are built again
+INDEX_VERSION = '2'
+# the uncompressed bytes between two access points of indexed_gzip, each of them stores a 32 KB window
+ACCESS_POINT_SPACING = 4194304
+# the number of item IDs that are inserted into or looked up in the index file at a time
+INDEX_BATCH_SIZE = 100000
+LOOKUP_BATCH_SIZE = 500
+
+
+class FeedIndex(object):
+    """
+    Random access index of a feed file, so the rows of a few item IDs are read without decompressing and parsing the
+    whole feed file. It maps every ItemId to the offset and the length of its row in the uncompressed feed file and
+    keeps the access points where the decompression of the gzip feed file can start. With indexed_gzip installed, an
+    access point, with the window of the decompressor, is stored every ACCESS_POINT_SPACING uncompressed bytes.
+    Otherwise the start of every gzip member is an access point, which needs no window. The index is stored in a
+    SQLite file next to the feed file
+    """
+    def __init__(self, feed_file_path, index_file_path=None, compression_type=FileFormat.GZIP.value, separator='\t',
+                 encoding=FileEncoding.UTF8.value):
+        self.feed_file_path = feed_file_path
+        self.index_file_path = index_file_path if index_file_path else feed_file_path + INDEX_EXTENSION
+        self.compression_type = compression_type if compression_type else FileFormat.GZIP.value
+        self.separator = separator if separator else '\t'
+        self.encoding = encoding if encoding else FileEncoding.UTF8.value
+
+    def __str__(self):
+        return '[feed_file_path= %s, index_file_path= %s, compression_type= %s, separator= %s, encoding= %s]' % \
+               (self.feed_file_path,
+                self.index_file_path,
+                self.compression_type,
+                self.separator,
+                self.encoding)
+
+    @staticmethod
+    def has_window_access_points():
+        """
+        :return: True if indexed_gzip is installed, which stores access points inside the gzip members
+        """
+        return indexed_gzip is not None
+
+    def exists(self):
+        """
+        :return: True if the index file has been built from the current content of the feed file
+        """
+        return self.__load_meta() is not None
+
+    def build(self, spacing=ACCESS_POINT_SPACING):
+        """
+        Decompresses the feed file once and writes the index file. The index file is written to a temporary file first
+        and renamed when it is complete. A quoted value may span lines
+        :param spacing: the uncompressed bytes between two access points of indexed_gzip
+        :return: the number of indexed rows
+        :raise: if the feed file has no ItemId column an InputDataError exception is raised
+        """
+        start = time.time()
+        temp_path = '%s.%s.tmp' % (self.index_file_path, getpid())
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.execute('PRAGMA journal_mode=OFF')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            connection.execute('CREATE TABLE offsets (item_id TEXT, offset INTEGER, length INTEGER)')
+            connection.execute('CREATE TABLE access_points (compressed_offset INTEGER, uncompressed_offset INTEGER)')
+            connection.execute('CREATE TABLE gzip_index (data BLOB)')
+            access_points = []
+            if self.compression_type != FileFormat.GZIP.value:
+                access = 'none'
+                with open(self.feed_file_path, 'rb') as feed_file:
+                    header, number_of_rows = self.__index_rows(connection, iter(lambda: feed_file.read(
+                        const.STREAM_BUFFER_SIZE), b''))
+            elif indexed_gzip:
+                access = 'indexed_gzip'
+                with indexed_gzip.IndexedGzipFile(self.feed_file_path, spacing=spacing) as feed_file:
+                    header, number_of_rows = self.__index_rows(connection, iter(lambda: feed_file.read(
+                        const.STREAM_BUFFER_SIZE), b''))
+                    gzip_index = io.BytesIO()
+                    feed_file.export_index(fileobj=gzip_index)
+                # the windows of the access points compress well
+                connection.execute('INSERT INTO gzip_index VALUES (?)', (zlib.compress(gzip_index.getvalue()),))
+            else:
+                access = 'members'
+                with open(self.feed_file_path, 'rb') as feed_file:
+                    header, number_of_rows = self.__index_rows(connection, decompress(feed_file, access_points))
+                if len(access_points) == 1:
+                    logger.warning('%s has one gzip member, so every lookup decompresses it from the start. Install '
+                                   'indexed_gzip, see requirements-index.txt, and build the index again',
+                                   self.feed_file_path)
+            connection.executemany('INSERT INTO access_points VALUES (?, ?)', access_points)
+            connection.execute('CREATE INDEX offsets_item_id ON offsets (item_id)')
+            connection.executemany('INSERT INTO meta VALUES (?, ?)',
+                                   [('version', INDEX_VERSION), ('fingerprint', self.__get_fingerprint()),
+                                    ('header', header), ('access', access), ('rows', str(number_of_rows))])
+            connection.commit()
+            connection.close()
+            replace(temp_path, self.index_file_path)
+        except Exception:
+            connection.close()
+            if isfile(temp_path):
+                remove(temp_path)
+            raise
+        execution_time = time.time() - start
+        logger.info('Indexed %s records of %s in %s (s) %s (m)', number_of_rows, self.feed_file_path,
+                    str(round(execution_time, 3)), str(round(execution_time / 60, 3)))
+        return number_of_rows
+
+    def lookup(self, item_ids, column_name_list=None):
+        """
+        Reads the rows of the given item IDs from the feed file, seeking to the nearest access point before every row
+        :param item_ids: list of the item IDs
+        :param column_name_list: optional list of the columns of the rows, all the columns by default
+        :return: the data frame of the rows of the item IDs that are in the feed file, in the order of the feed file
+        :raise: if the index file does not exist or has not been built from the current content of the feed file an
+        InputDataError exception is raised
+        """
+        meta = self.__load_meta()
+        if meta is None:
+            raise InputDataError('Index file %s does not exist or is out of date. Build the index first' %
+                                 self.index_file_path, self.feed_file_path)
+        item_ids = list({str(item_id) for item_id in item_ids})
+        connection = sqlite3.connect(self.index_file_path)
+        try:
+            row_ranges = []
+            for index in range(0, len(item_ids), LOOKUP_BATCH_SIZE):
+                batch = item_ids[index:index + LOOKUP_BATCH_SIZE]
+                row_ranges.extend(connection.execute('SELECT offset, length FROM offsets WHERE item_id IN (%s)' %
+                                                     ', '.join('?' * len(batch)), batch).fetchall())
+        finally:
+            connection.close()
+        rows = self.__read_rows(sorted(row_ranges), meta['access'])
+        header = meta['header'].encode(self.encoding)
+        data_frame = pd.read_csv(io.BytesIO(header + b'\n' + b''.join(rows)), header=0, encoding=self.encoding,
+                                 usecols=column_name_list, sep=self.separator, dtype='object', **READ_CSV_OPTIONS)
+        return convert_columns(data_frame)
+
+    def __get_fingerprint(self):
+        return '%s|%s|%s|%s' % (get_file_fingerprint(self.feed_file_path), self.compression_type, self.separator,
+                                self.encoding)
+
+    def __load_meta(self):
+        """
+        :return: the dictionary of the meta table of the index file, None if the index file does not exist or has not
+        been built from the current content of the feed file
+        """
+        if not isfile(self.index_file_path) or not isfile(self.feed_file_path):
+            return None
+        connection = sqlite3.connect(self.index_file_path)
+        try:
+            meta = dict(connection.execute('SELECT key, value FROM meta').fetchall())
+        except sqlite3.DatabaseError:
+            return None
+        finally:
+            connection.close()
+        if meta.get('version') != INDEX_VERSION or meta.get('fingerprint') != self.__get_fingerprint():
+            return None
+        return meta
+
+    def __index_rows(self, connection, buffers):
+        """
+        Inserts the ItemId, the offset and the length of every row of the uncompressed feed file into the offsets table
+        :param connection: the connection to the index file
+        :param buffers: iterable of the uncompressed data of the feed file, in the order of the file
+        :return: a tuple of the header row and the number of indexed rows
+        """
+        header = None
+        item_id_index = None
+        separator = self.separator.encode(self.encoding)
+        number_of_rows = 0
+        batch = []
+        for record, offset, length in self.__split_records(buffers, separator):
+            if header is None:
+                header = record.decode(self.encoding).rstrip('\r')
+                columns = header.split(self.separator)
+                if str(FeedColumn.ITEM_ID) not in columns:
+                    raise InputDataError('Feed file %s has no %s column' % (self.feed_file_path, FeedColumn.ITEM_ID),
+                                         self.feed_file_path)
+                item_id_index = columns.index(str(FeedColumn.ITEM_ID))
+            elif record.strip():
+                values = record.split(separator, item_id_index + 1)
+                if len(values) > item_id_index:
+                    batch.append((values[item_id_index].strip(b' "\r').decode(self.encoding), offset, length))
+            if len(batch) >= INDEX_BATCH_SIZE:
+                connection.executemany('INSERT INTO offsets VALUES (?, ?, ?)', batch)
+                number_of_rows = number_of_rows + len(batch)
+                batch = []
+        connection.executemany('INSERT INTO offsets VALUES (?, ?, ?)', batch)
+        return header if header is not None else '', number_of_rows + len(batch)
+
+    @staticmethod
+    def __split_records(buffers, separator):
+        """
+        Splits the uncompressed data of the feed file into records. A quoted value may span lines, so a record is one or
+        more lines, see filter_utils.read_records
+        :return: generator of the tuples of the record without its last new line, its offset and its length
+        """
+        # the partial line at the end of the previous buffer
+        pending = b''
+        # the lines of the record that goes on with the next line
+        record_lines = []
+        in_quotes = False
+        offset = 0
+        length = 0
+        for data in buffers:
+            data = pending + data
+            end = data.rfind(b'\n') + 1
+            pending = data[end:]
+            for line in data[:end].split(b'\n')[:-1]:
+                if record_lines:
+                    in_quotes = filter_utils.is_quoted_value_open(line, True, separator)
+                else:
+                    in_quotes = b'"' in line and filter_utils.is_quoted_value_open(line, False, separator)
+                record_lines.append(line)
+                length = length + len(line) + 1
+                if not in_quotes:
+                    yield b'\n'.join(record_lines), offset, length
+                    offset = offset + length
+                    length = 0
+                    record_lines = []
+        if record_lines or pending.strip():
+            # the last record does not end with a new line
+            yield b'\n'.join(record_lines + [pending]), offset, length + len(pending)
+
+    def __read_rows(self, row_ranges, access):
+        """
+        :param row_ranges: the sorted list of the uncompressed offsets and lengths of the rows
+        :param access: how the feed file is accessed, 'indexed_gzip', 'members' or 'none'
+        :return: list of the raw rows, each ending with a new line
+        """
+        if not row_ranges:
+            return []
+        if access == 'indexed_gzip':
+            if not indexed_gzip:
+                raise InputDataError('Index file %s needs indexed_gzip. Build the index again' % self.index_file_path,
+                                     self.feed_file_path)
+            with indexed_gzip.IndexedGzipFile(self.feed_file_path) as feed_file:
+                feed_file.import_index(fileobj=io.BytesIO(zlib.decompress(self.__load_gzip_index())))
+                return [self.__read_row(feed_file, offset, length) for offset, length in row_ranges]
+        if access == 'none':
+            with open(self.feed_file_path, 'rb') as feed_file:
+                return [self.__read_row(feed_file, offset, length) for offset, length in row_ranges]
+        access_points = self.__load_access_points()
+        uncompressed_offsets = [uncompressed_offset for _, uncompressed_offset in access_points]
+        rows = []
+        with open(self.feed_file_path, 'rb') as feed_file:
+            buffers = None
+            position = 0
+            data = b''
+            for offset, length in row_ranges:
+                compressed_offset, access_offset = access_points[bisect_right(uncompressed_offsets, offset) - 1]
+                if buffers is None or access_offset > position + len(data):
+                    # the row is after an access point that is not decompressed yet, the decompression starts there
+                    feed_file.seek(compressed_offset)
+                    buffers = decompress(feed_file)
+                    position = access_offset
+                    data = b''
+                while position + len(data) < offset + length:
+                    buffer = next(buffers, b'')
+                    if not buffer:
+                        raise InputDataError('Feed file %s is shorter than its index %s' %
+                                             (self.feed_file_path, self.index_file_path), self.feed_file_path)
+                    if position + len(data) <= offset:
+                        # the data decompressed so far is before the row
+                        position = position + len(data)
+                        data = buffer
+                    else:
+                        data = data + buffer
+                rows.append(self.__ensure_new_line(data[offset - position:offset - position + length]))
+                data = data[offset - position + length:]
+                position = offset + length
+        return rows
+
+    def __read_row(self, feed_file, offset, length):
+        feed_file.seek(offset)
+        return self.__ensure_new_line(feed_file.read(length))
+
+    @staticmethod
+    def __ensure_new_line(row):
+        return row if row.endswith(b'\n') else row + b'\n'
+
+    def __load_access_points(self):
+        connection = sqlite3.connect(self.index_file_path)
+        try:
+            return connection.execute('SELECT compressed_offset, uncompressed_offset FROM access_points ORDER BY '
+                                      'uncompressed_offset').fetchall()
+        finally:
+            connection.close()
+
+    def __load_gzip_index(self):
+        connection = sqlite3.connect(self.index_file_path)
+        try:
+            return connection.execute('SELECT data FROM gzip_index').fetchone()[0]
+        finally:
+            connection.close()
+
+
+def decompress(file_obj, access_points=None):
+    """
+    Decompresses a gzip file from the start of a gzip member on, including the gzip members after it
+    :param file_obj: the file object, positioned at the start of a gzip member
+    :param access_points: optional list that the compressed and the uncompressed offsets of the start of every gzip
+    member are appended to
+    :return: generator of the uncompressed data, one buffer at a time
+    """
+    compressed_offset = file_obj.tell()
+    uncompressed_offset = 0
+    decompressor = None
+    data = b''
+    while True:
+        if not data:
+            data = file_obj.read(const.STREAM_BUFFER_SIZE)
+            if not data:
+                return
+        if decompressor is None:
+            if access_points is not None:
+                access_points.append((compressed_offset, uncompressed_offset))
+            decompressor = zlib.decompressobj(GZIP_WBITS)
+        length = len(data)
+        output = decompressor.decompress(data, const.STREAM_BUFFER_SIZE)
+        data = decompressor.unconsumed_tail
+        while output:
+            uncompressed_offset = uncompressed_offset + len(output)
+            yield output
+            output = decompressor.decompress(b'', const.STREAM_BUFFER_SIZE) if not data and \
+                not decompressor.eof else b''
+        if decompressor.eof:
+            # the next member starts right after this one
+            data = decompressor.unused_data
+            decompressor = None
+        compressed_offset = compressed_offset + length - len(data)
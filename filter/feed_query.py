@@ -0,0 +1,396 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import re
+import operator
+import numpy as np
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+from errors.custom_exceptions import FilterError
+
+KEYWORDS = {'AND', 'OR', 'NOT', 'IN', 'IS', 'NULL'}
+# the comparison operators and their SQL form
+COMPARISON_OPERATORS = {'=': '=', '==': '=', '!=': '!=', '<>': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+OPERATOR_FUNCTIONS = {'=': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt,
+                      '>=': operator.ge}
+# the operator of the same comparison with the operands swapped
+SWAPPED_OPERATORS = {'=': '=', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+# SQLite sorts the numbers before the text values, so these comparisons of a number with a text value are true
+NUMBER_BEFORE_TEXT = {'!=', '<', '<='}
+
+TOKEN_PATTERN = re.compile(r"""\s*(?:(?P<number>-?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)
+                                   |(?P<string>'(?:[^']|'')*')
+                                   |(?P<quoted>"(?:[^"]|"")*")
+                                   |(?P<word>[A-Za-z_][A-Za-z0-9_]*)
+                                   |(?P<operator><=|>=|<>|!=|==|=|<|>)
+                                   |(?P<punctuation>[(),]))""", re.VERBOSE)
+NUMBER_PATTERN = re.compile(r'^\s*[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?\s*$')
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class Predicate(object):
+    """
+    Node of a predicate tree. The same tree is rendered as a SQL condition for SQLite and evaluated as a vectorized
+    mask of the rows of a data frame, with the three valued logic of SQL, so both engines keep the same rows
+    """
+    def columns(self):
+        """
+        :return: the set of the columns that the predicate reads
+        """
+        raise NotImplementedError
+
+    def to_sql(self):
+        """
+        :return: the SQL condition of the predicate
+        """
+        raise NotImplementedError
+
+    def evaluate(self, data_frame):
+        """
+        :param data_frame: the data frame of the parsed rows, with the columns of the predicate
+        :return: a tuple of the boolean arrays of the rows where the predicate is true and where it is not NULL
+        """
+        raise NotImplementedError
+
+    def to_mask(self, data_frame):
+        """
+        :param data_frame: the data frame of the parsed rows, with the columns of the predicate
+        :return: boolean array of the rows where the predicate is true, the rows that SQLite would return
+        """
+        return self.evaluate(data_frame)[0]
+
+
+class Comparison(Predicate):
+    def __init__(self, column, operator_str, value):
+        self.column = str(column)
+        self.operator = COMPARISON_OPERATORS[operator_str]
+        self.value = value
+
+    def columns(self):
+        return {self.column}
+
+    def to_sql(self):
+        return '%s %s %s' % (format_identifier(self.column), self.operator, format_literal(self.value))
+
+    def evaluate(self, data_frame):
+        column_values, known = get_column_values(data_frame, self.column)
+        value = apply_affinity(column_values, self.value)
+        if is_numeric_dtype(column_values) and isinstance(value, str):
+            # a number is compared with a text value
+            return np.full(len(known), self.operator in NUMBER_BEFORE_TEXT) & known, known
+        result = OPERATOR_FUNCTIONS[self.operator](column_values.where(known, value), value)
+        return result.to_numpy(dtype=bool) & known, known
+
+
+class InList(Predicate):
+    def __init__(self, column, values):
+        self.column = str(column)
+        self.values = values
+
+    def columns(self):
+        return {self.column}
+
+    def to_sql(self):
+        return '%s IN (%s)' % (format_identifier(self.column), ','.join(format_literal(value) for value in self.values))
+
+    def evaluate(self, data_frame):
+        column_values, known = get_column_values(data_frame, self.column)
+        values = [apply_affinity(column_values, value) for value in self.values]
+        if is_numeric_dtype(column_values):
+            # the text values are not equal to any number
+            values = [value for value in values if not isinstance(value, str)]
+        return column_values.isin(values).to_numpy(dtype=bool) & known, known
+
+
+class IsNull(Predicate):
+    def __init__(self, column):
+        self.column = str(column)
+
+    def columns(self):
+        return {self.column}
+
+    def to_sql(self):
+        return '%s IS NULL' % format_identifier(self.column)
+
+    def evaluate(self, data_frame):
+        known = get_column_values(data_frame, self.column)[1]
+        return ~known, np.ones(len(known), dtype=bool)
+
+
+class And(Predicate):
+    def __init__(self, predicates):
+        self.predicates = predicates
+
+    def columns(self):
+        return set().union(*(predicate.columns() for predicate in self.predicates))
+
+    def to_sql(self):
+        return ' AND '.join('(%s)' % predicate.to_sql() if isinstance(predicate, Or) else predicate.to_sql()
+                            for predicate in self.predicates)
+
+    def evaluate(self, data_frame):
+        results = [predicate.evaluate(data_frame) for predicate in self.predicates]
+        value = np.logical_and.reduce([result for result, _ in results])
+        # false if any of the predicates is false, even if the others are NULL
+        known = np.logical_and.reduce([known for _, known in results]) | \
+            np.logical_or.reduce([known & ~result for result, known in results])
+        return value, known
+
+
+class Or(Predicate):
+    def __init__(self, predicates):
+        self.predicates = predicates
+
+    def columns(self):
+        return set().union(*(predicate.columns() for predicate in self.predicates))
+
+    def to_sql(self):
+        return ' OR '.join(predicate.to_sql() for predicate in self.predicates)
+
+    def evaluate(self, data_frame):
+        results = [predicate.evaluate(data_frame) for predicate in self.predicates]
+        value = np.logical_or.reduce([result for result, _ in results])
+        # true if any of the predicates is true, even if the others are NULL
+        known = np.logical_and.reduce([known for _, known in results]) | value
+        return value, known
+
+
+class Not(Predicate):
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def columns(self):
+        return self.predicate.columns()
+
+    def to_sql(self):
+        return 'NOT (%s)' % self.predicate.to_sql()
+
+    def evaluate(self, data_frame):
+        result, known = self.predicate.evaluate(data_frame)
+        return known & ~result, known
+
+
+def parse_query(query_str):
+    """
+    Compiles a SQL condition into a predicate tree. The supported grammar is the comparisons of a column with a number
+    or a string, [NOT] IN lists, IS [NOT] NULL, AND, OR, NOT and parentheses
+    :param query_str: the SQL condition, such as AvailabilityThresholdType='MORE_THAN' AND AvailabilityThreshold=10
+    :return: the Predicate of the condition
+    :raise: if the condition is not in the supported grammar a FilterError is raised
+    """
+    parser = QueryParser(query_str)
+    predicate = parser.parse_or()
+    if parser.peek() is not None:
+        raise FilterError('Unexpected %s in query at position %s' % (parser.peek()[1], parser.position), query_str)
+    return predicate
+
+
+def get_list_predicate(column, value_list):
+    """
+    :return: the InList predicate of the string values of the list, None if the list is empty
+    """
+    if not value_list:
+        return None
+    return InList(column, [str(value) for value in value_list])
+
+
+def get_comparison_predicate(column, operator_str, value):
+    """
+    :return: the Comparison predicate of the column with the number, None if there is no number
+    """
+    if not value:
+        return None
+    return Comparison(column, operator_str, value if isinstance(value, (int, float)) else parse_number(str(value)))
+
+
+class QueryParser(object):
+    """
+    Recursive descent parser of the supported grammar:
+        or_expr    := and_expr (OR and_expr)*
+        and_expr   := not_expr (AND not_expr)*
+        not_expr   := NOT not_expr | '(' or_expr ')' | condition
+        condition  := operand operator operand | column [NOT] IN '(' literal (',' literal)* ')'
+                      | column IS [NOT] NULL
+    """
+    def __init__(self, query_str):
+        self.query_str = query_str
+        self.tokens = tokenize(query_str)
+        self.index = 0
+
+    @property
+    def position(self):
+        return self.tokens[self.index][2] if self.index < len(self.tokens) else len(self.query_str)
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise FilterError('Unexpected end of query', self.query_str)
+        self.index = self.index + 1
+        return token
+
+    def accept(self, kind, text=None):
+        token = self.peek()
+        if token and token[0] == kind and (text is None or token[1].upper() == text):
+            self.index = self.index + 1
+            return token
+        return None
+
+    def expect(self, kind, text):
+        if not self.accept(kind, text):
+            raise FilterError('Expected %s in query at position %s' % (text, self.position), self.query_str)
+
+    def parse_or(self):
+        predicates = [self.parse_and()]
+        while self.accept('word', 'OR'):
+            predicates.append(self.parse_and())
+        return predicates[0] if len(predicates) == 1 else Or(predicates)
+
+    def parse_and(self):
+        predicates = [self.parse_not()]
+        while self.accept('word', 'AND'):
+            predicates.append(self.parse_not())
+        return predicates[0] if len(predicates) == 1 else And(predicates)
+
+    def parse_not(self):
+        if self.accept('word', 'NOT'):
+            return Not(self.parse_not())
+        if self.accept('punctuation', '('):
+            predicate = self.parse_or()
+            self.expect('punctuation', ')')
+            return predicate
+        return self.parse_condition()
+
+    def parse_condition(self):
+        position = self.position
+        left_is_column, left = self.parse_operand()
+        if left_is_column and self.accept('word', 'IS'):
+            negated = self.accept('word', 'NOT')
+            self.expect('word', 'NULL')
+            return Not(IsNull(left)) if negated else IsNull(left)
+        if left_is_column and (self.peek() and self.peek()[1].upper() in ('NOT', 'IN')):
+            negated = self.accept('word', 'NOT')
+            self.expect('word', 'IN')
+            self.expect('punctuation', '(')
+            values = [self.parse_literal()]
+            while self.accept('punctuation', ','):
+                values.append(self.parse_literal())
+            self.expect('punctuation', ')')
+            return Not(InList(left, values)) if negated else InList(left, values)
+        operator_token = self.accept('operator')
+        if not operator_token:
+            raise FilterError('Expected a comparison operator in query at position %s' % self.position,
+                              self.query_str)
+        right_is_column, right = self.parse_operand()
+        if left_is_column == right_is_column:
+            raise FilterError('A condition compares a column with a value, at position %s' % position,
+                              self.query_str)
+        if left_is_column:
+            return Comparison(left, operator_token[1], right)
+        return Comparison(right, SWAPPED_OPERATORS[COMPARISON_OPERATORS[operator_token[1]]], left)
+
+    def parse_operand(self):
+        """
+        :return: a tuple of True and the column name, or False and the value of the literal
+        """
+        kind, text, _ = self.next()
+        if kind == 'word' and text.upper() not in KEYWORDS:
+            return True, text
+        if kind == 'quoted':
+            return True, text[1:-1].replace('""', '"')
+        self.index = self.index - 1
+        return False, self.parse_literal()
+
+    def parse_literal(self):
+        kind, text, position = self.next()
+        if kind == 'number':
+            return parse_number(text)
+        if kind == 'string':
+            return text[1:-1].replace("''", "'")
+        raise FilterError('Expected a number or a string in query at position %s' % position, self.query_str)
+
+
+def tokenize(query_str):
+    """
+    :return: list of the tuples of the kind, the text and the position of every token of the query
+    :raise: if the query has a character that no token starts with a FilterError is raised
+    """
+    tokens = []
+    position = 0
+    query_str = query_str.rstrip()
+    while position < len(query_str):
+        match = TOKEN_PATTERN.match(query_str, position)
+        if not match:
+            position = len(query_str) - len(query_str[position:].lstrip())
+            raise FilterError('Unexpected character %s in query at position %s' % (query_str[position], position),
+                              query_str)
+        tokens.append((match.lastgroup, match.group(match.lastgroup), match.start(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+def parse_number(text):
+    """
+    :return: the int or the float of the text, None if the text is not a number
+    """
+    if not NUMBER_PATTERN.match(text):
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def format_identifier(column):
+    if IDENTIFIER_PATTERN.match(column) and column.upper() not in KEYWORDS:
+        return column
+    return '"%s"' % column.replace('"', '""')
+
+
+def format_literal(value):
+    if isinstance(value, str):
+        return "'%s'" % value.replace("'", "''")
+    return str(value)
+
+
+def get_column_values(data_frame, column):
+    """
+    :return: a tuple of the Series of the values of the column, with the booleans as integers like in SQLite, and the
+    boolean array of the values that are not NULL
+    :raise: if the data frame does not have the column a FilterError is raised
+    """
+    if column not in data_frame.columns:
+        raise FilterError('No such column: %s' % column, column)
+    column_values = data_frame[column]
+    if is_bool_dtype(column_values):
+        column_values = column_values.astype('int64')
+    return column_values, column_values.notna().to_numpy(dtype=bool)
+
+
+def apply_affinity(column_values, value):
+    """
+    Converts the literal to the type of the column, the way SQLite applies the affinity of a column to a literal that
+    it is compared with
+    :return: the number of a numeric text value for a numeric column, the text of a number for a text column
+    """
+    if is_numeric_dtype(column_values):
+        if isinstance(value, str):
+            number = parse_number(value)
+            return number if number is not None else value
+        return value
+    return value if isinstance(value, str) else str(value)
@@ -0,0 +1,167 @@
+# **************************************************************************
+# Copyright 2018-2019 eBay Inc.
+# Author/Developers: --
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#   https://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# **************************************************************************/
+
+import gzip
+from enums.file_enums import FileEncoding, FileFormat
+
+try:
+    import zstandard
+except ImportError:
+    # the zstd filtered files are optional
+    zstandard = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # the Parquet filtered files are optional
+    pa = None
+    pq = None
+
+# the level of the gzip module, which the filtered files have always been compressed with
+GZIP_COMPRESSION_LEVEL = 9
+ZSTD_COMPRESSION_LEVEL = 3
+PARQUET_COMPRESSION = 'zstd'
+
+
+class FeedWriter(object):
+    """
+    Writes the filtered rows to the filtered file one data frame at a time. The file is complete when the writer is
+    closed
+    """
+    def __init__(self, file_path, separator='\t', encoding=FileEncoding.UTF8.value, compression_level=None,
+                 float_columns=(), bool_columns=()):
+        """
+        :param file_path: the path of the filtered file
+        :param separator: the separator of the values of the separated values formats
+        :param encoding: the encoding of the separated values formats
+        :param compression_level: the compression level, the default level of the format if None
+        :param float_columns: the columns that are stored as float64 by the columnar formats
+        :param bool_columns: the columns that are stored as booleans by the columnar formats
+        """
+        self.file_path = file_path
+        self.separator = separator
+        self.encoding = encoding
+        self.compression_level = compression_level
+        self.float_columns = float_columns
+        self.bool_columns = bool_columns
+
+    @staticmethod
+    def is_available():
+        """
+        :return: True if the libraries that the writer needs are installed
+        """
+        return True
+
+    def write(self, data_frame):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+class TsvWriter(FeedWriter):
+    """
+    Writes the rows as uncompressed separated values, with a header row
+    """
+    def __init__(self, file_path, *args, **kwargs):
+        super(TsvWriter, self).__init__(file_path, *args, **kwargs)
+        self.__file = self.open_file()
+        self.__header = True
+
+    def open_file(self):
+        return open(self.file_path, 'w', encoding=self.encoding, newline='')
+
+    def write(self, data_frame):
+        data_frame.to_csv(self.__file, sep=self.separator, na_rep='', header=self.__header, index=False, quotechar='"',
+                          lineterminator='\n', doublequote=True, escapechar='\\', decimal='.')
+        self.__header = False
+
+    def close(self):
+        self.__file.close()
+
+
+class GzipWriter(TsvWriter):
+    """
+    Writes the separated values compressed by gzip. The lower levels compress faster and the files are larger
+    """
+    def open_file(self):
+        compression_level = GZIP_COMPRESSION_LEVEL if self.compression_level is None else self.compression_level
+        return gzip.open(self.file_path, 'wt', compresslevel=compression_level, encoding=self.encoding, newline='')
+
+
+class ZstdWriter(TsvWriter):
+    """
+    Writes the separated values compressed by zstd, which compresses several times faster than gzip
+    """
+    @staticmethod
+    def is_available():
+        return zstandard is not None
+
+    def open_file(self):
+        compression_level = ZSTD_COMPRESSION_LEVEL if self.compression_level is None else self.compression_level
+        return zstandard.open(self.file_path, 'wt', cctx=zstandard.ZstdCompressor(level=compression_level),
+                              encoding=self.encoding, newline='')
+
+
+class ParquetWriter(FeedWriter):
+    """
+    Writes the rows as a typed Parquet file, one row group per data frame, so the readers do not parse the values
+    again. The float_columns are stored as float64, the bool_columns as booleans and the other columns as strings
+    """
+    def __init__(self, file_path, *args, **kwargs):
+        super(ParquetWriter, self).__init__(file_path, *args, **kwargs)
+        self.__writer = None
+        self.__schema = None
+
+    @staticmethod
+    def is_available():
+        return pq is not None
+
+    def write(self, data_frame):
+        if self.__writer is None:
+            # the types are fixed by the columns, a chunk of empty values does not change them
+            self.__schema = pa.schema([(column, pa.float64() if column in self.float_columns else
+                                        pa.bool_() if column in self.bool_columns else pa.string())
+                                       for column in data_frame.columns])
+            self.__writer = pq.ParquetWriter(self.file_path, self.__schema, compression=PARQUET_COMPRESSION,
+                                             compression_level=self.compression_level)
+        bool_columns = [column for column in data_frame.columns if column in self.bool_columns]
+        if bool_columns:
+            # the booleans are integers after they are read back from SQLite
+            data_frame = data_frame.astype({column: bool for column in bool_columns})
+        self.__writer.write_table(pa.Table.from_pandas(data_frame, schema=self.__schema, preserve_index=False),
+                                  row_group_size=max(len(data_frame.index), 1))
+
+    def close(self):
+        if self.__writer:
+            self.__writer.close()
+
+
+# the writers of the formats of the filtered files
+WRITERS = {FileFormat.GZIP.value: GzipWriter,
+           FileFormat.ZSTD.value: ZstdWriter,
+           FileFormat.TSV.value: TsvWriter,
+           FileFormat.PARQUET.value: ParquetWriter}
+
+
+def get_writer_class(file_format):
+    """
+    :param file_format: the format of the filtered file, such as gzip
+    :return: the FeedWriter class of the format, None if the format is unknown
+    """
+    return WRITERS.get(file_format.lower()) if file_format else None
@@ -0,0 +1,84 @@
+"""
+Measures the throughput of Feed.get() against the local mock of the Feed API, so the changes of the download loop can
+be compared without credentials. Run it from the root directory of the SDK, for example:
+
+    python -m tests.benchmark_feed_download -records 200000 -workers 1 4 8 -chunksizes 1048576 4194304 -latency 0.05
+
+Every combination of the number of workers and the chunk size is downloaded -runs times, the median run is reported
+"""
+import argparse
+import statistics
+import tempfile
+from os import remove
+from os.path import isfile
+from enums.feed_enums import FeedType, FeedScope
+from feed.feed_manifest import MANIFEST_EXTENSION
+from feed.feed_request import Feed
+from feed.feed_session import FeedSession
+from constants.feed_constants import SUCCESS_CODE
+from tests.mock_feed_api import MockFeedApi, create_feed_data, FAULT_ERROR, FAULT_TRUNCATE, FAULT_RESET
+
+parser = argparse.ArgumentParser(prog='benchmark_feed_download', description='Feed download benchmark')
+parser.add_argument('-records', type=int, help='number of records of the synthetic feed file. Default is 100000',
+                    default=100000)
+parser.add_argument('-workers', type=int, nargs='+', help='numbers of workers to measure. Default is 1 4',
+                    default=[1, 4])
+parser.add_argument('-chunksizes', type=int, nargs='+', help='max chunk sizes to measure, in bytes. Default is 1048576',
+                    default=[1048576])
+parser.add_argument('--adaptivechunks', help='adapt the chunk size to the measured throughput', action="store_true")
+parser.add_argument('--verify', help='verify the gzip data while it is downloaded', action="store_true")
+parser.add_argument('-runs', type=int, help='number of downloads of every combination. Default is 3', default=3)
+# the behavior of the mock server
+parser.add_argument('-latency', type=float, help='latency of every request, in seconds. Default is 0', default=0)
+parser.add_argument('-bandwidth', type=int, help='max bytes per second of every connection. Not limited by default')
+parser.add_argument('-fault', choices=[FAULT_ERROR, FAULT_TRUNCATE, FAULT_RESET],
+                    help='fault injected into the requests of every run')
+parser.add_argument('-faultskip', type=int, help='number of requests of every run before the fault. Default is 1',
+                    default=1)
+parser.add_argument('-retries', type=int, help='number of retries of a failed request. Default is 3', default=3)
+
+TABLE_FORMAT = '%-8s %-12s %-10s %-10s %-10s %-10s %-8s %s'
+
+
+def run_download(mock_api, download_location, number_of_workers, chunk_size, args):
+    """
+    :return: the GetFeedResponse of a fresh download of the feed file
+    """
+    mock_api.clear_faults()
+    if args.fault:
+        mock_api.add_fault(args.fault, skip=args.faultskip)
+    with FeedSession(number_of_workers, args.retries, 0) as session:
+        feed_obj = Feed(FeedType.ITEM.value, FeedScope.BOOTSTRAP.value, '1', 'EBAY_US', 'v^1 ...',
+                        download_location=download_location, number_of_workers=number_of_workers, resume=False,
+                        session=session, use_cache=False, adaptive_chunk_size=args.adaptivechunks, verify=args.verify,
+                        base_url=mock_api.base_url, chunk_size=chunk_size)
+        get_response = feed_obj.get()
+    for file_path in (get_response.file_path, get_response.file_path + MANIFEST_EXTENSION):
+        if file_path and isfile(file_path):
+            remove(file_path)
+    return get_response
+
+
+def main():
+    args = parser.parse_args()
+    feed_data = create_feed_data(args.records, 4)
+    print('Feed file: %s records, %s bytes | latency: %ss | bandwidth: %s | fault: %s' %
+          (args.records, len(feed_data), args.latency, args.bandwidth, args.fault))
+    print(TABLE_FORMAT % ('workers', 'chunk_size', 'status', 'seconds', 'MB/s', 'requests', 'retries', 'failed'))
+    with MockFeedApi(feed_data, args.latency, args.bandwidth) as mock_api, \
+            tempfile.TemporaryDirectory() as download_location:
+        for number_of_workers in args.workers:
+            for chunk_size in args.chunksizes:
+                get_responses = [run_download(mock_api, download_location, number_of_workers, chunk_size, args)
+                                 for _ in range(args.runs)]
+                durations = [get_response.metrics.duration for get_response in get_responses]
+                metrics = get_responses[durations.index(statistics.median_low(durations))].metrics
+                status = 'ok' if all(get_response.status_code == SUCCESS_CODE for get_response in get_responses) \
+                    else 'failed'
+                print(TABLE_FORMAT % (number_of_workers, chunk_size, status, '%.3f' % metrics.duration,
+                                      '%.2f' % (metrics.throughput / 1048576), metrics.number_of_requests,
+                                      metrics.retries, metrics.number_of_failed_requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from enums.feed_enums import FeedType
+
+FEED_COLUMNS = ['ItemId', 'Title', 'ImageUrl', 'CategoryId', 'Category', 'SellerUsername', 'GTIN', 'Brand', 'MPN',
+                'EPID', 'ConditionId', 'PriceValue', 'PriceCurrency', 'ItemLocationCountry', 'InferredEPID',
+                'AvailabilityThreshold']
+
+# the faults that can be injected into the next requests
+FAULT_ERROR = 'error'  # an error status with an error payload
+FAULT_TRUNCATE = 'truncate'  # half of the body and the connection is closed
+FAULT_RESET = 'reset'  # the connection is closed before the status line is sent
+
+WRITE_BLOCK_SIZE = 65536
+
+
+def create_feed_data(number_of_records, number_of_members=1, seed=0):
+    """
+    Generates a tab separated feed file with the columns of the item feed, compressed by gzip
+    :param number_of_records: the number of records in the feed file
+    :param number_of_members: the number of gzip members the data is split into, like a concatenated feed file
+    :param seed: the seed of the random values, the same seed generates the same feed file
+    :return: the compressed data
+    """
+    rand = random.Random(seed)
+    lines = ['\t'.join(FEED_COLUMNS)]
+    for index in range(number_of_records):
+        lines.append('\t'.join([str(100000000000 + index),
+                                'Item title %s' % index,
+                                'https://i.ebayimg.com/images/g/%s/s-l1600.jpg' % rand.getrandbits(48),
+                                str(rand.choice([220, 260, 625, 1281])),
+                                'Category',
+                                'seller%s' % rand.randint(0, 499),
+                                str(rand.randint(10 ** 11, 10 ** 12)) if rand.random() < 0.3 else '',
+                                rand.choice(['Brand', 'Other brand', '']),
+                                '',
+                                str(rand.randint(10 ** 8, 10 ** 9)) if rand.random() < 0.2 else '',
+                                str(rand.choice([1000, 3000])),
+                                '%.2f' % rand.uniform(1, 500),
+                                'USD',
+                                rand.choice(['US', 'GB', 'IT', 'DE', 'CN']),
+                                '',
+                                str(rand.choice([5, 10, '']))]))
+    lines = [line + '\n' for line in lines]
+    members_data = []
+    member_size = -(-len(lines) // number_of_members)
+    for start in range(0, len(lines), member_size):
+        members_data.append(gzip.compress(''.join(lines[start:start + member_size]).encode('utf-8'), mtime=0))
+    return b''.join(members_data)
+
+
+class MockFeedApi(object):
+    """
+    Local stand-in for the Feed API. It serves one feed file by range requests, like the Feed API does, with
+    configurable latency, bandwidth and injected faults
+    """
+    def __init__(self, feed_data, latency=0, bandwidth=None, etag='"1"', last_modified=None, supports_ranges=True):
+        """
+        :param feed_data: the content of the feed file
+        :param latency: the time before the response of every request is sent, in seconds
+        :param bandwidth: the max bytes per second of every response, not limited if None
+        :param etag: the ETag header value of the feed file
+        :param last_modified: the Last-Modified header value of the feed file
+        :param supports_ranges: False to return the whole feed file with status 200 for every request
+        """
+        self.feed_data = feed_data
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.etag = etag
+        self.last_modified = last_modified
+        self.supports_ranges = supports_ranges
+        # the (path, query parameters, Range header) of every request
+        self.requests = []
+        self.__faults = []
+        self.__lock = threading.Lock()
+        self.__server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @property
+    def base_url(self):
+        """
+        :return: the URL to pass to Feed(base_url=...)
+        """
+        return 'http://%s:%s/' % self.__server.server_address[:2]
+
+    def start(self):
+        mock_api = self
+
+        class Handler(MockFeedApiHandler):
+            api = mock_api
+
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.__server.daemon_threads = True
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.__server:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def set_feed_data(self, feed_data, etag):
+        """
+        Replaces the feed file, like a regenerated feed file
+        """
+        with self.__lock:
+            self.feed_data = feed_data
+            self.etag = etag
+
+    def add_fault(self, fault, count=1, skip=0, status_code=500):
+        """
+        Injects a fault into the next requests
+        :param fault: FAULT_ERROR, FAULT_TRUNCATE or FAULT_RESET
+        :param count: the number of requests that fail
+        :param skip: the number of requests that succeed before the first failed one
+        :param status_code: the status code of FAULT_ERROR
+        """
+        with self.__lock:
+            self.__faults.extend([None] * skip + [(fault, status_code)] * count)
+
+    def clear_faults(self):
+        """
+        Removes the faults that have not been injected yet
+        """
+        with self.__lock:
+            self.__faults = []
+
+    def record_request(self, request_path, parameters, range_header):
+        """
+        :return: the fault of the request, None if the request succeeds
+        """
+        with self.__lock:
+            self.requests.append((request_path, parameters, range_header))
+            return self.__faults.pop(0) if self.__faults else None
+
+
+class MockFeedApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    api = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parameters = {key: values[0] for key, values in parse_qs(url.query).items()}
+        range_header = self.headers.get('Range')
+        fault = self.api.record_request(url.path, parameters, range_header)
+        if self.api.latency:
+            time.sleep(self.api.latency)
+        if fault and fault[0] == FAULT_RESET:
+            self.close_connection = True
+            return
+        if fault and fault[0] == FAULT_ERROR:
+            return self.__send_error(fault[1], 'Internal error. Please wait a few minutes and try the call again.')
+        if not self.headers.get('Authorization') or not self.headers.get('X-EBAY-C-MARKETPLACE-ID'):
+            return self.__send_error(401, 'Invalid access token')
+        if url.path.rstrip('/').split('/')[-1] not in (str(FeedType.ITEM), str(FeedType.SNAPSHOT)) or \
+                not parameters.get('category_id'):
+            return self.__send_error(400, 'The category_id is missing or invalid')
+        feed_data, etag = self.api.feed_data, self.api.etag
+        total_size = len(feed_data)
+        match = re.match(r'bytes=(\d+)-(\d+)$', range_header) if range_header else None
+        if not self.api.supports_ranges or not match:
+            return self.__send_body(200, feed_data, etag, None, fault)
+        lower_bound, upper_bound = int(match.group(1)), min(int(match.group(2)), total_size - 1)
+        if lower_bound >= total_size:
+            return self.__send_error(416, 'The range is not satisfiable')
+        self.__send_body(206, feed_data[lower_bound:upper_bound + 1], etag,
+                         'bytes %s-%s/%s' % (lower_bound, upper_bound, total_size), fault)
+
+    def __send_body(self, status_code, body, etag, content_range, fault):
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+        if content_range:
+            self.send_header('Content-Range', content_range)
+        if etag:
+            self.send_header('ETag', etag)
+        if self.api.last_modified:
+            self.send_header('Last-Modified', self.api.last_modified)
+        self.end_headers()
+        if fault and fault[0] == FAULT_TRUNCATE:
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        start_time = time.time()
+        for offset in range(0, len(body), WRITE_BLOCK_SIZE):
+            self.wfile.write(body[offset:offset + WRITE_BLOCK_SIZE])
+            if self.api.bandwidth:
+                # sleep until the data sent so far fits in the bandwidth
+                delay = (offset + WRITE_BLOCK_SIZE) / float(self.api.bandwidth) - (time.time() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+
+    def __send_error(self, status_code, message):
+        body = json.dumps({'errors': [{'errorId': 13000 + status_code,
+                                       'domain': 'API_FEED',
+                                       'category': 'REQUEST' if status_code < 500 else 'APPLICATION',
+                                       'message': message}]}).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
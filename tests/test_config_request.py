@@ -1,8 +1,18 @@
 import unittest
+import gzip
+import json
+from glob import glob
+from os import remove
+from os.path import isfile, dirname, abspath
+from shutil import rmtree
+from unittest import mock
 from enums.file_enums import FileFormat
 from enums.feed_enums import FeedScope
 from config.config_request import ConfigFileRequest
+from feed.feed_store import FeedStore
+from filter.feed_filter import FeedFilterRequest
 from feed.feed_request import DEFAULT_DOWNLOAD_LOCATION
+from tests.mock_feed_api import MockFeedApi, create_feed_data
 
 
 class TestConfigRequest(unittest.TestCase):
@@ -30,6 +40,9 @@ class TestConfigRequest(unittest.TestCase):
         self.assertEqual(feed_req.feed_date, '20190127')
         self.assertEqual(feed_req.feed_scope, FeedScope.DAILY.value)
         self.assertEqual(feed_req.download_location, DEFAULT_DOWNLOAD_LOCATION)
+        # feed requests share the session of the config file request
+        self.assertIs(feed_req.session, cr.session)
+        self.assertIs(cr.requests[0].feed_obj.session, cr.session)
 
         # third request has a filter request only
         self.assertIsNone(cr.requests[2].feed_obj)
@@ -43,5 +56,73 @@ class TestConfigRequest(unittest.TestCase):
         self.assertEqual(filter_req.compression_type, FileFormat.GZIP.value)
 
 
+    def test_process_filter_requests(self):
+        test_file_path = '../tests/test-data/test_config_feed.gz'
+        test_bad_file_path = '../tests/test-data/test_config_bad_feed.gz'
+        test_config_path = '../tests/test-data/test_config_filters'
+        filtered_files_pattern = '../tests/test-data/test_config_*-filtered-*'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(b'ItemId\tSellerUsername\n1\tseller1\n2\tseller2\n'))
+        with open(test_bad_file_path, 'wb') as feed_file:
+            feed_file.write(b'ItemId\tSellerUsername\n1\tseller1\n')
+        with open(test_config_path, 'w') as config_file:
+            json.dump({'requests': [{'filterRequest': {'inputFilePath': test_file_path, 'itemIds': ['1']}},
+                                    {'filterRequest': {'inputFilePath': test_file_path, 'sellerNames': ['seller2'],
+                                                       'engine': 'pandas'}},
+                                    {'filterRequest': {'inputFilePath': test_file_path, 'itemIds': ['2'],
+                                                       'engine': 'pandas', 'numberOfWorkers': 2}},
+                                    {'filterRequest': {'inputFilePath': test_bad_file_path, 'itemIds': ['1']}},
+                                    {'filterRequest': {'inputFilePath': test_bad_file_path,
+                                                       'sellerNames': ['seller1']}}]}, config_file)
+        try:
+            cr = ConfigFileRequest(test_config_path)
+            cr.parse_requests()
+            with mock.patch.object(FeedFilterRequest, 'filter_batch',
+                                   side_effect=FeedFilterRequest.filter_batch) as filter_batch:
+                self.assertTrue(cr.process_requests())
+            # the requests of each feed file are applied in one pass, the request with many workers is applied alone
+            self.assertEqual([len(batch_call.args[0]) for batch_call in filter_batch.call_args_list], [2, 2])
+            self.assertEqual([filter_req.filter_request_obj.number_of_filtered_records for filter_req in cr.requests],
+                             [1, 1, 1, 0, 0])
+            # the pass over the file that is not gzipped fails without stopping the other requests
+            self.assertEqual(len(glob(filtered_files_pattern)), 3)
+        finally:
+            for file_path in [test_file_path, test_bad_file_path, test_config_path] + glob(filtered_files_pattern):
+                remove(file_path)
+    def test_process_stored_feed_requests(self):
+        test_config_path = '../tests/test-data/test_config_store'
+        test_download_location = '../tests/test-data/test_config_download'
+        feed_data = create_feed_data(1000)
+        mock_api = MockFeedApi(feed_data)
+        mock_api.start()
+        # the store holds one feed file, the second download would evict the first one before it is filtered
+        feed_store = FeedStore(test_download_location + '/store', len(feed_data))
+        with open(test_config_path, 'w') as config_file:
+            json.dump({'requests': [{'feedRequest': {'type': 'item', 'feedScope': 'ALL_ACTIVE', 'categoryId': category_id,
+                                                     'marketplaceId': 'EBAY_US',
+                                                     'downloadLocation': test_download_location},
+                                     'filterRequest': {'leafCategoryIds': ['260']}}
+                                    for category_id in ['1', '220']]}, config_file)
+        try:
+            cr = ConfigFileRequest(test_config_path, store=feed_store)
+            cr.parse_requests('v^1 ...')
+            for config_request in cr.requests:
+                config_request.feed_obj.base_url = mock_api.base_url
+            self.assertTrue(cr.process_requests())
+            for config_request in cr.requests:
+                filter_req = config_request.filter_request_obj
+                self.assertGreater(filter_req.number_of_filtered_records, 0)
+                # the filtered file is written to the download location, not into the store
+                self.assertTrue(isfile(filter_req.filtered_file_path))
+                self.assertEqual(dirname(filter_req.filtered_file_path), abspath(test_download_location))
+            # the store fits in its max size again once the filters are done
+            self.assertEqual(len(feed_store.entries), 1)
+        finally:
+            cr.session.close()
+            mock_api.stop()
+            remove(test_config_path)
+            rmtree(test_download_location, ignore_errors=True)
+
+
 if __name__ == '__main__':
     unittest.main()
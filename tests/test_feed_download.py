@@ -0,0 +1,166 @@
+import unittest
+from os.path import isfile, dirname, basename, join
+from shutil import rmtree
+from concurrent.futures import ThreadPoolExecutor
+from enums.feed_enums import FeedType, FeedScope
+from feed.feed_request import Feed, get_feeds
+from feed.feed_session import FeedSession
+from feed.feed_store import FeedStore
+from constants.feed_constants import SUCCESS_CODE, FAILURE_CODE
+from tests.mock_feed_api import MockFeedApi, create_feed_data, FAULT_ERROR, FAULT_TRUNCATE, FAULT_RESET
+
+
+class TestFeedDownload(unittest.TestCase):
+    """
+    Downloads feed files from a local mock of the Feed API
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.test_download_location = '../tests/test-data/test_download'
+        cls.test_store_location = '../tests/test-data/test_download/store'
+        cls.test_feed_data = create_feed_data(5000, 2)
+        cls.test_chunk_size = 20000
+
+    def setUp(self):
+        self.mock_api = MockFeedApi(self.test_feed_data)
+        self.mock_api.start()
+        self.session = FeedSession(4, 0, 0, 5)
+
+    def tearDown(self):
+        self.session.close()
+        self.mock_api.stop()
+        rmtree(self.test_download_location, ignore_errors=True)
+
+    def create_feed(self, category_id='1', **kwargs):
+        return Feed(FeedType.ITEM.value, FeedScope.BOOTSTRAP.value, category_id, 'EBAY_US', 'v^1 ...',
+                    download_location=self.test_download_location, session=self.session,
+                    base_url=self.mock_api.base_url, chunk_size=self.test_chunk_size, **kwargs)
+
+    def assert_feed_file(self, get_response):
+        self.assertEqual(get_response.status_code, SUCCESS_CODE, get_response.message)
+        with open(get_response.file_path, 'rb') as feed_file:
+            self.assertEqual(feed_file.read(), self.test_feed_data)
+
+    def test_download_single_worker(self):
+        get_response = self.create_feed().get()
+        self.assert_feed_file(get_response)
+        number_of_ranges = -(-len(self.test_feed_data) // (self.test_chunk_size + 1))
+        self.assertEqual(len(self.mock_api.requests), number_of_ranges)
+        self.assertEqual(self.mock_api.requests[0][1], {'category_id': '1', 'feed_scope': 'ALL_ACTIVE'})
+        self.assertEqual(get_response.metrics.number_of_bytes, len(self.test_feed_data))
+
+    def test_download_multiple_workers(self):
+        get_response = self.create_feed(number_of_workers=4, verify=True).get()
+        self.assert_feed_file(get_response)
+
+    def test_download_whole_file(self):
+        self.mock_api.supports_ranges = False
+        get_response = self.create_feed(number_of_workers=4).get()
+        self.assert_feed_file(get_response)
+        self.assertEqual(len(self.mock_api.requests), 1)
+
+    def test_download_error_payload(self):
+        self.mock_api.add_fault(FAULT_ERROR, status_code=400)
+        get_response = self.create_feed().get()
+        self.assertEqual(get_response.status_code, FAILURE_CODE)
+        self.assertEqual(get_response.message[0]['errorId'], 13400)
+
+    def test_download_range_error(self):
+        self.mock_api.add_fault(FAULT_ERROR, skip=3)
+        get_response = self.create_feed(number_of_workers=2).get()
+        self.assertEqual(get_response.status_code, FAILURE_CODE)
+        self.assertEqual(get_response.metrics.number_of_failed_requests, 1)
+
+    def test_download_truncated_range(self):
+        self.mock_api.add_fault(FAULT_TRUNCATE, skip=2)
+        get_response = self.create_feed().get()
+        self.assertEqual(get_response.status_code, FAILURE_CODE)
+        # the range is requested again with a smaller chunk size
+        self.mock_api.add_fault(FAULT_TRUNCATE, skip=2)
+        get_response = self.create_feed(adaptive_chunk_size=True, resume=False).get()
+        self.assert_feed_file(get_response)
+
+    def test_download_reset_connection(self):
+        self.session = FeedSession(4, 2, 0, 5)
+        self.mock_api.add_fault(FAULT_RESET, skip=2)
+        get_response = self.create_feed(number_of_workers=2).get()
+        self.assert_feed_file(get_response)
+        self.assertEqual(get_response.metrics.retries, 1)
+
+    def test_resume_download(self):
+        self.mock_api.add_fault(FAULT_ERROR, skip=3)
+        get_response = self.create_feed().get()
+        self.assertEqual(get_response.status_code, FAILURE_CODE)
+        number_of_requests = len(self.mock_api.requests)
+        get_response = self.create_feed().get()
+        self.assert_feed_file(get_response)
+        # only the ranges from the failed one are requested, a range header has chunk_size + 1 bytes
+        self.assertEqual(self.mock_api.requests[number_of_requests][2], 'bytes=%s-%s' %
+                         (3 * (self.test_chunk_size + 1), 4 * (self.test_chunk_size + 1) - 1))
+
+    def test_reuse_downloaded_file(self):
+        self.assert_feed_file(self.create_feed().get())
+        number_of_requests = len(self.mock_api.requests)
+        get_response = self.create_feed().get()
+        self.assertTrue(get_response.cache_hit)
+        self.assertEqual(len(self.mock_api.requests), number_of_requests + 1)
+        # the feed file is regenerated
+        self.test_feed_data = create_feed_data(5000, 2, seed=1)
+        self.mock_api.set_feed_data(self.test_feed_data, '"2"')
+        get_response = self.create_feed().get()
+        self.assertFalse(get_response.cache_hit)
+        self.assert_feed_file(get_response)
+        self.assertTrue(isfile(get_response.file_path))
+
+    def test_download_into_store(self):
+        feed_store = FeedStore(self.test_store_location, 2 * len(self.test_feed_data))
+        feed_objs = [self.create_feed(store=feed_store, number_of_workers=2) for _ in range(2)]
+        self.assertEqual(feed_objs[0].file_path, feed_objs[1].file_path)
+        self.assertEqual(dirname(dirname(feed_objs[0].file_path)), join(feed_store.root_directory, 'feeds'))
+        # the second download of the same feed waits for the first one and reuses the file
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            get_responses = list(executor.map(lambda feed_obj: feed_obj.get(), feed_objs))
+        for get_response in get_responses:
+            self.assert_feed_file(get_response)
+        self.assertEqual(sorted(get_response.cache_hit for get_response in get_responses), [False, True])
+        number_of_ranges = -(-len(self.test_feed_data) // (self.test_chunk_size + 1))
+        self.assertEqual(len(self.mock_api.requests), number_of_ranges + 1)
+        self.assertEqual([entry['file_name'] for entry in feed_store.entries.values()],
+                         [basename(get_responses[0].file_path)])
+
+    def test_lock_store_entry(self):
+        feed_store = FeedStore(self.test_store_location)
+        feed_obj = self.create_feed(store=feed_store)
+        self.assert_feed_file(feed_obj.get())
+        [(key, entry)] = feed_store.entries.items()
+        store_lock = feed_obj.lock_store_entry()
+        # the feed file is not removed while it is read
+        self.assertFalse(feed_store.remove(key))
+        feed_obj.release_store_entry(store_lock)
+        self.assertGreater(feed_store.entries[key]['last_access'], entry['last_access'])
+        self.assertTrue(feed_store.remove(key))
+        self.assertIsNone(self.create_feed().lock_store_entry())
+
+    def test_get_feeds(self):
+        feed_objs = [self.create_feed(category_id, number_of_workers=2) for category_id in ['1', '220', '625', '11450']]
+        # fewer ranges are downloaded at the same time than there are feeds
+        get_responses = get_feeds(feed_objs, 2)
+        self.assertEqual([get_response.file_path for get_response in get_responses],
+                         [feed_obj.file_path for feed_obj in feed_objs])
+        for get_response in get_responses:
+            self.assert_feed_file(get_response)
+        self.assertEqual(sorted({request[1]['category_id'] for request in self.mock_api.requests}),
+                         ['1', '11450', '220', '625'])
+
+    def test_get_feeds_into_store(self):
+        feed_store = FeedStore(self.test_store_location)
+        feed_objs = [self.create_feed(store=feed_store) for _ in range(2)]
+        # the second feed waits for the lock of the entry without taking the only thread of the executor
+        get_responses = get_feeds(feed_objs, 1)
+        for get_response in get_responses:
+            self.assert_feed_file(get_response)
+        self.assertEqual([get_response.cache_hit for get_response in get_responses], [False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,20 @@
+import io
+import gzip
+import sqlite3
 import unittest
-from os import remove
-from os.path import isfile
-from filter.feed_filter import FeedFilterRequest
+import pandas as pd
+from os import remove, listdir
+from os.path import isfile, basename
+from shutil import rmtree
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from filter.feed_filter import FeedFilterRequest, DB_FILE_NAME, DB_IN_MEMORY
+from filter.feed_cache import FeedCache
+from filter.feed_writer import get_writer_class, zstandard
+from utils.file_utils import get_extension
+from errors.custom_exceptions import FilterError
 from enums.file_enums import FileFormat, FileEncoding
+from enums.filter_enums import FilterEngine
 from constants.feed_constants import DATA_FRAME_CHUNK_SIZE, SUCCESS_CODE, FAILURE_CODE
 
 
@@ -30,6 +42,8 @@ class TestFeed(unittest.TestCase):
         self.assertEqual(filter_request.separator, '\t')
         self.assertEqual(filter_request.encoding, FileEncoding.UTF8.value)
         self.assertEqual(filter_request.rows_chunk_size, DATA_FRAME_CHUNK_SIZE)
+        self.assertEqual(filter_request.engine, FilterEngine.SQLITE.value)
+        self.assertEqual(filter_request.number_of_workers, 1)
         self.assertEqual(filter_request.number_of_records, 0)
         self.assertEqual(filter_request.number_of_filtered_records, 0)
         self.assertEqual(len(filter_request.queries), 0)
@@ -80,6 +94,443 @@ class TestFeed(unittest.TestCase):
         # clean up
         remove(filter_request.filtered_file_path)
 
+    def test_filter_stream_no_query(self):
+        filter_request = FeedFilterRequest(self.test_file_path)
+        filter_response = filter_request.filter_stream(io.BytesIO())
+        self.assertEqual(filter_response.status_code, FAILURE_CODE)
+        self.assertIsNone(filter_response.file_path)
+
+    def test_filter_stream(self):
+        feed_data = b'ItemId\tTitle\tSellerUsername\n1\tfirst\tseller1\n2\tsecond\tseller2\n3\tthird\tseller1\n'
+        # a multi member gzip stream
+        input_stream = io.BytesIO(gzip.compress(feed_data[:40]) + gzip.compress(feed_data[40:]))
+        filter_request = FeedFilterRequest('../tests/test-data/test_stream_feed.gz', seller_names=['seller1'],
+                                           rows_chunk_size=2)
+        filter_response = filter_request.filter_stream(input_stream)
+        self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+        self.assertEqual(filter_request.number_of_records, 3)
+        self.assertEqual(filter_request.number_of_filtered_records, 2)
+        with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+            self.assertEqual(filtered_file.read(), b'ItemId\tSellerUsername\n1\tseller1\n3\tseller1\n')
+        remove(filter_response.file_path)
+
+    def test_filter_pandas_engine(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\tItemLocationCountry\n1\tfirst\t260\tseller1\tUS\n' \
+                    b'2\tsecond\t220\tseller2\tGB\n3\tthird\t260\tseller2\tGB\n4\tfourth\t260\tseller1\t\n'
+        test_file_path = '../tests/test-data/test_engine_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        filtered_data = []
+        try:
+            for engine in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+                filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'],
+                                                   any_query='ItemLocationCountry IS NOT NULL', rows_chunk_size=1,
+                                                   engine=engine)
+                filter_response = filter_request.filter()
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                self.assertEqual(filter_request.number_of_records, 4)
+                self.assertEqual(filter_request.number_of_filtered_records, 2)
+                self.assertFalse(isfile(DB_FILE_NAME))
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    filtered_data.append(filtered_file.read())
+                remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+        # both engines write the same rows
+        self.assertEqual(filtered_data[0], b'ItemId\tCategoryId\tSellerUsername\tItemLocationCountry\n'
+                                           b'1\t260\tseller1\tUS\n3\t260\tseller2\tGB\n')
+        self.assertEqual(filtered_data[0], filtered_data[1])
+
+    def test_filter_stream_pandas_engine(self):
+        feed_data = b'ItemId\tTitle\tSellerUsername\n1\tfirst\tseller1\n2\tsecond\tseller2\n3\tthird\tseller1\n'
+        filter_request = FeedFilterRequest('../tests/test-data/test_stream_feed.gz', item_ids=['2', '3'],
+                                           seller_names=['seller1'], rows_chunk_size=2,
+                                           engine=FilterEngine.PANDAS.value)
+        filter_response = filter_request.filter_stream(io.BytesIO(gzip.compress(feed_data)))
+        self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+        self.assertEqual(filter_request.number_of_filtered_records, 1)
+        with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+            self.assertEqual(filtered_file.read(), b'ItemId\tSellerUsername\n3\tseller1\n')
+        remove(filter_response.file_path)
+
+    def test_filter_multiple_workers(self):
+        feed_data = b'ItemId\tTitle\tSellerUsername\n' + \
+                    b''.join(b'%d\ttitle\tseller%d\n' % (item_id, item_id % 3) for item_id in range(100))
+        test_file_path = '../tests/test-data/test_workers_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        try:
+            for engine in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+                filter_request = FeedFilterRequest(test_file_path, seller_names=['seller1'], rows_chunk_size=7,
+                                                   engine=engine, number_of_workers=3)
+                filter_response = filter_request.filter()
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                self.assertEqual(filter_request.number_of_records, 100)
+                self.assertEqual(filter_request.number_of_filtered_records, 33)
+                # the filtered rows keep the order of the feed file
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    self.assertEqual(filtered_file.read(), b'ItemId\tSellerUsername\n' +
+                                     b''.join(b'%d\tseller1\n' % item_id for item_id in range(1, 100, 3)))
+                remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+
+    def test_filter_multiple_workers_multiline_value(self):
+        # the quoted value spans lines and the blocks of two rows would split it
+        feed_data = b'ItemId\tTitle\tSellerUsername\n1\tfirst\tseller1\n2\tsecond\t"sel\nler2"\n' \
+                    b'3\tthird\tseller1\n4\tfourth\tseller3\n'
+        test_file_path = '../tests/test-data/test_multiline_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        filtered_data = []
+        try:
+            for number_of_workers in (1, 2):
+                filter_request = FeedFilterRequest(test_file_path, item_ids=['1', '2', '3', '4'], rows_chunk_size=2,
+                                                   number_of_workers=number_of_workers)
+                filter_response = filter_request.filter()
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                self.assertEqual(filter_request.number_of_records, 4)
+                self.assertEqual(filter_request.number_of_filtered_records, 4)
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    filtered_data.append(filtered_file.read())
+                remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+        self.assertEqual(filtered_data[0], filtered_data[1])
+
+    def test_filter_stream_multiple_workers(self):
+        feed_data = b'ItemId\tTitle\tSellerUsername\n1\tfirst\tseller1\n2\tsecond\tseller2\n3\tthird\tseller1\n'
+        filter_request = FeedFilterRequest('../tests/test-data/test_stream_feed.gz', seller_names=['seller1'],
+                                           rows_chunk_size=1, number_of_workers=2)
+        filter_response = filter_request.filter_stream(io.BytesIO(gzip.compress(feed_data)))
+        self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+        self.assertEqual(filter_request.number_of_records, 3)
+        with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+            self.assertEqual(filtered_file.read(), b'ItemId\tSellerUsername\n1\tseller1\n3\tseller1\n')
+        remove(filter_response.file_path)
+
+    @unittest.skipIf(not FeedCache.is_available(), 'pyarrow is not installed')
+    def test_filter_cache(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\tItemLocationCountry\n1\tfirst\t260\tseller1\tUS\n' \
+                    b'2\tsecond\t220\tseller2\tGB\n3\tthird\t260\tseller2\tGB\n4\tfourth\t260\tseller1\t\n'
+        test_file_path = '../tests/test-data/test_cache_feed.gz'
+        test_cache_directory = '../tests/test-data/test_cache'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        try:
+            cache_response = FeedFilterRequest(test_file_path, cache_directory=test_cache_directory).cache()
+            self.assertEqual(cache_response.status_code, SUCCESS_CODE)
+            self.assertTrue(isfile(cache_response.file_path))
+            for engine in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+                for any_query in (None, 'ItemLocationCountry IS NOT NULL'):
+                    filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'],
+                                                       seller_names=['seller1', 'seller2'], any_query=any_query,
+                                                       rows_chunk_size=1, engine=engine,
+                                                       cache_directory=test_cache_directory)
+                    filter_response = filter_request.filter()
+                    self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                    self.assertEqual(filter_request.number_of_records, 4)
+                    with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                        self.assertEqual(filtered_file.read(),
+                                         b'ItemId\tCategoryId\tSellerUsername\tItemLocationCountry\n'
+                                         b'1\t260\tseller1\tUS\n3\t260\tseller2\tGB\n' +
+                                         (b'' if any_query else b'4\t260\tseller1\t\n'))
+                    remove(filter_response.file_path)
+            # the feed file is parsed once
+            self.assertEqual(listdir(test_cache_directory), [cache_response.file_path.split('/')[-1]])
+        finally:
+            remove(test_file_path)
+            rmtree(test_cache_directory, ignore_errors=True)
+
+    def test_filter_persistent_db(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\n1\tfirst\t260\tseller1\n2\tsecond\t220\tseller2\n' \
+                    b'3\tthird\t260\tseller2\n'
+        test_file_path = '../tests/test-data/test_db_feed.gz'
+        test_db_file_path = '../tests/test-data/test_db/feed.db'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        try:
+            for column_name_list, filtered_data in ((None, b'ItemId\tCategoryId\tSellerUsername\n1\t260\tseller1\n'),
+                                                    (['ItemId', 'Title'], b'ItemId\tTitle\n1\tfirst\n'),
+                                                    (None, b'ItemId\tCategoryId\tSellerUsername\n1\t260\tseller1\n')):
+                filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'], seller_names=['seller1'],
+                                                   db_file_path=test_db_file_path)
+                filter_response = filter_request.filter(column_name_list)
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                self.assertEqual(filter_request.number_of_records, 3)
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    self.assertEqual(filtered_file.read(), filtered_data)
+                remove(filter_response.file_path)
+            connection = sqlite3.connect(test_db_file_path)
+            # the rows are loaded once per input file and the filter columns are indexed
+            self.assertEqual(connection.execute('SELECT COUNT(*) FROM feed').fetchone()[0], 3)
+            self.assertEqual(sorted(row[1] for row in connection.execute('PRAGMA index_list(feed)')),
+                             ['feed_CategoryId', 'feed_ItemId', 'feed_SellerUsername'])
+            connection.close()
+            # the input file changes
+            with open(test_file_path, 'wb') as feed_file:
+                feed_file.write(gzip.compress(feed_data + b'4\tfourth\t260\tseller1\n'))
+            filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'], seller_names=['seller1'],
+                                               db_file_path=test_db_file_path)
+            filter_response = filter_request.filter()
+            self.assertEqual(filter_request.number_of_records, 4)
+            self.assertEqual(filter_request.number_of_filtered_records, 2)
+            remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+            rmtree('../tests/test-data/test_db', ignore_errors=True)
+
+    def test_filter_batch(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\tItemLocationCountry\n1\tfirst\t260\tseller1\tUS\n' \
+                    b'2\tsecond\t220\tseller2\tGB\n3\tthird\t260\tseller2\tGB\n4\tfourth\t260\tseller1\t\n'
+        test_file_path = '../tests/test-data/test_batch_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        try:
+            filter_requests = [FeedFilterRequest(test_file_path, leaf_category_ids=['260'], rows_chunk_size=2,
+                                                 engine=FilterEngine.PANDAS.value),
+                               FeedFilterRequest(test_file_path, seller_names=['seller2'], rows_chunk_size=2,
+                                                 any_query='ItemLocationCountry = \'GB\''),
+                               FeedFilterRequest(test_file_path),
+                               FeedFilterRequest(test_file_path, item_ids=['5'])]
+            filter_responses = FeedFilterRequest.filter_batch(filter_requests)
+            self.assertEqual([filter_response.status_code for filter_response in filter_responses],
+                             [SUCCESS_CODE, SUCCESS_CODE, FAILURE_CODE, SUCCESS_CODE])
+            self.assertEqual([filter_request.number_of_filtered_records for filter_request in filter_requests],
+                             [3, 2, 0, 0])
+            self.assertEqual(filter_requests[0].number_of_records, 4)
+            self.assertIsNone(filter_responses[3].file_path)
+            self.assertNotEqual(filter_responses[0].file_path, filter_responses[1].file_path)
+            for filter_request, filter_response in zip(filter_requests[:2], filter_responses):
+                # the same rows as filtering the input file by every request
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    filtered_data = filtered_file.read()
+                remove(filter_response.file_path)
+                filter_response = filter_request.filter()
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    self.assertEqual(filtered_file.read(), filtered_data)
+                remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+
+    def test_filter_batch_input_files(self):
+        with self.assertRaises(FilterError):
+            FeedFilterRequest.filter_batch([FeedFilterRequest(self.test_file_path, item_ids=['1']),
+                                            FeedFilterRequest(self.test_file_path + '.gz', item_ids=['1'])])
+
+    def test_filter_late_materialization(self):
+        # the blank line makes a block that is parsed with all the columns at once
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\tItemLocationCountry\n1\tfirst\t260\tseller1\tUS\n' \
+                    b'2\tsecond\t220\tseller2\tGB\n3\tthird\t260\tseller2\tGB\n\n4\tfourth\t260\tseller1\t\n'
+        test_file_path = '../tests/test-data/test_late_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        try:
+            # the matching rows have all the columns by default, including the ignored Title
+            for column_name_list, filtered_data in ((None, b'ItemId\tTitle\tCategoryId\tSellerUsername\t'
+                                                           b'ItemLocationCountry\n1\tfirst\t260\tseller1\tUS\n'
+                                                           b'3\tthird\t260\tseller2\tGB\n'),
+                                                    (['ItemId', 'Title'], b'ItemId\tTitle\n1\tfirst\n3\tthird\n')):
+                filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'],
+                                                   any_query='Title <> \'fourth\'', rows_chunk_size=2,
+                                                   late_materialization=True)
+                filter_response = filter_request.filter(column_name_list)
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                self.assertEqual(filter_request.number_of_records, 4)
+                self.assertEqual(filter_request.number_of_filtered_records, 2)
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    self.assertEqual(filtered_file.read(), filtered_data)
+                remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+
+    def test_filter_late_materialization_parser_error(self):
+        # the quoted title spans lines, the block of the first two records is parsed with all the columns at once
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\n1\t"fir\nst"\t260\tseller1\n' \
+                    b'2\tsecond\t220\tseller2\n3\tthird\t260\tseller2\n'
+        test_file_path = '../tests/test-data/test_late_parser_error_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        read_csv = pd.read_csv
+
+        def read_filter_columns(*args, **kwargs):
+            if 'SellerUsername' not in kwargs['usecols'] and b'fir' in args[0].getvalue():
+                raise pd.errors.ParserError('EOF inside string')
+            return read_csv(*args, **kwargs)
+
+        try:
+            filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'], any_query='Title <> \'x\'',
+                                               rows_chunk_size=2, late_materialization=True)
+            with mock.patch.object(pd, 'read_csv', side_effect=read_filter_columns):
+                filter_response = filter_request.filter()
+            self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+            self.assertEqual(filter_request.number_of_records, 3)
+            self.assertEqual(filter_request.number_of_filtered_records, 2)
+            with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                self.assertEqual(filtered_file.read(), b'ItemId\tTitle\tCategoryId\tSellerUsername\n'
+                                                       b'1\t"fir\nst"\t260\tseller1\n3\tthird\t260\tseller2\n')
+            remove(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+
+    def test_filter_output_directory(self):
+        test_file_path = '../tests/test-data/test_output_feed.gz'
+        test_output_directory = '../tests/test-data/test_output'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(b'ItemId\tCategoryId\n1\t260\n2\t220\n'))
+        filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'],
+                                           output_directory=test_output_directory)
+        try:
+            # the output directory is created if it does not exist
+            filter_response = filter_request.filter()
+            self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+            self.assertEqual(listdir(test_output_directory), [basename(filter_response.file_path)])
+        finally:
+            remove(test_file_path)
+            rmtree(test_output_directory, ignore_errors=True)
+
+    def test_filter_staging_db(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\n' + \
+                    b''.join(b'%d\ttitle\t260\tseller%d\n' % (index, index % 4) for index in range(2000))
+        test_file_path = '../tests/test-data/test_staging_feed.gz'
+        test_db_directory = '../tests/test-data/test_staging_db'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+
+        def filter_seller(seller_name, db_directory):
+            filter_request = FeedFilterRequest(test_file_path, seller_names=[seller_name], rows_chunk_size=100,
+                                               db_directory=db_directory)
+            filter_response = filter_request.filter()
+            with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                filtered_lines = filtered_file.read().splitlines()
+            remove(filter_response.file_path)
+            return filter_request.number_of_filtered_records, filtered_lines[1:]
+
+        try:
+            # the filters load their own staging DBs at the same time
+            sellers = ['seller%d' % index for index in range(4)] * 2
+            db_directories = [None, test_db_directory, DB_IN_MEMORY, test_db_directory] * 2
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(filter_seller, sellers, db_directories))
+            for seller_name, (number_of_filtered_records, filtered_lines) in zip(sellers, results):
+                self.assertEqual(number_of_filtered_records, 500)
+                self.assertTrue(all(line.endswith(seller_name.encode()) for line in filtered_lines))
+            self.assertEqual(listdir(test_db_directory), [])
+            self.assertFalse(isfile(DB_FILE_NAME))
+        finally:
+            remove(test_file_path)
+            rmtree(test_db_directory, ignore_errors=True)
+
+    def test_filter_output_formats(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tPriceValue\tReturnsAccepted\n1\tfirst\t260\t5.5\ttrue\n' \
+                    b'2\tsecond\t220\t20\tfalse\n3\tthird\t260\t\tfalse\n'
+        test_file_path = '../tests/test-data/test_output_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        filtered_data = b'ItemId\tCategoryId\tPriceValue\tReturnsAccepted\n1\t260\t5.5\t1\n3\t260\t0.0\t0\n'
+        try:
+            for output_format, compression_level in ((FileFormat.GZIP.value, 1), (FileFormat.TSV.value, None),
+                                                     (FileFormat.ZSTD.value, None), (FileFormat.PARQUET.value, None)):
+                if not get_writer_class(output_format).is_available():
+                    continue
+                filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'],
+                                                   output_format=output_format, compression_level=compression_level)
+                filter_response = filter_request.filter()
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                self.assertTrue(filter_response.file_path.endswith(get_extension(output_format)))
+                if output_format == FileFormat.PARQUET.value:
+                    filtered_df = pd.read_parquet(filter_response.file_path)
+                    self.assertEqual(filtered_df['PriceValue'].tolist(), [5.5, 0.0])
+                    self.assertEqual(filtered_df['ReturnsAccepted'].tolist(), [True, False])
+                    self.assertEqual(filtered_df['ItemId'].tolist(), ['1', '3'])
+                elif output_format == FileFormat.ZSTD.value:
+                    with open(filter_response.file_path, 'rb') as filtered_file:
+                        self.assertEqual(zstandard.ZstdDecompressor().stream_reader(filtered_file).read(),
+                                         filtered_data)
+                else:
+                    with gzip.open(filter_response.file_path, 'rb') if output_format == FileFormat.GZIP.value \
+                            else open(filter_response.file_path, 'rb') as filtered_file:
+                        self.assertEqual(filtered_file.read(), filtered_data)
+                remove(filter_response.file_path)
+            filter_response = FeedFilterRequest(test_file_path, leaf_category_ids=['260'],
+                                                output_format='xlsx').filter()
+            self.assertEqual(filter_response.status_code, FAILURE_CODE)
+        finally:
+            remove(test_file_path)
+
+    def test_filter_compiled_query(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\tPriceValue\n1\tfirst\t260\tseller1\t5.5\n' \
+                    b'2\tsecond\t220\tseller2\t20\n3\tthird\t260\tseller2\t\n4\tfourth\t260\tseller3\t50\n'
+        test_file_path = '../tests/test-data/test_query_feed.gz'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        try:
+            for engine in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+                # the columns of the any_query are parsed, but not written
+                filter_request = FeedFilterRequest(test_file_path, leaf_category_ids=['260'], engine=engine,
+                                                   any_query='NOT (SellerUsername = \'seller2\' OR PriceValue > 10) '
+                                                             'OR SellerUsername IN (\'seller3\')')
+                filter_response = filter_request.filter(['ItemId', 'Title'])
+                self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                    self.assertEqual(filtered_file.read(), b'ItemId\tTitle\n1\tfirst\n4\tfourth\n')
+                remove(filter_response.file_path)
+            filter_response = FeedFilterRequest(test_file_path, any_query='PriceValue > 10; DROP TABLE feed').filter()
+            self.assertEqual(filter_response.status_code, FAILURE_CODE)
+            self.assertIsNone(filter_response.file_path)
+        finally:
+            remove(test_file_path)
+
+    def test_filter_list_files(self):
+        feed_data = b'ItemId\tTitle\tCategoryId\tSellerUsername\tGTIN\n1\tfirst\t260\tseller1\t100\n' \
+                    b'2\tsecond\t220\tseller2\t200\n3\tthird\t260\tseller2\t\n4\tfourth\t260\tseller1\t400\n'
+        test_file_path = '../tests/test-data/test_list_feed.gz'
+        test_item_ids_file_path = '../tests/test-data/test_item_ids.txt.gz'
+        test_gtins_file_path = '../tests/test-data/test_gtins.txt'
+        with open(test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        with open(test_item_ids_file_path, 'wb') as item_ids_file:
+            item_ids_file.write(gzip.compress(b'1\n3\n4\n5\n'))
+        with open(test_gtins_file_path, 'w') as gtins_file:
+            gtins_file.write('100\n\n200\n')
+        try:
+            for engine in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+                for db_file_path in (None, '../tests/test-data/test_list_db/feed.db'):
+                    # the same rows as the lists of the request
+                    for list_options in ({'item_ids': ['1', '3', '4', '5'], 'gtins': ['100', '200']},
+                                         {'item_ids_file_path': test_item_ids_file_path,
+                                          'gtins_file_path': test_gtins_file_path}):
+                        filter_request = FeedFilterRequest(test_file_path, any_query='SellerUsername <> \'seller2\'',
+                                                           engine=engine, db_file_path=db_file_path, **list_options)
+                        filter_response = filter_request.filter()
+                        self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+                        self.assertEqual(filter_request.number_of_filtered_records, 1)
+                        with gzip.open(filter_response.file_path, 'rb') as filtered_file:
+                            self.assertEqual(filtered_file.read(),
+                                             b'ItemId\tCategoryId\tSellerUsername\tGTIN\n1\t260\tseller1\t100\n')
+                        remove(filter_response.file_path)
+            # without any other filter
+            filter_request = FeedFilterRequest(test_file_path, item_ids_file_path=test_item_ids_file_path)
+            filter_response = filter_request.filter()
+            self.assertEqual(filter_response.status_code, SUCCESS_CODE)
+            self.assertEqual(filter_request.number_of_filtered_records, 3)
+            remove(filter_response.file_path)
+            filter_response = FeedFilterRequest(test_file_path, epids_file_path=test_gtins_file_path + '.txt').filter()
+            self.assertEqual(filter_response.status_code, FAILURE_CODE)
+        finally:
+            for file_path in (test_file_path, test_item_ids_file_path, test_gtins_file_path):
+                remove(file_path)
+            rmtree('../tests/test-data/test_list_db', ignore_errors=True)
+
+    def test_cache_no_directory(self):
+        filter_response = FeedFilterRequest(self.test_file_path).cache()
+        self.assertEqual(filter_response.status_code, FAILURE_CODE)
+
+    def test_unknown_engine(self):
+        filter_request = FeedFilterRequest(self.test_file_path, seller_names=['seller1'], engine='spark')
+        filter_response = filter_request.filter_stream(io.BytesIO(b''))
+        self.assertEqual(filter_response.status_code, FAILURE_CODE)
+
 
 if __name__ == '__main__':
     unittest.main()
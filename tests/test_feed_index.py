@@ -0,0 +1,88 @@
+import io
+import gzip
+import random
+import unittest
+from os import remove
+from os.path import isfile
+from unittest import mock
+import pandas as pd
+from filter import feed_index
+from filter.feed_index import FeedIndex, INDEX_EXTENSION
+from filter.feed_filter import convert_columns
+from errors.custom_exceptions import InputDataError
+from tests.mock_feed_api import create_feed_data
+
+
+class TestFeedIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_file_path = '../tests/test-data/test_index_feed.gz'
+        cls.test_feed_data = create_feed_data(5000, 4)
+        cls.test_rows_df = pd.read_csv(io.BytesIO(gzip.decompress(cls.test_feed_data)), sep='\t', dtype=object)
+        cls.test_item_ids = random.Random(0).sample(cls.test_rows_df['ItemId'].tolist(), 50)
+
+    def setUp(self):
+        with open(self.test_file_path, 'wb') as feed_file:
+            feed_file.write(self.test_feed_data)
+
+    def tearDown(self):
+        for file_path in (self.test_file_path, self.test_file_path + INDEX_EXTENSION):
+            if isfile(file_path):
+                remove(file_path)
+
+    def assert_lookup(self, index):
+        rows_df = index.lookup(self.test_item_ids + ['1'], ['ItemId', 'Title', 'PriceValue'])
+        expected_df = self.test_rows_df[self.test_rows_df['ItemId'].isin(self.test_item_ids)]
+        expected_df = convert_columns(expected_df[['ItemId', 'Title', 'PriceValue']].reset_index(drop=True))
+        pd.testing.assert_frame_equal(rows_df, expected_df)
+
+    def test_lookup_gzip_members(self):
+        # the starts of the gzip members are the access points
+        with mock.patch.object(feed_index, 'indexed_gzip', None):
+            index = FeedIndex(self.test_file_path)
+            self.assertFalse(index.exists())
+            self.assertEqual(index.build(), 5000)
+            self.assertTrue(index.exists())
+            self.assert_lookup(index)
+
+    def test_lookup_multiline_value(self):
+        # the title of the first record spans two lines
+        feed_data = b'ItemId\tTitle\tPriceValue\n1\t"first\nline"\t10\n2\t5" tv\t20\n3\tthird\t30'
+        with open(self.test_file_path, 'wb') as feed_file:
+            feed_file.write(gzip.compress(feed_data))
+        index = FeedIndex(self.test_file_path)
+        self.assertEqual(index.build(), 3)
+        rows_df = index.lookup(['1', '3', 'line'])
+        self.assertEqual(rows_df['ItemId'].tolist(), ['1', '3'])
+        self.assertEqual(rows_df['Title'].tolist(), ['first\nline', 'third'])
+        self.assertEqual(rows_df['PriceValue'].tolist(), [10.0, 30.0])
+
+    def test_build_single_member(self):
+        with open(self.test_file_path, 'wb') as feed_file:
+            feed_file.write(create_feed_data(100))
+        with mock.patch.object(feed_index, 'indexed_gzip', None):
+            # every lookup decompresses the only gzip member from its start
+            with self.assertLogs(feed_index.logger, 'WARNING'):
+                self.assertEqual(FeedIndex(self.test_file_path).build(), 100)
+
+    @unittest.skipIf(not FeedIndex.has_window_access_points(), 'indexed_gzip is not installed')
+    def test_lookup_window_access_points(self):
+        index = FeedIndex(self.test_file_path)
+        self.assertEqual(index.build(65536), 5000)
+        self.assert_lookup(index)
+
+    def test_lookup_out_of_date(self):
+        index = FeedIndex(self.test_file_path)
+        with self.assertRaises(InputDataError):
+            index.lookup(self.test_item_ids)
+        index.build()
+        # the feed file is regenerated
+        with open(self.test_file_path, 'wb') as feed_file:
+            feed_file.write(create_feed_data(5000, 4, seed=1))
+        self.assertFalse(FeedIndex(self.test_file_path).exists())
+        with self.assertRaises(InputDataError):
+            FeedIndex(self.test_file_path).lookup(self.test_item_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
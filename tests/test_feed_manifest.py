@@ -0,0 +1,82 @@
+import unittest
+from os import remove
+from os.path import isfile
+from feed.feed_manifest import FeedManifest, MANIFEST_EXTENSION
+
+
+class TestFeedManifest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_file_path = '../tests/test-data/test_manifest_feed.gz'
+        cls.test_identity = {'category_id': '1', 'feed_scope': 'ALL_ACTIVE', 'feed_date': '20190127',
+                             'marketplace_id': 'EBAY_US'}
+
+    def tearDown(self):
+        if isfile(self.test_file_path + MANIFEST_EXTENSION):
+            remove(self.test_file_path + MANIFEST_EXTENSION)
+
+    def test_load_not_exists(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        self.assertFalse(manifest.load())
+        self.assertIsNone(manifest.total_size)
+
+    def test_add_completed_range(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        manifest.start(3500)
+        manifest.add_completed_range(2002, 3002)
+        manifest.add_completed_range(0, 1000)
+        manifest.add_completed_range(1001, 2001)
+        self.assertEqual(manifest.completed_ranges, [(0, 3002)])
+        self.assertEqual(manifest.completed_size, 3003)
+        self.assertEqual(manifest.find_missing_ranges(1000), ['bytes=3003-3499'])
+        self.assertEqual(manifest.completed_prefix_size, 3003)
+
+    def test_load(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        manifest.start(3500)
+        manifest.add_completed_range(0, 1000)
+        manifest.add_completed_range(2002, 3002)
+        self.assertTrue(isfile(manifest.file_path))
+        # a new download of the same feed reads the progress
+        loaded_manifest = FeedManifest(self.test_file_path, dict(self.test_identity))
+        self.assertTrue(loaded_manifest.load())
+        self.assertEqual(loaded_manifest.total_size, 3500)
+        self.assertEqual(loaded_manifest.completed_ranges, [(0, 1000), (2002, 3002)])
+        self.assertEqual(loaded_manifest.find_missing_ranges(1000), ['bytes=1001-2001', 'bytes=3003-3499'])
+        self.assertEqual(loaded_manifest.completed_prefix_size, 1001)
+
+    def test_load_other_identity(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        manifest.start(3500)
+        other_identity = dict(self.test_identity, feed_date='20190128')
+        self.assertFalse(FeedManifest(self.test_file_path, other_identity).load())
+
+    def test_finish(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        manifest.start(3500, '"etag"', 'Mon, 01 Jul 2019 07:00:00 GMT')
+        manifest.add_completed_range(0, 1000)
+        manifest.finish()
+        loaded_manifest = FeedManifest(self.test_file_path, self.test_identity)
+        self.assertTrue(loaded_manifest.load())
+        self.assertTrue(loaded_manifest.complete)
+        self.assertEqual(loaded_manifest.completed_size, 3500)
+        self.assertEqual(loaded_manifest.find_missing_ranges(1000), [])
+        self.assertEqual(loaded_manifest.etag, '"etag"')
+
+    def test_matches(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        manifest.start(3500, '"etag"', None)
+        self.assertTrue(manifest.matches(3500, '"etag"', 'Mon, 01 Jul 2019 07:00:00 GMT'))
+        self.assertTrue(manifest.matches(3500))
+        self.assertFalse(manifest.matches(3501, '"etag"'))
+        self.assertFalse(manifest.matches(3500, '"other-etag"'))
+
+    def test_remove(self):
+        manifest = FeedManifest(self.test_file_path, self.test_identity)
+        manifest.start(3500)
+        manifest.remove()
+        self.assertFalse(isfile(manifest.file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
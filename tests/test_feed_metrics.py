@@ -0,0 +1,44 @@
+import unittest
+from feed.feed_metrics import FeedMetrics
+
+
+class TestFeedMetrics(unittest.TestCase):
+    def test_add_range(self):
+        metrics = FeedMetrics()
+        range_metrics = metrics.add_range('bytes=0-999', 206, 1000, 0.1, 0.5, 1)
+        self.assertEqual(range_metrics.status_code, 206)
+        self.assertEqual(range_metrics.throughput, 2000)
+        self.assertEqual(range_metrics.retries, 1)
+
+    def test_totals(self):
+        metrics = FeedMetrics()
+        metrics.add_range('bytes=0-999', 206, 1000, 0.1, 0.5)
+        metrics.add_range('bytes=1000-1999', 206, 1000, 0.3, 0.5, 2)
+        metrics.add_range('bytes=2000-2999', 500, 0, 0.2, 0.2)
+        metrics.finish()
+        self.assertEqual(metrics.number_of_requests, 3)
+        self.assertEqual(metrics.number_of_failed_requests, 1)
+        self.assertEqual(metrics.number_of_bytes, 2000)
+        self.assertEqual(metrics.retries, 2)
+        self.assertAlmostEqual(metrics.average_latency, 0.2)
+        self.assertEqual(metrics.duration, metrics.end_time - metrics.start_time)
+        metrics_dict = metrics.to_dict()
+        self.assertEqual(metrics_dict['number_of_bytes'], 2000)
+        self.assertEqual(metrics_dict['ranges'][2]['status_code'], 500)
+
+    def test_callback(self):
+        reported_metrics = []
+        metrics = FeedMetrics(reported_metrics.append)
+        range_metrics = metrics.add_range('bytes=0-999', 206, 1000, 0.1, 0.5)
+        self.assertEqual(reported_metrics, [range_metrics])
+
+    def test_callback_failure(self):
+        def failing_callback(range_metrics):
+            raise ValueError(range_metrics)
+        metrics = FeedMetrics(failing_callback)
+        metrics.add_range('bytes=0-999', 206, 1000, 0.1, 0.5)
+        self.assertEqual(metrics.number_of_requests, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import unittest
+import gzip
+import threading
+from os import remove
+from os.path import isfile, dirname, abspath
+from shutil import rmtree
+from enums.feed_enums import FeedType, FeedScope
+from enums.filter_enums import FilterEngine
+from feed.feed_request import Feed
+from feed.feed_session import FeedSession
+from feed.feed_store import FeedStore
+from feed.feed_pipeline import RangeStream, download_and_filter
+from filter.feed_filter import FeedFilterRequest
+from errors.custom_exceptions import InputDataError
+from constants.feed_constants import SUCCESS_CODE, FAILURE_CODE
+from tests.mock_feed_api import MockFeedApi, create_feed_data, FAULT_ERROR
+
+
+class TestRangeStream(unittest.TestCase):
+    def test_read_in_order(self):
+        range_stream = RangeStream()
+        range_stream.put(4, b'4567')
+        range_stream.put(0, b'0123')
+        range_stream.put(8, b'89')
+        range_stream.close()
+        self.assertEqual(range_stream.read(3), b'012')
+        self.assertEqual(range_stream.read(), b'3456789')
+        self.assertEqual(range_stream.read(), b'')
+
+    def test_put_again(self):
+        range_stream = RangeStream()
+        range_stream.put(0, b'0123')
+        self.assertEqual(range_stream.read(2), b'01')
+        # a range that is downloaded again overlaps the data that has been read already
+        range_stream.put(0, b'012')
+        range_stream.put(3, b'3456')
+        range_stream.close()
+        self.assertEqual(range_stream.read(), b'23456')
+        self.assertEqual(range_stream.read(), b'')
+
+    def test_read_waits(self):
+        range_stream = RangeStream()
+        read_data = []
+        reader = threading.Thread(target=lambda: read_data.append(range_stream.read()))
+        reader.start()
+        range_stream.put(2, b'23')
+        range_stream.put(0, b'01')
+        reader.join()
+        self.assertEqual(read_data, [b'0123'])
+
+    def test_put_waits(self):
+        range_stream = RangeStream(max_buffer_size=4)
+        range_stream.put(4, b'4567')
+        writer = threading.Thread(target=range_stream.put, args=(8, b'89'))
+        writer.start()
+        writer.join(0.1)
+        # the buffer is full, the writer waits until the data is read
+        self.assertTrue(writer.is_alive())
+        # the data right at the read position is always accepted
+        range_stream.put(0, b'0123')
+        self.assertEqual(range_stream.read(), b'01234567')
+        writer.join()
+        range_stream.close()
+        self.assertEqual(range_stream.read(), b'89')
+
+    def test_sequential_put_waits(self):
+        range_stream = RangeStream(max_buffer_size=4)
+        data = bytes(range(20))
+        writer = threading.Thread(target=lambda: [range_stream.put(offset, data[offset:offset + 2])
+                                                  for offset in range(0, len(data), 2)])
+        writer.start()
+        writer.join(0.1)
+        # the writer waits once the buffer is full, although its data extends the readable data
+        self.assertTrue(writer.is_alive())
+        read_data = b''
+        while len(read_data) < len(data):
+            read_data = read_data + range_stream.read(3)
+        writer.join()
+        self.assertEqual(read_data, data)
+
+    def test_put_overlapping_ranges(self):
+        range_stream = RangeStream()
+        # the ranges of a failed attempt and of the next one do not start at the same offsets
+        range_stream.put(0, b'01234')
+        range_stream.put(3, b'34567')
+        range_stream.put(6, b'6789')
+        range_stream.close()
+        self.assertEqual(range_stream.read(4), b'0123')
+        self.assertEqual(range_stream.read(), b'456789')
+        self.assertEqual(range_stream.read(), b'')
+
+    def test_abort(self):
+        range_stream = RangeStream()
+        range_stream.put(0, b'0123')
+        range_stream.abort(InputDataError('Download failed'))
+        with self.assertRaises(InputDataError):
+            range_stream.read()
+        with self.assertRaises(InputDataError):
+            range_stream.put(4, b'4567')
+
+
+class TestDownloadAndFilter(unittest.TestCase):
+    """
+    Downloads and filters feed files from a local mock of the Feed API
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.test_download_location = '../tests/test-data/test_pipeline'
+        cls.test_feed_data = create_feed_data(5000, 2)
+
+    def setUp(self):
+        self.mock_api = MockFeedApi(self.test_feed_data)
+        self.mock_api.start()
+        self.session = FeedSession(4, 0, 0, 5)
+
+    def tearDown(self):
+        self.session.close()
+        self.mock_api.stop()
+        rmtree(self.test_download_location, ignore_errors=True)
+
+    def create_feed(self, **kwargs):
+        return Feed(FeedType.ITEM.value, FeedScope.BOOTSTRAP.value, '1', 'EBAY_US', 'v^1 ...',
+                    download_location=self.test_download_location, session=self.session,
+                    base_url=self.mock_api.base_url, chunk_size=20000, number_of_workers=2, **kwargs)
+
+    @staticmethod
+    def create_filter(engine):
+        return FeedFilterRequest(None, leaf_category_ids=['260', '625'], item_location_countries=['US', 'GB'],
+                                 any_query='PriceValue < 250', engine=engine, rows_chunk_size=1000)
+
+    def test_same_rows_as_file_filter(self):
+        for engine in (FilterEngine.SQLITE.value, FilterEngine.PANDAS.value):
+            stream_filter = self.create_filter(engine)
+            get_response, stream_filter_response = download_and_filter(self.create_feed(resume=False), stream_filter,
+                                                                       keep_file=True)
+            self.assertEqual(get_response.status_code, SUCCESS_CODE, get_response.message)
+            self.assertEqual(stream_filter_response.status_code, SUCCESS_CODE, stream_filter_response.message)
+            with gzip.open(stream_filter_response.file_path, 'rb') as filtered_file:
+                stream_filtered_data = filtered_file.read()
+            remove(stream_filter_response.file_path)
+            # the kept feed file is filtered from the disk
+            file_filter = self.create_filter(engine)
+            file_filter.input_file_path = get_response.file_path
+            file_filter_response = file_filter.filter()
+            with gzip.open(file_filter_response.file_path, 'rb') as filtered_file:
+                self.assertEqual(filtered_file.read(), stream_filtered_data)
+            self.assertEqual(stream_filter.number_of_records, 5000)
+            self.assertEqual(stream_filter.number_of_filtered_records, file_filter.number_of_filtered_records)
+            self.assertGreater(stream_filter.number_of_filtered_records, 0)
+
+    def test_filter_stored_feed(self):
+        feed_store = FeedStore(self.test_download_location + '/store')
+        feed_obj = self.create_feed(store=feed_store)
+        get_response, filter_response = download_and_filter(feed_obj, self.create_filter(FilterEngine.PANDAS.value),
+                                                            keep_file=True)
+        self.assertEqual(filter_response.status_code, SUCCESS_CODE, filter_response.message)
+        self.assertEqual(dirname(get_response.file_path), feed_obj.download_location)
+        # the filtered file is written to the download location, so the eviction of the entry does not remove it
+        self.assertEqual(dirname(filter_response.file_path), abspath(self.test_download_location))
+        self.assertTrue(feed_store.remove(list(feed_store.entries)[0]))
+        self.assertFalse(isfile(get_response.file_path))
+        self.assertTrue(isfile(filter_response.file_path))
+
+    def test_server_error_mid_stream(self):
+        self.mock_api.add_fault(FAULT_ERROR, count=10, skip=4)
+        stream_filter = self.create_filter(FilterEngine.PANDAS.value)
+        get_response, filter_response = download_and_filter(self.create_feed(), stream_filter)
+        self.assertEqual(get_response.status_code, FAILURE_CODE)
+        self.assertEqual(filter_response.status_code, FAILURE_CODE)
+        # the rows filtered before the error are not left behind
+        self.assertFalse(stream_filter.filtered_file_path and isfile(stream_filter.filtered_file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
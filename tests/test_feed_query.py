@@ -0,0 +1,64 @@
+import sqlite3
+import unittest
+import numpy as np
+import pandas as pd
+from filter.feed_query import parse_query, get_list_predicate, get_comparison_predicate, And
+from errors.custom_exceptions import FilterError
+
+
+class TestFeedQuery(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_data_frame = pd.DataFrame({'ItemId': ['1', '2', '3', '4', '5'],
+                                            'SellerUsername': ['seller1', 'seller2', None, 'seller1', '10'],
+                                            'AvailabilityThreshold': [10.0, 5.0, np.nan, 2.0, 10.0],
+                                            'ReturnsAccepted': [True, False, True, False, True]})
+
+    def query_sqlite(self, query_str):
+        with sqlite3.connect(':memory:') as connection:
+            self.test_data_frame.to_sql('test', connection, index=False)
+            return [row[0] for row in connection.execute('SELECT ItemId FROM test WHERE %s' % query_str)]
+
+    def assert_same_rows(self, query_str):
+        predicate = parse_query(query_str)
+        item_ids = self.test_data_frame['ItemId'][predicate.to_mask(self.test_data_frame)].tolist()
+        self.assertEqual(item_ids, self.query_sqlite(query_str), query_str)
+        # the SQL of the predicate tree selects the same rows
+        self.assertEqual(self.query_sqlite(predicate.to_sql()), item_ids, predicate.to_sql())
+
+    def test_parse_query(self):
+        predicate = parse_query('AvailabilityThresholdType=\'MORE_THAN\' and not (AvailabilityThreshold >= 10 '
+                                'OR "SellerUsername" IN (\'it\'\'s\', \'seller2\'))')
+        self.assertEqual(predicate.columns(), {'AvailabilityThresholdType', 'AvailabilityThreshold', 'SellerUsername'})
+        self.assertEqual(predicate.to_sql(), 'AvailabilityThresholdType = \'MORE_THAN\' AND NOT '
+                                             '(AvailabilityThreshold >= 10 OR SellerUsername IN (\'it\'\'s\','
+                                             '\'seller2\'))')
+
+    def test_invalid_query(self):
+        for query_str in ('', 'PriceValue >', 'PriceValue > 10 OR', 'Title LIKE \'%phone%\'', 'PriceValue = 1; DROP',
+                          '(PriceValue > 10', 'PriceValue IN ()', 'Title = \'unterminated'):
+            with self.assertRaises(FilterError, msg=query_str):
+                parse_query(query_str)
+
+    def test_same_rows_as_sqlite(self):
+        for query_str in ('SellerUsername = \'seller1\'', 'SellerUsername <> \'seller1\'', 'SellerUsername = 10',
+                          'AvailabilityThreshold > 4', 'NOT AvailabilityThreshold > 4', '10 <= AvailabilityThreshold',
+                          'AvailabilityThreshold = \'10\'', 'ReturnsAccepted = 1 AND SellerUsername IS NOT NULL',
+                          'SellerUsername NOT IN (\'seller2\', \'10\') OR AvailabilityThreshold IS NULL',
+                          'NOT (SellerUsername = \'seller1\' AND AvailabilityThreshold < 5)', 'ItemId IN (1, 3)'):
+            self.assert_same_rows(query_str)
+
+    def test_unknown_column(self):
+        with self.assertRaises(FilterError):
+            parse_query('Brand = \'Brand\'').to_mask(self.test_data_frame)
+
+    def test_filter_predicates(self):
+        predicate = And([get_list_predicate('SellerUsername', ['seller1', 'seller2']),
+                         get_comparison_predicate('AvailabilityThreshold', '>=', '5')])
+        self.assertIsNone(get_list_predicate('ItemId', []))
+        self.assertIsNone(get_comparison_predicate('AvailabilityThreshold', '>=', None))
+        self.assertEqual(self.test_data_frame['ItemId'][predicate.to_mask(self.test_data_frame)].tolist(), ['1', '2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from feed.feed_manifest import FeedManifest
+from feed.feed_ranges import ChunkSizer, RangePlanner
+
+
+class TestRangePlanner(unittest.TestCase):
+    def setUp(self):
+        self.manifest = FeedManifest('../tests/test-data/test_ranges_feed.gz', {})
+        self.manifest.total_size = 3500
+        self.manifest.completed_ranges = [(0, 1000)]
+
+    def test_next_range(self):
+        planner = RangePlanner(self.manifest)
+        self.assertEqual(planner.next_range(1000), 'bytes=1001-2001')
+        self.assertEqual(planner.next_range(500), 'bytes=2002-2502')
+        self.assertEqual(planner.next_range(2000), 'bytes=2503-3499')
+        self.assertIsNone(planner.next_range(1000))
+
+    def test_release_range(self):
+        planner = RangePlanner(self.manifest)
+        range_header = planner.next_range(1000)
+        self.assertEqual(planner.next_range(1000), 'bytes=2002-3002')
+        planner.release_range(range_header)
+        self.assertEqual(planner.next_range(500), 'bytes=1001-1501')
+
+
+class TestChunkSizer(unittest.TestCase):
+    def test_fixed(self):
+        chunk_sizer = ChunkSizer(100000)
+        self.assertEqual(chunk_sizer.chunk_size, 100000)
+        chunk_sizer.record_success(100000, 100)
+        self.assertEqual(chunk_sizer.chunk_size, 100000)
+        self.assertFalse(chunk_sizer.record_failure())
+        self.assertEqual(chunk_sizer.chunk_size, 100000)
+
+    def test_adaptive_grow(self):
+        chunk_sizer = ChunkSizer(100000000, True, 1000, 10)
+        initial_chunk_size = chunk_sizer.chunk_size
+        chunk_sizer.record_success(initial_chunk_size, 0.1)
+        self.assertEqual(chunk_sizer.chunk_size, initial_chunk_size * 2)
+        for _ in range(10):
+            chunk_sizer.record_success(chunk_sizer.chunk_size, 0.1)
+        self.assertEqual(chunk_sizer.chunk_size, 100000000)
+
+    def test_adaptive_shrink(self):
+        chunk_sizer = ChunkSizer(100000, True, 1000, 10)
+        chunk_sizer.record_success(100000, 10)
+        self.assertEqual(chunk_sizer.chunk_size, 100000)
+        # slow requests move the chunk size towards target duration
+        chunk_sizer.record_success(100000, 40)
+        self.assertEqual(chunk_sizer.chunk_size, 50000)
+        # retried requests halve the chunk size
+        chunk_sizer.record_success(50000, 1, 1)
+        self.assertEqual(chunk_sizer.chunk_size, 25000)
+
+    def test_adaptive_failure(self):
+        chunk_sizer = ChunkSizer(4000, True, 1000, 10, 2)
+        self.assertTrue(chunk_sizer.record_failure())
+        self.assertEqual(chunk_sizer.chunk_size, 2000)
+        self.assertTrue(chunk_sizer.record_failure())
+        self.assertFalse(chunk_sizer.record_failure())
+        self.assertEqual(chunk_sizer.chunk_size, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
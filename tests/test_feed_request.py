@@ -1,10 +1,12 @@
 import unittest
+import asyncio
 from os import remove
 from os.path import isfile, getsize, split, abspath
 from utils.date_utils import get_formatted_date
 from enums.file_enums import FileFormat
 from enums.feed_enums import FeedType, FeedScope, FeedPrefix, Environment
-from feed.feed_request import Feed, DEFAULT_DOWNLOAD_LOCATION
+from feed.feed_request import Feed, DEFAULT_DOWNLOAD_LOCATION, get_feeds
+from feed.feed_session import FeedSession
 from constants.feed_constants import SUCCESS_CODE, FAILURE_CODE, PROD_CHUNK_SIZE
 
 
@@ -28,9 +30,28 @@ class TestFeed(unittest.TestCase):
         feed_req_obj = Feed(FeedType.ITEM.value, FeedScope.BOOTSTRAP.value, '220', 'EBAY_US', None)
         get_response = feed_req_obj.get()
         self.assertEqual(get_response.status_code, FAILURE_CODE)
+        self.assertFalse(get_response.cache_hit)
+        self.assertIsNone(get_response.metrics)
         self.assertIsNotNone(get_response.message)
         self.assertIsNone(get_response.file_path, 'file_path is not None in the response')
 
+    def test_none_token_async(self):
+        feed_req_obj = Feed(FeedType.ITEM.value, FeedScope.BOOTSTRAP.value, '220', 'EBAY_US', None)
+        get_response = asyncio.run(feed_req_obj.aget())
+        self.assertEqual(get_response.status_code, FAILURE_CODE)
+        self.assertIsNotNone(get_response.message)
+        self.assertIsNone(get_response.file_path, 'file_path is not None in the response')
+
+    def test_get_feeds_invalid_date(self):
+        feed_req_objs = [Feed(FeedType.ITEM.value, FeedScope.DAILY.value, category_id, 'EBAY_US', 'Bearer v^1 ...',
+                              download_location='../tests/test-data/', feed_date='2019-02-01')
+                         for category_id in ['1', '220']]
+        get_responses = get_feeds(feed_req_objs, 2)
+        self.assertEqual(len(get_responses), 2)
+        for get_response in get_responses:
+            self.assertEqual(get_response.status_code, FAILURE_CODE)
+            self.assertIsNotNone(get_response.message)
+
     def test_default_values(self):
         feed_req_obj = Feed(None, None, '220', 'EBAY_US', 'v^1 ...')
         self.assertEqual(feed_req_obj.feed_type, FeedType.ITEM.value)
@@ -40,6 +61,22 @@ class TestFeed(unittest.TestCase):
         self.assertEqual(feed_req_obj.environment, Environment.PRODUCTION.value)
         self.assertEqual(feed_req_obj.download_location, DEFAULT_DOWNLOAD_LOCATION)
         self.assertEqual(feed_req_obj.file_format, FileFormat.GZIP.value)
+        self.assertEqual(feed_req_obj.number_of_workers, 1)
+        self.assertTrue(feed_req_obj.resume)
+        self.assertTrue(feed_req_obj.use_cache)
+        self.assertFalse(feed_req_obj.adaptive_chunk_size)
+        self.assertFalse(feed_req_obj.verify)
+        self.assertIsNone(feed_req_obj.metrics_callback)
+        self.assertIsNone(feed_req_obj.base_url)
+        self.assertIsNone(feed_req_obj.chunk_size)
+        self.assertIsNotNone(feed_req_obj.session)
+
+    def test_shared_session(self):
+        with FeedSession() as feed_session:
+            feed_req_obj_1 = Feed(None, None, '220', 'EBAY_US', 'v^1 ...', session=feed_session)
+            feed_req_obj_2 = Feed(None, None, '1', 'EBAY_US', 'v^1 ...', session=feed_session)
+            self.assertIs(feed_req_obj_1.session, feed_session)
+            self.assertIs(feed_req_obj_2.session, feed_session)
 
     def test_download_feed_invalid_path(self):
         feed_req_obj = Feed(FeedType.ITEM.value, FeedScope.BOOTSTRAP.value, '220', 'EBAY_US', 'Bearer v^1 ...',
@@ -0,0 +1,27 @@
+import unittest
+from feed.feed_session import FeedSession
+from constants.feed_constants import MAX_CONNECTIONS_PER_HOST, REQUEST_RETRIES, BACK_OFF_TIME, REQUEST_TIMEOUT
+
+
+class TestFeedSession(unittest.TestCase):
+    def test_default_values(self):
+        feed_session = FeedSession(None, None, None, None)
+        self.assertEqual(feed_session.max_connections_per_host, MAX_CONNECTIONS_PER_HOST)
+        self.assertEqual(feed_session.retries, REQUEST_RETRIES)
+        self.assertEqual(feed_session.back_off_time, BACK_OFF_TIME)
+        self.assertEqual(feed_session.timeout, REQUEST_TIMEOUT)
+
+    def test_values(self):
+        feed_session = FeedSession(4, 0, 0, 5)
+        self.assertEqual(feed_session.max_connections_per_host, 4)
+        self.assertEqual(feed_session.retries, 0)
+        self.assertEqual(feed_session.back_off_time, 0)
+        self.assertEqual(feed_session.timeout, 5)
+
+    def test_context_manager(self):
+        with FeedSession() as feed_session:
+            self.assertIsNotNone(feed_session)
+
+
+if __name__ == '__main__':
+    unittest.main()
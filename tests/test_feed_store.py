@@ -0,0 +1,82 @@
+import unittest
+import time
+from os import makedirs
+from os.path import join, isfile, isdir
+from shutil import rmtree
+from feed.feed_store import FeedStore, FileLock
+
+
+class TestFeedStore(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_store_location = '../tests/test-data/test_store'
+        cls.test_identities = [{'category_id': category_id, 'feed_scope': 'ALL_ACTIVE', 'feed_date': '20190127',
+                                'marketplace_id': 'EBAY_US'} for category_id in ('1', '220', '625')]
+
+    def tearDown(self):
+        rmtree(self.test_store_location, ignore_errors=True)
+
+    def add_feed_file(self, feed_store, identity, size):
+        location = feed_store.get_location(identity)
+        makedirs(location, exist_ok=True)
+        with open(join(location, 'feed.gz'), 'wb') as feed_file:
+            feed_file.write(b'0' * size)
+        feed_store.add(identity, 'feed.gz')
+        # the last access times differ
+        time.sleep(0.01)
+
+    def test_get_key(self):
+        identity = self.test_identities[0]
+        self.assertEqual(FeedStore.get_key(identity), FeedStore.get_key(dict(reversed(list(identity.items())))))
+        self.assertNotEqual(FeedStore.get_key(identity), FeedStore.get_key(self.test_identities[1]))
+
+    def test_add(self):
+        feed_store = FeedStore(self.test_store_location)
+        self.add_feed_file(feed_store, self.test_identities[0], 100)
+        self.add_feed_file(feed_store, self.test_identities[1], 200)
+        entries = feed_store.entries
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[FeedStore.get_key(self.test_identities[0])]['identity'], self.test_identities[0])
+        self.assertEqual(feed_store.size, 300)
+
+    def test_evict_least_recently_used(self):
+        feed_store = FeedStore(self.test_store_location, 250)
+        self.add_feed_file(feed_store, self.test_identities[0], 100)
+        self.add_feed_file(feed_store, self.test_identities[1], 100)
+        # the first feed is used again
+        feed_store.add(self.test_identities[0], 'feed.gz')
+        self.add_feed_file(feed_store, self.test_identities[2], 100)
+        self.assertEqual(set(feed_store.entries), {FeedStore.get_key(self.test_identities[0]),
+                                                   FeedStore.get_key(self.test_identities[2])})
+        self.assertFalse(isdir(feed_store.get_location(self.test_identities[1])))
+        self.assertEqual(feed_store.size, 200)
+
+    def test_evict_locked_entry(self):
+        feed_store = FeedStore(self.test_store_location, 150)
+        self.add_feed_file(feed_store, self.test_identities[0], 100)
+        with feed_store.lock(self.test_identities[0]):
+            self.add_feed_file(feed_store, self.test_identities[1], 100)
+        self.assertEqual(len(feed_store.entries), 2)
+        self.add_feed_file(feed_store, self.test_identities[2], 100)
+        self.assertEqual(set(feed_store.entries), {FeedStore.get_key(self.test_identities[2])})
+
+    def test_remove(self):
+        feed_store = FeedStore(self.test_store_location)
+        self.add_feed_file(feed_store, self.test_identities[0], 100)
+        key = FeedStore.get_key(self.test_identities[0])
+        self.assertTrue(feed_store.remove(key))
+        self.assertEqual(feed_store.entries, {})
+        self.assertFalse(isfile(join(feed_store.get_location(self.test_identities[0]), 'feed.gz')))
+
+    def test_file_lock(self):
+        makedirs(self.test_store_location)
+        lock_file_path = join(self.test_store_location, 'test.lock')
+        with FileLock(lock_file_path):
+            self.assertFalse(FileLock(lock_file_path).acquire(False))
+        other_lock = FileLock(lock_file_path)
+        self.assertTrue(other_lock.acquire(False))
+        other_lock.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
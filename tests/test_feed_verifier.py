@@ -0,0 +1,54 @@
+import gzip
+import unittest
+from os import remove
+from os.path import isfile
+from feed.feed_verifier import FeedVerifier
+from errors.custom_exceptions import InputDataError
+
+
+class TestFeedVerifier(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.test_file_path = '../tests/test-data/test_verifier_feed.gz'
+        feed_data = b''.join(b'%d\tline %d\n' % (number, number) for number in range(10000))
+        # a multi member gzip file
+        cls.test_data = gzip.compress(feed_data[:50000]) + gzip.compress(feed_data[50000:])
+
+    def tearDown(self):
+        if isfile(self.test_file_path):
+            remove(self.test_file_path)
+
+    def __create_verifier(self, data):
+        with open(self.test_file_path, 'wb') as file_obj:
+            file_obj.write(data)
+        return FeedVerifier(self.test_file_path, len(data))
+
+    def test_verify(self):
+        verifier = self.__create_verifier(self.test_data)
+        for offset in range(0, len(self.test_data), 1000):
+            verifier.verify_to(offset)
+        verifier.finish()
+        self.assertEqual(verifier.position, len(self.test_data))
+        self.assertEqual(verifier.number_of_members, 2)
+
+    def test_truncated(self):
+        verifier = self.__create_verifier(self.test_data[:-4])
+        with self.assertRaises(InputDataError):
+            verifier.finish()
+
+    def test_corrupt(self):
+        corrupt_data = bytearray(self.test_data)
+        # the size in the trailer of the last member
+        corrupt_data[-1] ^= 0xff
+        verifier = self.__create_verifier(bytes(corrupt_data))
+        with self.assertRaises(InputDataError):
+            verifier.finish()
+
+    def test_not_gzip(self):
+        verifier = self.__create_verifier(b'ItemId\tTitle\n')
+        with self.assertRaises(InputDataError):
+            verifier.verify_to(5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
+import io
 import os
 import shutil
+from urllib3.response import HTTPResponse
 from utils import file_utils
+from feed.feed_pipeline import RangeStream
 from enums.file_enums import FileFormat
 from errors.custom_exceptions import FileCreationError, InputDataError
 from constants.feed_constants import SANDBOX_CHUNK_SIZE
@@ -83,6 +86,97 @@ class TestFileUtils(unittest.TestCase):
         next_range = file_utils.find_next_range('1001-2001/718182376', 1000)
         self.assertEqual(next_range, 'bytes=2002-3002')
 
+    def test_find_range_bounds(self):
+        bounds = file_utils.find_range_bounds('bytes 1001-2001/718182376')
+        self.assertEqual(bounds, (1001, 2001, 718182376))
+
+    def test_find_range_bounds_exception(self):
+        with self.assertRaises(InputDataError):
+            file_utils.find_range_bounds('bytes */718182376')
+
+    def test_find_missing_ranges(self):
+        ranges = file_utils.find_missing_ranges([(0, 1000)], 3500, 1000)
+        self.assertEqual(ranges, ['bytes=1001-2001', 'bytes=2002-3002', 'bytes=3003-3499'])
+
+    def test_find_missing_ranges_gaps(self):
+        ranges = file_utils.find_missing_ranges([(2002, 3002), (0, 1000)], 3500, 1000)
+        self.assertEqual(ranges, ['bytes=1001-2001', 'bytes=3003-3499'])
+
+    def test_find_missing_ranges_complete(self):
+        ranges = file_utils.find_missing_ranges([(0, 3499)], 3500, 1000)
+        self.assertEqual(ranges, [])
+
+    def test_find_missing_ranges_max_ranges(self):
+        ranges = file_utils.find_missing_ranges([(0, 1000)], 3500, 1000, 1)
+        self.assertEqual(ranges, ['bytes=1001-2001'])
+
+    def test_find_range_header_bounds(self):
+        self.assertEqual(file_utils.find_range_header_bounds('bytes=1001-2001'), (1001, 2001))
+
+    def test_find_range_header_bounds_bad_format(self):
+        with self.assertRaises(InputDataError):
+            file_utils.find_range_header_bounds('bytes=1001')
+
+    def test_stream_response_to_range_stream(self):
+        range_stream = RangeStream()
+        response = HTTPResponse(body=io.BytesIO(b'\x03\x04\x05'), preload_content=False)
+        bytes_written = file_utils.stream_response_to_range_stream(range_stream, 3, response, buffer_size=2)
+        range_stream.put(0, b'\x00\x01\x02')
+        range_stream.close()
+        self.assertEqual(bytes_written, 3)
+        self.assertEqual(range_stream.read(), b'\x00\x01\x02\x03\x04\x05')
+
+    def test_stream_response_to_file(self):
+        test_binary_data = b'\x01\x02\x03\x04\x05\x06\x07\x08'
+        test_file_path = '../tests/test-data/testFile4'
+        response = HTTPResponse(body=io.BytesIO(test_binary_data), preload_content=False)
+        with open(test_file_path, 'wb') as file_obj:
+            bytes_written = file_utils.stream_response_to_file(file_obj, response, 3)
+        self.assertEqual(bytes_written, len(test_binary_data))
+        with open(test_file_path, 'rb') as file_obj:
+            self.assertEqual(file_obj.read(), test_binary_data)
+        # clean up
+        os.remove(test_file_path)
+
+    def test_stream_response_to_file_exception(self):
+        response = HTTPResponse(body=io.BytesIO(b'\x01'), preload_content=False)
+        with self.assertRaises(FileCreationError):
+            file_utils.stream_response_to_file(None, response)
+
+    def test_stream_response_at_offset(self):
+        test_file_path = '../tests/test-data/testFile5'
+        file_utils.create_and_replace_binary_file(test_file_path)
+        file_utils.preallocate_binary_file(test_file_path, 8)
+        self.assertEqual(os.path.getsize(test_file_path), 8)
+        # write the second half before the first half
+        file_utils.stream_response_at_offset(test_file_path, 4,
+                                             HTTPResponse(body=io.BytesIO(b'\x05\x06\x07\x08'), preload_content=False))
+        file_utils.stream_response_at_offset(test_file_path, 0,
+                                             HTTPResponse(body=io.BytesIO(b'\x01\x02\x03\x04'), preload_content=False))
+        with open(test_file_path, 'rb') as file_obj:
+            self.assertEqual(file_obj.read(), b'\x01\x02\x03\x04\x05\x06\x07\x08')
+        # clean up
+        os.remove(test_file_path)
+
+    def test_stream_response_at_offset_exception(self):
+        response = HTTPResponse(body=io.BytesIO(b'\x01'), preload_content=False)
+        with self.assertRaises(FileCreationError):
+            file_utils.stream_response_at_offset('../tests/test-data/not-existing-file', 0, response)
+
+    def test_get_file_fingerprint(self):
+        test_file_path = '../tests/test-data/testFingerprint'
+        try:
+            with open(test_file_path, 'wb') as file_obj:
+                file_obj.write(b'0123456789')
+            fingerprint = file_utils.get_file_fingerprint(test_file_path, 4)
+            self.assertEqual(fingerprint, file_utils.get_file_fingerprint(test_file_path, 4))
+            # the last bytes are part of the fingerprint
+            with open(test_file_path, 'wb') as file_obj:
+                file_obj.write(b'0123456788')
+            self.assertNotEqual(fingerprint, file_utils.get_file_fingerprint(test_file_path, 4))
+        finally:
+            os.remove(test_file_path)
+
     def test_get_file_extension_none(self):
         ext = file_utils.get_extension(None)
         self.assertEqual(ext, '')
@@ -91,6 +185,11 @@ class TestFileUtils(unittest.TestCase):
         ext = file_utils.get_extension(FileFormat.GZIP.value)
         self.assertEqual(ext, '.gz')
 
+    def test_get_file_extension_output_formats(self):
+        self.assertEqual(file_utils.get_extension(FileFormat.ZSTD.value), '.zst')
+        self.assertEqual(file_utils.get_extension(FileFormat.TSV.value), '.tsv')
+        self.assertEqual(file_utils.get_extension(FileFormat.PARQUET.value), '.parquet')
+
     def test_get_file_name_dir(self):
         test_dir = os.path.expanduser('../feed-sdk/tests')
         returned_dir_name = file_utils.get_file_name(test_dir)
@@ -1,5 +1,9 @@
+import io
 import unittest
 import sys
+import gzip
+import pandas as pd
+from os import remove
 from utils import filter_utils
 from enums.feed_enums import FeedColumn
 
@@ -74,6 +78,49 @@ class TestFilterUtils(unittest.TestCase):
         converted_bool = filter_utils.convert_to_bool_false('False')
         self.assertEqual(False, converted_bool)
 
+    def test_convert_column_to_bool_false(self):
+        column = pd.Series(['True', 'yes', '1', 'false', 'invalid', None], dtype=object)
+        converted_column = filter_utils.convert_column_to_bool_false(column)
+        self.assertEqual(converted_column.tolist(), [filter_utils.convert_to_bool_false(value) for value in column])
+        self.assertEqual(converted_column.dtype, bool)
+
+    def test_convert_column_to_float_max_int(self):
+        column = pd.Series(['1.2', '10', 'invalid', None], dtype=object)
+        converted_column = filter_utils.convert_column_to_float_max_int(column)
+        self.assertEqual(converted_column.tolist(), [1.2, 10, float(sys.maxsize), float(sys.maxsize)])
+        self.assertEqual(converted_column.dtype, float)
+
+    def test_convert_column_to_float_zero(self):
+        column = pd.Series(['5', '10', 'invalid', None], dtype=object)
+        converted_column = filter_utils.convert_column_to_float_zero(column)
+        self.assertEqual(converted_column.tolist(), [5, 10, 0, 0])
+        self.assertEqual(converted_column.dtype, float)
+
+    def test_get_index_element_mask(self):
+        data_frame = pd.DataFrame({str(FeedColumn.ITEM_ID): ['1', '2', None, '4']}, index=[5, 6, 7, 8])
+        mask = filter_utils.get_index_element_mask(data_frame, FeedColumn.ITEM_ID, pd.Index(['4', '1', '9']))
+        self.assertEqual(mask.tolist(), [True, False, False, True])
+        self.assertEqual(mask.index.tolist(), [5, 6, 7, 8])
+        self.assertIsNone(filter_utils.get_index_element_mask(data_frame, FeedColumn.ITEM_ID, None))
+
+    def test_read_value_list_file(self):
+        test_file_path = '../tests/test-data/test_value_list.txt'
+        for data in (b'1\r\n 2\n\n1\n3', gzip.compress(b'1\r\n 2\n\n1\n3')):
+            with open(test_file_path, 'wb') as list_file:
+                list_file.write(data)
+            try:
+                self.assertEqual(sorted(filter_utils.read_value_list_file(test_file_path)), ['1', '2', '3'])
+            finally:
+                remove(test_file_path)
+
+    def test_read_records(self):
+        # a value that starts with a quote spans lines until the closing quote, the other quotes are literal
+        input_stream = io.BytesIO(b'1\t"sel\nler2"\n2\t5" tv\t"a""b"\n3\t"multi\n\nline""\n"\n4\tlast')
+        self.assertEqual(filter_utils.read_records(input_stream, 2), [b'1\t"sel\nler2"\n'])
+        self.assertEqual(filter_utils.read_records(input_stream, 2), [b'2\t5" tv\t"a""b"\n', b'3\t"multi\n\nline""\n"\n'])
+        self.assertEqual(filter_utils.read_records(input_stream, 2), [b'4\tlast'])
+        self.assertEqual(filter_utils.read_records(input_stream, 2), [])
+
     def convert_to_float_max_int_invalid(self):
         converted_float = filter_utils.convert_to_float_max_int('invalid')
         self.assertEqual(sys.maxsize, converted_float)
@@ -16,8 +16,9 @@
 # **************************************************************************/
 
 import json
+import hashlib
 from os import makedirs
-from os.path import isdir, basename, splitext, exists, dirname
+from os.path import isdir, basename, splitext, exists, dirname, getsize
 from errors import custom_exceptions
 import constants.feed_constants as const
 
@@ -81,16 +82,188 @@ def find_next_range(content_range_header, chunk_size=const.SANDBOX_CHUNK_SIZE):
                                                    content_range_header)
 
 
+def find_range_bounds(content_range_header):
+    """
+    Parses the content-range header value
+    :param content_range_header: The content-range header value returned in the response, ex. bytes 0-1000/7181823761
+    :return: a tuple of (lower bound, upper bound, total size) in bytes, the bounds are inclusive
+    :raise: If the input content-range value is not correct an InputDataError exception is raised
+    """
+    try:
+        # ex. content-range : bytes 0-1000/7181823761
+        range_components = content_range_header.split('/')
+        total_size = int(range_components[1])
+        bounds = range_components[0].split(' ')[-1].split('-')
+        return int(bounds[0]), int(bounds[1]), total_size
+    except Exception:
+        raise custom_exceptions.InputDataError('Bad content-range header format: %s' % content_range_header,
+                                               content_range_header)
+
+
+def find_missing_ranges(completed_ranges, total_size, chunk_size=const.SANDBOX_CHUNK_SIZE, max_ranges=None):
+    """
+    Finds the values of all the Range headers that are needed to download the bytes of a file that are not
+    downloaded yet
+    :param completed_ranges: list of (lower, upper) tuples of the inclusive byte ranges that are already downloaded
+    :param total_size: the total size of the file in bytes
+    :param chunk_size: The chunk size in bytes. If not provided, the default chunk size is used
+    :param max_ranges: the max number of the returned ranges. If not provided, all the missing ranges are returned
+    :return: list of the Range header values in the format of bytes=lower-upper, empty if no data is left
+    """
+    chunk = chunk_size if chunk_size else const.SANDBOX_CHUNK_SIZE
+    ranges = []
+    lower_bound = 0
+    for completed_lower, completed_upper in sorted(completed_ranges) + [(total_size, total_size)]:
+        # split the gap before the completed range into chunks, never overlapping the completed range
+        while lower_bound < completed_lower:
+            if max_ranges and len(ranges) >= max_ranges:
+                return ranges
+            upper_bound = min(lower_bound + chunk, completed_lower - 1)
+            ranges.append(const.RANGE_PREFIX + str(lower_bound) + '-' + str(upper_bound))
+            lower_bound = upper_bound + 1
+        lower_bound = max(lower_bound, completed_upper + 1)
+    return ranges
+
+
+def find_range_header_bounds(range_header):
+    """
+    Parses the Range header value
+    :param range_header: The Range header value in the format of bytes=lower-upper
+    :return: a tuple of (lower bound, upper bound) in bytes, the bounds are inclusive
+    :raise: If the input Range value is not correct an InputDataError exception is raised
+    """
+    try:
+        bounds = range_header[len(const.RANGE_PREFIX):].split('-')
+        return int(bounds[0]), int(bounds[1])
+    except Exception:
+        raise custom_exceptions.InputDataError('Bad range header format: %s' % range_header, range_header)
+
+
+def preallocate_binary_file(file_path, size):
+    """
+    Resizes the binary file in the given path to the given size, so chunks can be written at their own offsets
+    :param file_path: The path to the existing file including the file name and extension
+    :param size: The size of the file in bytes
+    :raise: if the file cannot be resized a FileCreationError exception is raised
+    """
+    try:
+        with open(file_path, 'r+b') as file_obj:
+            file_obj.truncate(size)
+    except (IOError, OSError, TypeError) as exp:
+        raise custom_exceptions.FileCreationError('IO error in resizing file %s: %s' % (file_path, repr(exp)),
+                                                  file_path)
+
+
+def stream_response_to_file(file_handler, response, buffer_size=const.STREAM_BUFFER_SIZE):
+    """
+    Copies the body of the given response to the existing file in fixed size buffers, so the whole body is never
+    held in memory. The connection of the response is released to the pool afterwards
+    :param file_handler: the existing and open file object, positioned where the data is written
+    :param response: the response object that is requested with preload_content=False
+    :param buffer_size: The buffer size in bytes. If not provided, the default buffer size is used
+    :return: the number of bytes written to the file
+    :raise if there are any IO errors a FileCreationError exception is raised
+    """
+    bytes_written = 0
+    try:
+        for data in response.stream(buffer_size if buffer_size else const.STREAM_BUFFER_SIZE):
+            file_handler.write(data)
+            bytes_written = bytes_written + len(data)
+    except (IOError, AttributeError) as exp:
+        if file_handler:
+            file_handler.close()
+        raise custom_exceptions.FileCreationError('Error while writing in the file: %s' % repr(exp), None)
+    finally:
+        response.release_conn()
+    return bytes_written
+
+
+def stream_response_at_offset(file_path, offset, response, buffer_size=const.STREAM_BUFFER_SIZE):
+    """
+    Copies the body of the given response to the existing file starting at the given offset
+    :param file_path: The path to the existing file including the file name and extension
+    :param offset: the position in bytes where the data is written
+    :param response: the response object that is requested with preload_content=False
+    :param buffer_size: The buffer size in bytes. If not provided, the default buffer size is used
+    :return: the number of bytes written to the file
+    :raise if there are any IO errors a FileCreationError exception is raised
+    """
+    try:
+        with open(file_path, 'r+b') as file_obj:
+            file_obj.seek(offset)
+            return stream_response_to_file(file_obj, response, buffer_size)
+    except (IOError, OSError, TypeError) as exp:
+        response.release_conn()
+        raise custom_exceptions.FileCreationError('Error while writing in the file: %s' % repr(exp), file_path)
+
+
+def stream_response_to_range_stream(range_stream, offset, response, file_path=None,
+                                    buffer_size=const.STREAM_BUFFER_SIZE):
+    """
+    Puts the body of the given response into the range stream starting at the given offset, in fixed size buffers.
+    The connection of the response is released to the pool afterwards
+    :param range_stream: the RangeStream object that the data is put into
+    :param offset: the position in bytes of the data in the feed file
+    :param response: the response object that is requested with preload_content=False
+    :param file_path: optional path to the existing file that the data is written to at the same offset as well
+    :param buffer_size: The buffer size in bytes. If not provided, the default buffer size is used
+    :return: the number of bytes put into the stream
+    :raise if there are any IO errors a FileCreationError exception is raised
+    """
+    bytes_written = 0
+    file_obj = None
+    try:
+        if file_path:
+            file_obj = open(file_path, 'r+b')
+            file_obj.seek(offset)
+        for data in response.stream(buffer_size if buffer_size else const.STREAM_BUFFER_SIZE):
+            if file_obj:
+                file_obj.write(data)
+            range_stream.put(offset + bytes_written, data)
+            bytes_written = bytes_written + len(data)
+    except (IOError, OSError, TypeError) as exp:
+        raise custom_exceptions.FileCreationError('Error while writing in the file: %s' % repr(exp), file_path)
+    finally:
+        if file_obj:
+            file_obj.close()
+        response.release_conn()
+    return bytes_written
+
+
+def get_file_fingerprint(file_path, sample_size=const.FINGERPRINT_SAMPLE_SIZE):
+    """
+    Computes a fingerprint of the content of the file that is cheap to compute for large files. The size of the file
+    and its first and last sample_size bytes are hashed, which covers the gzip trailers that hold the CRC of the data
+    :param file_path: The path to the file including the file name and extension
+    :param sample_size: the number of bytes hashed at the start and at the end of the file
+    :return: the hex digest of the fingerprint
+    """
+    file_size = getsize(file_path)
+    digest = hashlib.sha256(str(file_size).encode('utf-8'))
+    with open(file_path, 'rb') as file_obj:
+        digest.update(file_obj.read(sample_size))
+        if file_size > sample_size:
+            file_obj.seek(max(sample_size, file_size - sample_size))
+            digest.update(file_obj.read(sample_size))
+    return digest.hexdigest()
+
+
 def get_extension(file_type):
     """
     Returns file extension including '.' according to the given file type
-    :param file_type: format of the file such as gzip
+    :param file_type: format of the file such as gzip, zstd, tsv or parquet
     :return: extension of the file such as '.gz'
     """
     if not file_type:
         return ''
     if file_type.lower() == 'gz' or file_type.lower() == 'gzip':
         return '.gz'
+    if file_type.lower() == 'zst' or file_type.lower() == 'zstd':
+        return '.zst'
+    if file_type.lower() == 'tsv':
+        return '.tsv'
+    if file_type.lower() == 'parquet':
+        return '.parquet'
 
 
 def get_file_name(name_or_path):
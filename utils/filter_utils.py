@@ -16,30 +16,63 @@
 # **************************************************************************/
 
 import sys
+import gzip
 import pandas as pd
-from distutils.util import strtobool
+from functools import lru_cache
+from itertools import islice
+from os import stat
+from os.path import abspath
+
+# the values that are converted to True, case insensitive, the same as distutils strtobool
+TRUE_VALUES = ('y', 'yes', 't', 'true', 'on', '1')
 
 
 def convert_to_bool_false(data):
     try:
-        bool_value = strtobool(data)
-        return pd.np.bool(bool_value)
+        return data.lower() in TRUE_VALUES
     except (ValueError, TypeError, AttributeError):
-        return pd.np.bool(False)
+        return False
 
 
 def convert_to_float_max_int(data):
     try:
-        return pd.np.float(data)
+        return float(data)
     except (ValueError, TypeError, AttributeError):
-        return pd.np.float(sys.maxsize)
+        return float(sys.maxsize)
 
 
 def convert_to_float_zero(data):
     try:
-        return pd.np.float(data)
+        return float(data)
     except (ValueError, TypeError, AttributeError):
-        return pd.np.float(0)
+        return float(0)
+
+
+def convert_column_to_bool_false(column):
+    """
+    Vectorized counterpart of convert_to_bool_false
+    :param column: Series of the string values of a column
+    :return: boolean Series, False for the missing and invalid values
+    """
+    return column.str.lower().isin(TRUE_VALUES)
+
+
+def convert_column_to_float_max_int(column):
+    """
+    Vectorized counterpart of convert_to_float_max_int
+    :param column: Series of the string values of a column
+    :return: float64 Series, sys.maxsize for the missing and invalid values
+    """
+    return pd.to_numeric(column, errors='coerce').astype('float64').fillna(float(sys.maxsize))
+
+
+def convert_column_to_float_zero(column):
+    """
+    Vectorized counterpart of convert_to_float_zero
+    :param column: Series of the string values of a column
+    :return: float64 Series, 0 for the missing and invalid values
+    """
+    return pd.to_numeric(column, errors='coerce').astype('float64').fillna(float(0))
 
 
 def get_inclusive_less_query(column_name, upper_limit):
@@ -66,3 +99,99 @@ def get_list_string_element_query(column_name, value_list):
         return ''
     list_str = (','.join('\'' + item + '\'' for item in value_list))
     return '%s IN (%s)' % (column_name, list_str)
+
+
+def get_index_element_mask(data_frame, column_name, value_index):
+    """
+    Vectorized membership test against a large list of values, which is hashed once instead of once per chunk
+    :param value_index: pandas Index of the unique values, see read_value_list_file
+    :return: boolean Series of the rows that match, None if there is no value index
+    """
+    if value_index is None:
+        return None
+    return pd.Series(value_index.get_indexer(data_frame[str(column_name)]) >= 0, index=data_frame.index)
+
+
+def read_records(input_stream, number_of_records, separator=b'\t', quotechar=b'"'):
+    """
+    Reads number_of_records lines of a separated values stream, and the lines after them that complete the last record.
+    A quoted value may span lines, so a record is one or more lines and the records are never cut in the middle
+    :param input_stream: readable binary stream of the uncompressed lines
+    :param number_of_records: the number of lines to read, a record spanning lines makes it fewer records
+    :param separator: the separator of the values, in bytes
+    :param quotechar: the quote character of the values, in bytes
+    :return: list of the raw records, the lines of a record are joined, empty at the end of the stream
+    """
+    lines = list(islice(input_stream, number_of_records))
+    records = []
+    in_quotes = False
+    for line in lines:
+        if in_quotes:
+            records[-1] = records[-1] + line
+            in_quotes = is_quoted_value_open(line, True, separator, quotechar)
+        else:
+            records.append(line)
+            in_quotes = quotechar in line and is_quoted_value_open(line, False, separator, quotechar)
+    # the last record goes on after the lines that have been read
+    while in_quotes:
+        line = input_stream.readline()
+        if not line:
+            break
+        records[-1] = records[-1] + line
+        in_quotes = is_quoted_value_open(line, True, separator, quotechar)
+    return records
+
+
+def is_quoted_value_open(line, in_quotes, separator=b'\t', quotechar=b'"'):
+    """
+    Follows the quoting of the values of a line the way the pandas C parser does. A value is quoted only if it starts
+    with the quote character, after the initial spaces, and a doubled quote character in a quoted value is a literal one
+    :param line: the raw line, in bytes
+    :param in_quotes: True if the line starts inside a quoted value that began on a previous line
+    :return: True if the line ends inside a quoted value, so the record goes on with the next line
+    """
+    position = 0
+    while True:
+        if not in_quotes:
+            # the start of a value
+            while line[position:position + 1] == b' ':
+                position = position + 1
+            if line[position:position + 1] != quotechar:
+                position = line.find(separator, position)
+                if position < 0:
+                    return False
+                position = position + len(separator)
+                continue
+            in_quotes = True
+            position = position + 1
+        position = line.find(quotechar, position)
+        if position < 0:
+            return True
+        if line[position + 1:position + 2] == quotechar:
+            position = position + 2
+            continue
+        in_quotes = False
+        position = line.find(separator, position + 1)
+        if position < 0:
+            return False
+        position = position + len(separator)
+
+
+def read_value_list_file(file_path):
+    """
+    Reads a list of values from a file, one value per line. The file may be compressed by gzip. The values of the
+    same unchanged file are read once per process
+    :param file_path: the path to the file
+    :return: pandas Index of the unique values
+    """
+    file_stat = stat(file_path)
+    return _read_value_list_file(abspath(file_path), file_stat.st_mtime_ns, file_stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _read_value_list_file(file_path, modification_time, file_size):
+    with open(file_path, 'rb') as list_file:
+        is_gzip = list_file.read(2) == b'\x1f\x8b'
+    with gzip.open(file_path, 'rt', encoding='utf-8') if is_gzip else open(file_path, encoding='utf-8') as list_file:
+        values = [line.strip() for line in list_file]
+    return pd.Index([value for value in values if value], dtype=object).unique()